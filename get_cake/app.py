@@ -1,11 +1,15 @@
+import argparse
+import asyncio
 import os
-import threading
-import time
-from typing import List
+from typing import Optional
 
-import pyautogui as pag
-
-from human_mouse import HumanMouse, InputRecorder
+from human_mouse import InputRecorder, profiling
+from human_mouse.aio import AsyncHumanMouse, AsyncPlaybackClock, play
+from human_mouse.backends import BACKENDS, get_backend
+from human_mouse.playback import PlaybackPlan, PreparedRecording, compile_plan
+from human_mouse.recording.cache import RecordingCache
+from human_mouse.recording.store import EventStore
+from human_mouse.timing import CATCH_UP_POLICIES, DEFAULT_SAMPLE_RATE
 
 HOTKEYS = {
     'record': 'r',
@@ -13,30 +17,73 @@ HOTKEYS = {
     'play': 'p',
     'clear': 'c',
     'loop': 'l',
+    'reload': 'f',
+    'profile': 'i',
 }
 
 STATE_IDLE = 'idle'
 STATE_RECORDING = 'recording'
 STATE_PLAYING = 'playing'
+# Stopped recording, compacting the file off the event loop
+STATE_SAVING = 'saving'
+
+# Seconds between the end of one loop pass and the start of the next
+LOOP_PAUSE = 6.0
 
 
 class App:
-    def __init__(self):
-        self.mouse = HumanMouse()
+    def __init__(
+        self,
+        backend: str = 'pyautogui',
+        start: 'float | None' = None,
+        end: 'float | None' = None,
+        watch: bool = False,
+        catch_up: str = 'late',
+        sample_rate: 'float | None' = DEFAULT_SAMPLE_RATE,
+        profile: 'str | None' = None,
+        speed: float = 1.0,
+        idle_gap: 'float | None' = None,
+        idle_to: 'float | None' = None,
+        loop_pause: float = LOOP_PAUSE,
+    ):
+        if speed <= 0:
+            raise ValueError("speed must be positive")
+        # Time warp applied when a recording is prepared (the file is never changed)
+        self.speed = speed
+        self.idle_gap = idle_gap
+        self.idle_to = idle_to
+        self.loop_pause = max(0.0, loop_pause)
+        # Per-stage timings ([i] prints them); written as a Chrome trace on exit if a path is given
+        self._profile_path = profile
+        if profile is not None:
+            profiling.enable()
+        self.backend = get_backend(backend)
+        self.mouse = AsyncHumanMouse(backend=self.backend, sample_rate=sample_rate)
+        # One timeline for all loop passes, so lateness never accumulates
+        self.clock = AsyncPlaybackClock(self.mouse.scheduler, policy=catch_up)
         self.loop = False
-        self._save_path = os.path.join(os.path.dirname(__file__), 'last_recording.json')
+        self._save_path = os.path.join(os.path.dirname(__file__), 'last_recording.rec')
+        # Where older builds saved; still played until a new recording is made
+        self._legacy_path = os.path.join(os.path.dirname(__file__), 'last_recording.json')
         self.recorder = InputRecorder(
             record_moves=False,
             ignored_keys=set(HOTKEYS.values()),
             on_event=self._on_record_event,
         )
         self.state = STATE_IDLE
-        self.events: List[dict] = []
-        self._play_thread: threading.Thread | None = None
-        self._stop_play = threading.Event()
+        self.events = EventStore.empty()
+        # Optional section to play/loop, in seconds from the first event
+        self.window = (start, end)
+        # Decoded recordings, reused across loops until the file changes
+        self._cache = RecordingCache(self._prepare)
+        if watch:
+            self._cache.watch(self._save_path)
+        # Playback and hotkey handling all run on this loop (in the main thread)
+        self._loop = asyncio.new_event_loop()
+        self._play_task: 'asyncio.Task | None' = None
 
     def start(self):
-        print("App ready. Hotkeys: [r]=record, [s]=stop, [p]=play, [c]=clear, [l]=loop toggle. Move mouse to top-left to abort.")
+        print("App ready. Hotkeys: [r]=record, [s]=stop, [p]=play, [c]=clear, [l]=loop toggle, [f]=reload file, [i]=timing report. Move mouse to top-left to abort.")
         from pynput import keyboard
 
         def on_press(key):
@@ -44,163 +91,206 @@ class App:
                 k = key.char.lower() if hasattr(key, 'char') and key.char else None
             except Exception:
                 k = None
-            if k == HOTKEYS['record'] and self.state != STATE_RECORDING:
-                self._start_recording()
-            elif k == HOTKEYS['stop'] and self.state == STATE_RECORDING:
-                self._stop_recording()
-            elif k == HOTKEYS['play'] and self.state != STATE_RECORDING:
-                self._start_playback()
-            elif k == HOTKEYS['clear'] and self.state != STATE_RECORDING:
-                self._clear()
-            elif k == HOTKEYS['loop'] and self.state != STATE_RECORDING:
-                self.loop = not self.loop
-                print(f"Loop mode: {'ON' if self.loop else 'OFF'}")
-            elif k == HOTKEYS['stop'] and self.state == STATE_PLAYING:
-                self._stop_playback()
-
-        with keyboard.Listener(on_press=on_press) as listener:
-            try:
-                listener.join()
-            except KeyboardInterrupt:
-                pass
+            if k is not None:
+                # Hand the key to the event loop; the listener thread does nothing else
+                self._loop.call_soon_threadsafe(self._on_hotkey, k)
+
+        listener = keyboard.Listener(on_press=on_press)
+        listener.start()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            listener.stop()
+            self._loop.close()
+            self._dump_profile()
+
+    def _on_hotkey(self, k: str):
+        if self.state == STATE_SAVING and k != HOTKEYS['profile']:
+            print("Still saving the recording...")
+        elif k == HOTKEYS['record'] and self.state != STATE_RECORDING:
+            self._start_recording()
+        elif k == HOTKEYS['stop'] and self.state == STATE_RECORDING:
+            self.state = STATE_SAVING
+            self._loop.create_task(self._stop_recording())
+        elif k == HOTKEYS['play'] and self.state != STATE_RECORDING:
+            self._start_playback()
+        elif k == HOTKEYS['clear'] and self.state != STATE_RECORDING:
+            self._clear()
+        elif k == HOTKEYS['loop'] and self.state != STATE_RECORDING:
+            self.loop = not self.loop
+            print(f"Loop mode: {'ON' if self.loop else 'OFF'}")
+        elif k == HOTKEYS['stop'] and self.state == STATE_PLAYING:
+            self._loop.create_task(self._stop_playback())
+        elif k == HOTKEYS['reload'] and self.state != STATE_RECORDING:
+            self._loop.create_task(self._reload())
+        elif k == HOTKEYS['profile']:
+            self._dump_profile()
+
+    def _dump_profile(self):
+        prof = profiling.profiler()
+        if prof is None:
+            if self._profile_path is None:
+                print("Timing is off (run with --profile)")
+            return
+        print(prof.report())
+        if self._profile_path:
+            n = prof.export_chrome_trace(self._profile_path)
+            print(f"Wrote {n} spans to {self._profile_path}")
 
     def _start_recording(self):
         self.recorder = InputRecorder(
             record_moves=False,
             ignored_keys=set(HOTKEYS.values()),
             on_event=self._on_record_event,
+            # Stream straight to disk: flat memory, and a crash keeps what was recorded
+            stream_to=self._save_path,
         )
         self.recorder.start()
         self.state = STATE_RECORDING
         print("Recording... [s] to stop")
 
-    def _stop_recording(self):
-        evs = self.recorder.stop()
-        self.events = [
-            {"t": e.t, "type": e.type, "x": e.x, "y": e.y, "dx": e.dx, "dy": e.dy, "key": e.key}
-            for e in evs
-        ]
+    async def _stop_recording(self):
+        # File work runs in the default executor so hotkeys and playback
+        # timing on the event loop never wait for the disk
+        run = self._loop.run_in_executor
         try:
-            self.recorder.save(self._save_path)
+            await run(None, self.recorder.stop)
+            # Compact the streamed segments in place for fast mmap loads
+            await run(None, self.recorder.save, self._save_path)
+            self.events = (await run(None, self._cache.reload, self._save_path)).store
             print(f"Saved recording to: {self._save_path}")
         except Exception as e:
             print(f"Failed to save recording: {e}")
-        self.state = STATE_IDLE
-        print(f"Recorded {len(self.events)} events.")
+        finally:
+            self.state = STATE_IDLE
+        print(f"Recorded {self.recorder.count} events.")
+        print(f"Event log: {self.recorder.dispatch_stats}")
 
-    def _playback_worker(self):
+    async def _playback(self):
         print(f"Playing {len(self.events)} events... (loop={'ON' if self.loop else 'OFF'})")
-        while not self._stop_play.is_set():
-            # Optionally refresh events from save file each loop iteration
-            if self._save_path and os.path.exists(self._save_path):
-                try:
-                    loaded = InputRecorder.load(self._save_path)
-                    self.events = [
-                        {"t": e.t, "type": e.type, "x": e.x, "y": e.y, "dx": e.dx, "dy": e.dy, "key": e.key}
-                        for e in loaded
-                    ]
-                except Exception as e:
-                    print(f"Failed to load saved recording: {e}")
-
-            if not self.events:
-                print("No events to play.")
-                break
-
-            first = self.events[0]
-            # Pre-position to the start; don't count pre-move time into event schedule
-            if first.get('x') is not None and first.get('y') is not None:
-                pag.moveTo(int(first['x']), int(first['y']))
-
-            # Reset time baseline AFTER pre-move so relative timings align exactly
-            t_offset = float(first.get('t', 0.0))
-            t0 = time.perf_counter()
-
-            # Lerp mouse between action points: aim to arrive at the event timestamp.
-            for e in self.events:
-                if self._stop_play.is_set():
+        backend = self.backend
+        # The user may have moved the mouse since the last run
+        backend.sync()
+        clock = self.clock
+        run = self._loop.run_in_executor
+        # Start of the next pass on the clock's timeline (None: not started yet)
+        base = None
+        try:
+            while True:
+                # Re-read the save file only if it changed since the last loop
+                prepared = None
+                path = self._load_path()
+                if path is not None:
+                    try:
+                        prepared = await run(None, self._cache.get, path)
+                        self.events = prepared.store
+                    except Exception as e:
+                        print(f"Failed to load saved recording: {e}")
+                if prepared is None:
+                    prepared = self._prepared(self.events)
+
+                if not len(prepared):
+                    print("No events to play.")
                     break
-                t_event = float(e.get('t', 0)) - t_offset
-                etype = e.get('type')
-                ex = e.get('x')
-                ey = e.get('y')
-
-                # Time until this event
-                elapsed = time.perf_counter() - t0
-                dt = max(0.0, t_event - elapsed)
-
-                # If we have coordinates, move smoothly and arrive before the action, then wait until event time
-                if ex is not None and ey is not None:
-                    if dt > 0.02:
-                        move_dur = min(0.8, dt * 0.8)
-                        self.mouse.move_to(int(ex), int(ey), duration_seconds=move_dur, jitter=1.0, easing="dash")
-                        wait_left = max(0.0, dt - move_dur)
-                        deadline = time.perf_counter() + wait_left
-                        while time.perf_counter() < deadline and not self._stop_play.is_set():
-                            time.sleep(0.005)
-                        if self._stop_play.is_set():
-                            break
-                    else:
-                        # No time to lerp: still prefer a slight ease-out hop
-                        self.mouse.move_to(int(ex), int(ey), duration_seconds=0.02, jitter=0.0, easing="dash")
+
+                # Compile before the pass starts: fresh paths each loop, nothing parsed while playing
+                plan = await run(None, self._compile, prepared)
+                if plan.skipped:
+                    print(f"Skipping unsupported keys: {', '.join(sorted(set(plan.skipped)))}")
+
+                # Passes start at fixed points of one timeline: time spent loading,
+                # compiling or running late comes out of the pause, not the schedule
+                if base is None:
+                    clock.start()
+                    base = 0.0
                 else:
-                    # No coordinates: wait until event time (with stop responsiveness)
-                    deadline = time.perf_counter() + dt
-                    while time.perf_counter() < deadline and not self._stop_play.is_set():
-                        time.sleep(0.005)
-                    if self._stop_play.is_set():
-                        break
-
-                # Perform the event action at its timestamp
-                if etype == 'left_down':
-                    pag.mouseDown(button='left', x=int(e.get('x', 0)), y=int(e.get('y', 0)))
-                elif etype == 'left_up':
-                    pag.mouseUp(button='left', x=int(e.get('x', 0)), y=int(e.get('y', 0)))
-                elif etype == 'right_down':
-                    pag.mouseDown(button='right', x=int(e.get('x', 0)), y=int(e.get('y', 0)))
-                elif etype == 'right_up':
-                    pag.mouseUp(button='right', x=int(e.get('x', 0)), y=int(e.get('y', 0)))
-                elif etype == 'scroll':
-                    pag.scroll(int(e.get('dy', 0)))
-                elif etype == 'key_down':
-                    pag.keyDown(str(e.get('key', '')))
-                elif etype == 'key_up':
-                    pag.keyUp(str(e.get('key', '')))
-            if self._stop_play.is_set():
-                break
-            if not self.loop:
-                break
-            # Pause before next loop iteration to avoid immediate restart
-            print("Looping again in 6 seconds... [s] to stop")
-            deadline = time.perf_counter() + 6.0
-            while not self._stop_play.is_set() and time.perf_counter() < deadline:
-                time.sleep(0.05)
-        print("Playback ended.")
-        self.state = STATE_IDLE
+                    await clock.wait(base)
+
+                if plan.first is not None:
+                    backend.move(*plan.first)
+                timing = await play(plan, clock, base)
+                print(f"Pass done: {timing.count} steps, lateness p50={timing.p50 * 1e3:.2f}ms p95={timing.p95 * 1e3:.2f}ms max={timing.max * 1e3:.2f}ms")
+                print(f"Drift: {clock.metrics}")
+                if not self.loop:
+                    break
+                # Pause before next loop iteration to avoid immediate restart
+                print(f"Looping again in {self.loop_pause:g} seconds... [s] to stop")
+                base += plan.duration + self.loop_pause
+        except asyncio.CancelledError:
+            # play() has already let go of any button or key the pass held
+            pass
+        except Exception as e:
+            print(f"Playback failed: {e}")
+        finally:
+            print(f"Playback ended. Recording cache: {self._cache.stats}")
+            self.state = STATE_IDLE
 
     def _start_playback(self):
         if not self.events:
-            can_load = self._save_path and os.path.exists(self._save_path)
-            if not can_load:
+            if self._load_path() is None:
                 print("Nothing to play.")
                 return
-        if self._play_thread and self._play_thread.is_alive():
+        if self._play_task and not self._play_task.done():
             print("Already playing.")
             return
         self.state = STATE_PLAYING
-        self._stop_play.clear()
-        self._play_thread = threading.Thread(target=self._playback_worker, daemon=True)
-        self._play_thread.start()
+        self._play_task = self._loop.create_task(self._playback())
+
+    def _load_path(self) -> Optional[str]:
+        """The saved recording to play: ``last_recording.rec``, or the
+        ``last_recording.json`` of older builds if there is none yet."""
+        for path in (self._save_path, self._legacy_path):
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _compile(self, prepared: PreparedRecording) -> PlaybackPlan:
+        with profiling.span("plan.compile"):
+            return compile_plan(prepared, self.backend, self.mouse.paths, lerp=True, sample_rate=self.mouse.sample_rate)
+
+    def _prepare(self, path: str) -> PreparedRecording:
+        # Private copy (no mmap): a new recording may overwrite the file
+        with profiling.span("recording.prepare"):
+            return self._prepared(EventStore.open(path, mmap=False))
+
+    def _prepared(self, store: EventStore) -> PreparedRecording:
+        return PreparedRecording(
+            store, self.window, speed=self.speed, idle_gap=self.idle_gap, idle_to=self.idle_to
+        )
+
+    async def _reload(self):
+        path = self._load_path()
+        if path is None:
+            print("No saved recording to reload.")
+            return
+        try:
+            prepared = await self._loop.run_in_executor(None, self._cache.reload, path)
+        except Exception as e:
+            print(f"Failed to reload recording: {e}")
+            return
+        self.events = prepared.store
+        print(f"Reloaded {len(prepared)} events. Cache: {self._cache.stats}")
 
     def _clear(self):
-        self.events = []
+        self.events = EventStore.empty()
         print("Cleared recorded events.")
 
-    def _stop_playback(self):
-        if self._play_thread and self._play_thread.is_alive():
+    async def _stop_playback(self):
+        task = self._play_task
+        if task and not task.done():
             print("Stopping playback...")
-            self._stop_play.set()
-            self._play_thread.join(timeout=2.0)
-        self.state = STATE_IDLE
+            # Takes effect at the task's next await: no stop flag to poll
+            task.cancel()
+            # The task goes idle itself once it has unwound
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        else:
+            self.state = STATE_IDLE
 
     def _on_record_event(self, ev):
         if ev.type.startswith('left') or ev.type.startswith('right') or ev.type in ('scroll', 'key_down', 'key_up'):
@@ -213,4 +303,22 @@ class App:
 
 
 if __name__ == "__main__":
-    App().start()
+    parser = argparse.ArgumentParser(description="Hotkey-driven recorder and playback")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="pyautogui", help="Mouse/keyboard output driver")
+    parser.add_argument("--from", dest="start", type=float, help="Play from this many seconds into the recording")
+    parser.add_argument("--to", dest="end", type=float, help="Stop (or loop) at this many seconds into the recording")
+    parser.add_argument("--watch", action="store_true", help="Reload the recording as soon as the file changes")
+    parser.add_argument("--catch-up", choices=CATCH_UP_POLICIES, default="late",
+                        help="When playback falls behind: fire late (late), catch up gradually (compress) or shift the timeline (pause)")
+    parser.add_argument("--sample-rate", type=float, default=DEFAULT_SAMPLE_RATE,
+                        help="Cursor updates per second of generated moves (0: every path point)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Playback speed factor (lerp moves scale with it)")
+    parser.add_argument("--idle-gap", type=float, help="Shrink pauses longer than this many seconds...")
+    parser.add_argument("--idle-to", type=float, help="...down to this many seconds (default: --idle-gap)")
+    parser.add_argument("--loop-pause", type=float, default=LOOP_PAUSE, help="Seconds between loop passes (0: back to back)")
+    parser.add_argument("--profile", nargs="?", const="", metavar="TRACE_JSON",
+                        help="Time each stage ([i] prints a report); with a path, write a Chrome trace on exit")
+    args = parser.parse_args()
+    App(backend=args.backend, start=args.start, end=args.end, watch=args.watch, catch_up=args.catch_up,
+        sample_rate=args.sample_rate or None, profile=args.profile, speed=args.speed,
+        idle_gap=args.idle_gap, idle_to=args.idle_to, loop_pause=args.loop_pause).start()
@@ -0,0 +1,87 @@
+"""Compare per-event memory and conversion cost of the event representations.
+
+"legacy" is the old ``@dataclass RecordedEvent`` with string types, plus the
+dict copy the app used to make of every event; "slotted" is the current
+``RecordedEvent``; "columns" is ``EventColumns``.
+
+    python benchmarks/bench_event_memory.py --events 1000000
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from human_mouse.bench import synthetic_columns  # noqa: E402
+from human_mouse.recording.columnar import EventColumns  # noqa: E402
+from human_mouse.recording.events import RecordedEvent  # noqa: E402
+
+
+@dataclass
+class LegacyEvent:
+    t: float
+    type: str
+    x: Optional[int] = None
+    y: Optional[int] = None
+    dx: Optional[int] = None
+    dy: Optional[int] = None
+    key: Optional[str] = None
+
+
+def measure(build):
+    """Return (result, seconds, bytes held by the result).
+
+    Timed without tracing (tracemalloc slows allocation down several
+    times), then built again under tracemalloc to size it.
+    """
+    gc.collect()
+    t0 = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - t0
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    args = parser.parse_args()
+    n = args.events
+
+    cols = synthetic_columns(n)
+    # Plain Python rows, as a recorder would receive them from the listeners
+    rows = [e.to_dict() for e in cols]
+    keys = cols.keys
+
+    legacy, legacy_s, legacy_b = measure(lambda: [LegacyEvent(**r) for r in rows])
+    slotted, slotted_s, slotted_b = measure(lambda: [RecordedEvent(**r) for r in rows])
+    _, dicts_s, dicts_b = measure(lambda: [asdict(e) for e in legacy])
+    packed, packed_s, packed_b = measure(lambda: EventColumns.from_events(slotted))
+    _, from_legacy_s, _ = measure(lambda: EventColumns.from_events(legacy))
+    _, unpack_s, _ = measure(lambda: packed.to_events())
+
+    def row(name, seconds, size):
+        print(f"{name:40s} {size / n:8.1f} B/event  {seconds:8.3f} s")
+
+    print(f"{n} events ({len(keys)} distinct keys)")
+    row("legacy dataclass: build", legacy_s, legacy_b)
+    row("legacy: dict copy of every event", dicts_s, dicts_b)
+    row("slotted RecordedEvent: build", slotted_s, slotted_b)
+    row("columns from legacy events", from_legacy_s, packed_b)
+    row("columns from slotted events", packed_s, packed_b)
+    row("columns -> slotted events", unpack_s, slotted_b)
+    print(f"slotted/legacy memory: {slotted_b / legacy_b:.2f}x (+ {dicts_b / n:.0f} B/event of dicts no longer made)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Compare per-move path generation cost of PathEngine and PathCache.
+
+Moves cycle between a few fixed screen targets, as in a scripted workflow.
+
+    python benchmarks/bench_path_cache.py --moves 5000 --targets 4
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from human_mouse.paths import PathCache, PathEngine  # noqa: E402
+
+
+def run(engine, pairs):
+    t0 = time.perf_counter()
+    lengths = [len(engine.generate(s, e)) for s, e in pairs]
+    return time.perf_counter() - t0, float(np.mean(lengths))
+
+
+def bow(engine, start, end, n=200):
+    """Mean absolute peak deviation from the straight line, in pixels."""
+    s, e = np.asarray(start, float), np.asarray(end, float)
+    d = e - s
+    normal = np.array((-d[1], d[0])) / np.hypot(*d)
+    return float(np.mean([np.abs((engine.generate(start, end) - s) @ normal).max() for _ in range(n)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--moves", type=int, default=5000)
+    parser.add_argument("--targets", type=int, default=4)
+    parser.add_argument("--variation", type=float, default=0.15)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    targets = [tuple(p) for p in rng.integers(0, (1920, 1080), (args.targets, 2)).tolist()]
+    pairs = [(targets[i % len(targets)], targets[(i + 1) % len(targets)]) for i in range(args.moves)]
+
+    engine = PathEngine(seed=0)
+    cache = PathCache(seed=0, variation=args.variation)
+    engine_s, engine_n = run(engine, pairs)
+    cache_s, cache_n = run(cache, pairs)
+
+    print(f"{args.moves} moves between {len(targets)} targets")
+    print(f"PathEngine: {engine_s / args.moves * 1e6:7.1f} us/move  {engine_n:6.1f} points/move")
+    print(f"PathCache:  {cache_s / args.moves * 1e6:7.1f} us/move  {cache_n:6.1f} points/move  {cache.stats()}")
+    print(f"speedup: {engine_s / cache_s:.1f}x")
+    a, b = targets[0], targets[1]
+    print(f"mean bow {a}->{b}: engine {bow(engine, a, b):.1f}px, cache {bow(cache, a, b):.1f}px")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compare file size and load time of the v1 JSON and v2 columnar formats.
+
+    python benchmarks/bench_recording_format.py --events 200000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from human_mouse.bench import synthetic_columns  # noqa: E402
+from human_mouse.recording.columnar import EventColumns, read_columns, write_columns  # noqa: E402
+from human_mouse.recording.events import RecordedEvent  # noqa: E402
+
+
+def load_v1(path):
+    # Equivalent of the original InputRecorder.load: parse JSON, one object per row
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [RecordedEvent(
+        t=float(e.get('t', 0)), type=e.get('type'),
+        x=e.get('x'), y=e.get('y'), dx=e.get('dx'), dy=e.get('dy'), key=e.get('key'),
+    ) for e in data.get("events", [])]
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    events = synthetic_columns(args.events).to_events()
+    with tempfile.TemporaryDirectory() as tmp:
+        v1 = os.path.join(tmp, "rec.json")
+        v2 = os.path.join(tmp, "rec.rec")
+        with open(v1, "w", encoding="utf-8") as f:
+            json.dump({"events": [e.to_dict() for e in events], "version": 1}, f, ensure_ascii=False, indent=2)
+        write_columns(v2, EventColumns.from_events(events))
+
+        size1, size2 = os.path.getsize(v1), os.path.getsize(v2)
+        load1 = best_of(lambda: load_v1(v1), args.repeat)
+        load2 = best_of(lambda: read_columns(v2), args.repeat)
+        load2_copy = best_of(lambda: read_columns(v2, mmap=False), args.repeat)
+
+    print(f"events:           {args.events}")
+    print(f"v1 JSON size:     {size1 / 1e6:8.2f} MB")
+    print(f"v2 columnar size: {size2 / 1e6:8.2f} MB  ({size1 / size2:.1f}x smaller)")
+    print(f"v1 load:          {load1 * 1e3:8.2f} ms")
+    print(f"v2 load (mmap):   {load2 * 1e3:8.2f} ms  ({load1 / load2:.0f}x faster)")
+    print(f"v2 load (copy):   {load2_copy * 1e3:8.2f} ms  ({load1 / load2_copy:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
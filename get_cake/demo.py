@@ -1,10 +1,194 @@
 import argparse
+import json
+import os
+import sys
+import threading
 import time
-from human_mouse import HumanMouse, InputRecorder
+# Only stdlib-backed modules at import time: NumPy, pyautogui and pynput load
+# when a command needs them, so `wait` and `--connect` clients start fast
+from human_mouse.backends import BACKENDS
+from human_mouse.defaults import CATCH_UP_POLICIES, DEFAULT_MOVE_RATE, DEFAULT_SAMPLE_RATE, DEFAULT_WPM
+from human_mouse.ipc import request
+
+
+BATCH_COMMANDS = ("stats", "convert", "trim", "retime", "merge")
+# Commands a --connect client forwards to `demo.py serve`
+DAEMON_COMMANDS = ("move", "left-click", "right-click", "wait", "press", "press-x", "type", "play", "status", "shutdown")
+# Commands that only make sense with --connect
+_CLIENT_COMMANDS = ("status", "shutdown")
+# Options that only matter to the local process
+_LOCAL_OPTIONS = ("backend", "sample_rate", "profile", "connect")
+
+
+def _add_batch_args(p, out=True):
+    p.add_argument("paths", nargs="+", help="Recording files and/or directories to scan")
+    p.add_argument("--pattern", action="append", help="File patterns to pick up in directories (default: *.json, *.rec)")
+    p.add_argument("--jobs", type=int, help="Worker processes (default: one per core)")
+    p.add_argument("--index", type=str, help="Write the JSON summary index here")
+    if out:
+        p.add_argument("--out", type=str, required=True, help="Directory for the rewritten recordings")
+        p.add_argument("--format", type=int, choices=[1, 2], default=2, help="Output format: 2 binary (default), 1 legacy JSON")
+
+
+def _print_summary(r):
+    if "error" in r:
+        print(f"{r['path']}: ERROR {r['error']}")
+        return
+    types = " ".join(f"{k}={v}" for k, v in r["types"].items())
+    print(
+        f"{r['path']}: {r['events']} events, {r['duration_s']:.1f}s, {r['clicks']} clicks "
+        f"({r['clicks_per_min']:.1f}/min), travel {r['travel_px']:.0f}px [{types}]"
+    )
+
+
+def _run_batch(args):
+    from human_mouse.recording import batch
+
+    files = batch.find_recordings(args.paths, tuple(args.pattern or batch.RECORDING_PATTERNS))
+    if not files:
+        print("No recordings found.")
+        return
+    if args.cmd == "merge":
+        results = [batch.merge_files(files, args.output, args.gap, args.format)]
+        _print_summary(results[0])
+        index = args.index
+    elif args.cmd == "stats":
+        results = batch.run_batch(batch.file_stats, files, args.jobs, on_result=_print_summary)
+        index = args.index
+    else:
+        # Mirror the inputs' directory layout under --out
+        ext = ".rec" if args.format == 2 else ".json"
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in files])
+        dsts = {}
+        for f in files:
+            rel = os.path.relpath(os.path.abspath(f), root)
+            dsts[f] = os.path.join(args.out, os.path.splitext(rel)[0] + ext)
+            os.makedirs(os.path.dirname(dsts[f]) or ".", exist_ok=True)
+        options = {"version": args.format}
+        if args.cmd == "convert":
+            func = batch.convert_file
+        elif args.cmd == "trim":
+            func = batch.trim_file
+            options.update(start=args.start, end=args.end)
+        else:
+            func = batch.retime_file
+            options.update(speed=args.speed, max_gap=args.max_gap)
+        results = batch.run_batch(func, files, args.jobs, dst=dsts.__getitem__, on_result=_print_summary, **options)
+        index = args.index or os.path.join(args.out, batch.INDEX_NAME)
+    if index:
+        doc = batch.write_index(index, args.cmd, results)
+        totals = doc["totals"]
+        print(
+            f"{totals['files']} files ({totals['errors']} errors), {totals['events']} events, "
+            f"{totals['duration_s']:.1f}s, {totals['clicks']} clicks. Index: {index}"
+        )
+
+
+def _print_validation(r):
+    if "error" in r:
+        print(f"{r['path']}: ERROR {r['error']}")
+        return
+    timing = f"{r['events']} events, {r['duration_s']:.1f}s simulated in {r['simulated_in_s']:.2f}s"
+    if r["ok"]:
+        print(f"{r['path']}: ok ({timing})")
+        return
+    issues = " ".join(f"{k}={v}" for k, v in r["issues"].items())
+    print(f"{r['path']}: FAILED {issues} ({timing})")
+    for line in r["examples"][:5]:
+        print(f"    {line}")
+
+
+def _run_validate(args):
+    """Simulate every recording headlessly; returns the exit code (1 if any failed)."""
+    from human_mouse import simulate
+    from human_mouse.recording import batch
+
+    files = batch.find_recordings(args.paths, tuple(args.pattern or batch.RECORDING_PATTERNS))
+    if not files:
+        print("No recordings found.")
+        return 0
+    try:
+        w, h = (int(v) for v in args.screen.lower().split("x"))
+    except ValueError:
+        print(f"Bad --screen {args.screen!r}; expected WIDTHxHEIGHT", file=sys.stderr)
+        return 2
+    results = batch.run_batch(
+        simulate.validate_file, files, args.jobs, on_result=_print_validation,
+        screen=(w, h), lerp=not args.no_lerp, seed=args.seed, sample_rate=args.sample_rate or None,
+        latency=args.latency, max_speed=args.max_speed or simulate.MAX_SPEED, ignore=tuple(args.ignore or ()),
+        key_backend=args.key_backend,
+    )
+    failed = [r for r in results if "error" in r or not r["ok"]]
+    print(f"{len(results)} recordings, {len(failed)} failed.")
+    if args.index:
+        simulate.write_report(args.index, results)
+        print(f"Report: {args.index}")
+    return 1 if failed else 0
+
+
+def _unescape(text):
+    return text.replace("\\n", "\n").replace("\\t", "\t")
+
+
+def _send(args):
+    """Forward the parsed command to a running daemon; returns the exit code."""
+    msg = {k: v for k, v in vars(args).items() if k not in _LOCAL_OPTIONS and v is not None}
+    if "input" in msg:
+        # The daemon may run in another directory
+        msg["input"] = os.path.abspath(msg["input"])
+    try:
+        reply = request(args.connect, msg)
+    except (OSError, ValueError) as e:
+        print(f"Error: daemon at {args.connect}: {e}", file=sys.stderr)
+        return 2
+    if not reply.get("ok"):
+        print(f"Error: {reply.get('error')}", file=sys.stderr)
+        return 1
+    reply.pop("ok")
+    if reply:
+        print(json.dumps(reply))
+    return 0
+
+
+def _serve(args, mouse):
+    from human_mouse.daemon import ControlDaemon
+    from human_mouse.ipc import serve
+
+    daemon = ControlDaemon(mouse)
+    done = threading.Event()
+
+    def handle(msg):
+        if msg.get("cmd") == "shutdown":
+            done.set()
+            return {"ok": True}
+        return daemon.handle(msg)
+
+    try:
+        listener = serve(args.address, handle, allow_remote=args.allow_remote)
+    except (OSError, ValueError) as e:
+        print(f"Error: cannot serve {args.address}: {e}", file=sys.stderr)
+        sys.exit(2)
+    print(f"Serving {mouse.backend.name} on {args.address}; send commands with: demo.py --connect {args.address} ...")
+    try:
+        # Short waits keep Ctrl+C responsive on Windows
+        while not done.wait(0.5):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.shutdown()
+        listener.server_close()
 
 
 def main():
     parser = argparse.ArgumentParser(description="Human-like mouse demo")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="pyautogui", help="Mouse/keyboard output driver")
+    parser.add_argument("--sample-rate", type=float, default=DEFAULT_SAMPLE_RATE,
+                        help="Cursor updates per second of generated moves (0: every path point)")
+    parser.add_argument("--profile", nargs="?", const="", metavar="TRACE_JSON",
+                        help="Print per-stage timings at the end; with a path, also write a Chrome trace")
+    parser.add_argument("--connect", metavar="ADDRESS",
+                        help="Send the command to a running `demo.py serve` (unix:/path or host:port) instead of running it here")
     sub = parser.add_subparsers(dest="cmd", required=True)
 
     p_move = sub.add_parser("move", help="Move to x y")
@@ -23,15 +207,108 @@ def main():
 
     sub.add_parser("press-x", help="Press the 'x' key once")
 
-    p_rec = sub.add_parser("record", help="Record mouse+keyboard to JSON until Ctrl+C")
-    p_rec.add_argument("output", type=str, help="Path to write JSON events file")
+    p_type = sub.add_parser("type", help="Type text with human-like key timing")
+    p_type.add_argument("text", type=_unescape, help="Text to type (\\n for Enter, \\t for Tab)")
+    p_type.add_argument("--wpm", type=float, default=DEFAULT_WPM, help="Typing speed in words per minute")
+    p_type.add_argument("--typos", type=float, default=0.0, help="Chance per letter of a corrected typo")
+    p_type.add_argument("--seed", type=int, help="Seed for reproducible timing and typos")
+
+    p_rec = sub.add_parser("record", help="Record mouse+keyboard until Ctrl+C")
+    p_rec.add_argument("output", type=str, help="Path to write the recording")
+    p_rec.add_argument("--simplify", type=str, default="none",
+                       help="Move simplifier: none (default, every move kept) | rdp[:tolerance_px[:window]] | gate[:min_px[:min_seconds]]")
+    p_rec.add_argument("--last", type=float, help="Keep only the last N seconds, in fixed memory (ring buffer)")
+    p_rec.add_argument("--max-events", type=int, help="Ring buffer size in events (default: sized from --last)")
+    p_rec.add_argument("--snapshot-every", type=float,
+                       help="With --last/--max-events: rewrite the output with the current window every N seconds")
+
+    p_play = sub.add_parser("play", help="Play back a recording")
+    p_play.add_argument("input", type=str, help="Path to a recording (binary or legacy JSON)")
+    p_play.add_argument("--move-rate", type=float, default=DEFAULT_MOVE_RATE,
+                        help="Interpolate between recorded move points at this rate (Hz); 0 disables")
+    p_play.add_argument("--from", dest="start", type=float, help="Start this many seconds into the recording")
+    p_play.add_argument("--to", dest="end", type=float, help="Stop this many seconds into the recording")
+    p_play.add_argument("--catch-up", choices=CATCH_UP_POLICIES, default="late",
+                        help="When playback falls behind: fire late (late), catch up gradually (compress) or shift the timeline (pause)")
+    p_play.add_argument("--speed", type=float, default=1.0, help="Playback speed factor")
+    p_play.add_argument("--idle-gap", type=float, help="Shrink pauses longer than this many seconds...")
+    p_play.add_argument("--idle-to", type=float, help="...down to this many seconds (default: --idle-gap)")
+
+    p_run = sub.add_parser("run", help="Run a script of move/click/press/type/wait/play steps, planning each step ahead")
+    p_run.add_argument("script", type=str, help="Text file (one step per line) or JSON list of steps")
+    p_run.add_argument("--catch-up", choices=CATCH_UP_POLICIES, default="late",
+                       help="Catch-up policy for play steps")
+
+    sub.add_parser("status", help="Show a running daemon's backend, position and counters (with --connect)")
+    sub.add_parser("shutdown", help="Stop a running daemon (with --connect)")
+    p_serve = sub.add_parser("serve", help="Keep a warm mouse and backend; run commands sent with --connect")
+    p_serve.add_argument("address", help="unix:/path/to.sock or 127.0.0.1:port")
+    p_serve.add_argument("--allow-remote", action="store_true",
+                         help="Listen on a non-loopback host; anyone who can connect can then drive this machine")
 
-    p_play = sub.add_parser("play", help="Play back a JSON recording")
-    p_play.add_argument("input", type=str, help="Path to JSON events file")
+    p_stats = sub.add_parser("stats", help="Summarize recordings in parallel")
+    _add_batch_args(p_stats, out=False)
+    p_convert = sub.add_parser("convert", help="Rewrite recordings in another format")
+    _add_batch_args(p_convert)
+    p_trim = sub.add_parser("trim", help="Keep a time window of each recording")
+    _add_batch_args(p_trim)
+    p_trim.add_argument("--from", dest="start", type=float, help="Seconds from the first event")
+    p_trim.add_argument("--to", dest="end", type=float, help="Seconds from the first event (exclusive)")
+    p_retime = sub.add_parser("retime", help="Speed up recordings and/or cap their pauses")
+    _add_batch_args(p_retime)
+    p_retime.add_argument("--speed", type=float, default=1.0, help="Playback speed factor")
+    p_retime.add_argument("--max-gap", type=float, help="Cap every pause at this many seconds (before --speed)")
+    p_validate = sub.add_parser("validate", help="Play recordings headlessly on a virtual clock and check them")
+    _add_batch_args(p_validate, out=False)
+    p_validate.add_argument("--screen", type=str, default="1920x1080", help="Screen size to check coordinates against")
+    p_validate.add_argument("--no-lerp", action="store_true", help="Play like `play` (recorded events only), not like the app")
+    p_validate.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per backend call")
+    p_validate.add_argument("--max-speed", type=float, help="Fastest feasible generated move, px/s (default: 6000)")
+    p_validate.add_argument("--seed", type=int, default=0, help="Path engine seed (results are reproducible)")
+    p_validate.add_argument("--key-backend", choices=sorted(set(BACKENDS) - {"memory"}),
+                            help="Check key names against this backend's key table, as live playback will "
+                                 "(needs the backend's library and a display)")
+    p_validate.add_argument("--ignore", action="append", metavar="KIND",
+                            help="Issue kind that does not fail a recording (repeatable), e.g. out_of_bounds")
+
+    p_merge = sub.add_parser("merge", help="Concatenate recordings into one")
+    _add_batch_args(p_merge, out=False)
+    p_merge.add_argument("--output", type=str, required=True, help="Merged recording to write")
+    p_merge.add_argument("--gap", type=float, default=1.0, help="Seconds between consecutive recordings")
+    p_merge.add_argument("--format", type=int, choices=[1, 2], default=2, help="Output format: 2 binary (default), 1 legacy JSON")
 
     args = parser.parse_args()
 
-    mouse = HumanMouse()
+    if args.connect:
+        if args.cmd not in DAEMON_COMMANDS:
+            parser.error(f"--connect supports: {', '.join(DAEMON_COMMANDS)}")
+        sys.exit(_send(args))
+    if args.cmd in _CLIENT_COMMANDS:
+        parser.error(f"{args.cmd} needs --connect ADDRESS")
+    if args.cmd == "record" and args.snapshot_every and args.last is None and args.max_events is None:
+        parser.error("--snapshot-every needs --last or --max-events")
+    if args.cmd in BATCH_COMMANDS:
+        _run_batch(args)
+        return
+    if args.cmd == "validate":
+        sys.exit(_run_validate(args))
+    if args.cmd == "wait":
+        # Needs neither a backend nor NumPy
+        time.sleep(max(0.0, args.seconds))
+        return
+
+    from human_mouse import HumanMouse, InputRecorder, profiling
+    from human_mouse.backends import get_backend
+    from human_mouse.playback import PreparedRecording, compile_plan
+    from human_mouse.recording.ring import RingBuffer
+    from human_mouse.recording.simplify import make_simplifier
+    from human_mouse.recording.store import EventStore
+    from human_mouse.timing import PlaybackClock
+
+    if args.profile is not None:
+        profiling.enable()
+    backend = get_backend(args.backend)
+    mouse = HumanMouse(backend=backend, sample_rate=args.sample_rate or None)
 
     if args.cmd == "move":
         mouse.move_to(args.x, args.y, speed=args.speed, jitter=args.jitter)
@@ -39,57 +316,79 @@ def main():
         mouse.left_click()
     elif args.cmd == "right-click":
         mouse.right_click()
-    elif args.cmd == "wait":
-        mouse.wait(args.seconds)
+    elif args.cmd == "serve":
+        _serve(args, mouse)
+    elif args.cmd == "run":
+        from human_mouse import script
+
+        steps = script.load_script(args.script)
+        print(f"Running {len(steps)} steps from {args.script}...")
+        results = script.ScriptRunner(mouse, args.catch_up).run(steps, on_step=lambda r: print(script.format_result(r)))
+        print(script.summarize(results))
+        if results and results[-1].error:
+            sys.exit(1)
     elif args.cmd == "press":
         mouse.press_key(args.key)
     elif args.cmd == "press-x":
         mouse.press_x()
+    elif args.cmd == "type":
+        from human_mouse.typist import TypingModel
+
+        if args.seed is not None:
+            mouse.typing = TypingModel(args.seed)
+        mouse.type_text(args.text, args.wpm, args.typos)
+        print(f"Typed {len(args.text)} characters, max lateness {mouse.last_timing.max * 1e3:.2f}ms")
     elif args.cmd == "record":
-        rec = InputRecorder()
+        simplifier = make_simplifier(args.simplify)
+        if args.last is not None or args.max_events is not None:
+            ring = RingBuffer(seconds=args.last, max_events=args.max_events)
+            rec = InputRecorder(ring=ring, simplify=simplifier)
+        else:
+            # Events are streamed to the output file while recording
+            ring = None
+            rec = InputRecorder(stream_to=args.output, simplify=simplifier)
         print("Recording... press Ctrl+C to stop.")
         rec.start()
         try:
+            next_snapshot = time.monotonic() + (args.snapshot_every or 0)
             while True:
                 time.sleep(0.1)
+                if ring is not None and args.snapshot_every and time.monotonic() >= next_snapshot:
+                    rec.snapshot(args.output)
+                    next_snapshot += args.snapshot_every
         except KeyboardInterrupt:
-            events = rec.stop()
+            rec.stop()
             rec.save(args.output)
-            print(f"Saved {len(events)} events to {args.output}")
+            if ring is not None:
+                st = ring.stats()
+                # The time window can hold fewer events than the occupied slots
+                print(f"Saved the last {len(ring.columns())} of {st['total']} events to {args.output} "
+                      f"(overwritten in window: {st['overwritten']}, dropped: {st['dropped']})")
+            else:
+                print(f"Saved {rec.count} events to {args.output}")
     elif args.cmd == "play":
-        import json, time, pyautogui as pag
-        with open(args.input, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        events = data.get('events', [])
+        events = PreparedRecording(
+            EventStore.open(args.input), (args.start, args.end), args.move_rate, args.speed, args.idle_gap, args.idle_to
+        )
+        with profiling.span("plan.compile"):
+            plan = compile_plan(events, backend)
+        if plan.skipped:
+            print(f"Skipping unsupported keys: {', '.join(sorted(set(plan.skipped)))}")
         print(f"Playing {len(events)} events...")
-        t0 = None
-        for e in events:
-            t = float(e.get('t', 0))
-            if t0 is None:
-                t0 = time.perf_counter()
-            else:
-                # wait until t since start
-                while time.perf_counter() - t0 < t:
-                    time.sleep(0.001)
-            etype = e.get('type')
-            if etype == 'move':
-                pag.moveTo(int(e['x']), int(e['y']))
-            elif etype == 'left_down':
-                pag.mouseDown(button='left', x=int(e.get('x', 0)), y=int(e.get('y', 0)))
-            elif etype == 'left_up':
-                pag.mouseUp(button='left', x=int(e.get('x', 0)), y=int(e.get('y', 0)))
-            elif etype == 'right_down':
-                pag.mouseDown(button='right', x=int(e.get('x', 0)), y=int(e.get('y', 0)))
-            elif etype == 'right_up':
-                pag.mouseUp(button='right', x=int(e.get('x', 0)), y=int(e.get('y', 0)))
-            elif etype == 'scroll':
-                pag.scroll(int(e.get('dy', 0)))
-            elif etype == 'key_down':
-                pag.keyDown(str(e.get('key', '')))
-            elif etype == 'key_up':
-                pag.keyUp(str(e.get('key', '')))
+        clock = PlaybackClock(mouse.scheduler, policy=args.catch_up)
+        clock.start()
+        timing = plan.run(clock)
+        print(f"Lateness p50={timing.p50 * 1e3:.2f}ms p95={timing.p95 * 1e3:.2f}ms max={timing.max * 1e3:.2f}ms")
+        print(f"Drift: {clock.metrics}")
         print("Done.")
 
+    prof = profiling.profiler()
+    if prof is not None:
+        print(prof.report())
+        if args.profile:
+            n = prof.export_chrome_trace(args.profile)
+            print(f"Wrote {n} spans to {args.profile}")
+
 
 if __name__ == "__main__":
     main()
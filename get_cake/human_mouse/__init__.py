@@ -1,4 +1,63 @@
-from .controller import HumanMouse
-from .recording.recorder import InputRecorder, RecordedEvent
+"""Human-like mouse control, recording and playback.
 
-__all__ = ["HumanMouse", "InputRecorder", "RecordedEvent"]
+Names are imported on first use, so ``import human_mouse`` (and any
+submodule, e.g. ``human_mouse.ipc``) stays cheap: NumPy, pyautogui and
+pynput load only when something that needs them is touched.
+"""
+import importlib
+from typing import TYPE_CHECKING, Any, Dict, List
+
+if TYPE_CHECKING:
+    from .aio import AsyncHumanMouse
+    from .backends import InputBackend, MemoryBackend, PyAutoGuiBackend, PynputBackend, get_backend
+    from .controller import HumanMouse
+    from .paths import PathCache, PathEngine
+    from .recording.recorder import InputRecorder, RecordedEvent
+    from .recording.store import EventStore
+    from .typist import TypingModel
+
+# Public name -> module that defines it
+_EXPORTS: Dict[str, str] = {
+    "HumanMouse": ".controller",
+    "AsyncHumanMouse": ".aio",
+    "PathEngine": ".paths",
+    "PathCache": ".paths",
+    "InputRecorder": ".recording.recorder",
+    "RecordedEvent": ".recording.events",
+    "EventStore": ".recording.store",
+    "TypingModel": ".typist",
+    "InputBackend": ".backends",
+    "PyAutoGuiBackend": ".backends",
+    "PynputBackend": ".backends",
+    "MemoryBackend": ".backends",
+    "get_backend": ".backends",
+}
+
+__all__ = [
+    "HumanMouse",
+    "AsyncHumanMouse",
+    "PathEngine",
+    "PathCache",
+    "InputRecorder",
+    "RecordedEvent",
+    "EventStore",
+    "TypingModel",
+    "InputBackend",
+    "PyAutoGuiBackend",
+    "PynputBackend",
+    "MemoryBackend",
+    "get_backend",
+]
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,190 @@
+"""asyncio versions of the controller and the playback engine.
+
+Waiting is done with ``asyncio.sleep`` on the running event loop, so any
+number of scripted moves, recordings and hotkey handlers can share one
+thread. Cancelling the task (``task.cancel()``) stops a move or a playback
+at once, with no stop flag to poll.
+
+    async def main():
+        mouse = AsyncHumanMouse()
+        await mouse.move_to(800, 500)
+        await mouse.wait(0.5)
+        mouse.left_click()
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+from . import profiling
+from .backends import InputBackend
+from .controller import HumanMouse, _as_seconds
+from .paths import PathEngine
+from .playback import PlaybackPlan
+from .timing import DEFAULT_SAMPLE_RATE, LatenessStats, PlaybackClock
+from .typist import TypingModel
+
+
+class AsyncScheduler:
+    """``Scheduler`` for coroutines: one ``asyncio.sleep`` per point.
+
+    The sleep stops ``spin`` seconds short of the deadline and the rest is
+    spun out. Keep ``spin`` small: other tasks on the loop cannot run while
+    it spins.
+    """
+
+    def __init__(self, spin: float = 0.0005, clock: Callable[[], float] = time.perf_counter) -> None:
+        self.spin = spin
+        self.clock = clock
+        # Raw per-point lateness of the last ``run`` (seconds)
+        self.last_lateness = np.zeros(0)
+
+    async def wait_until(self, deadline: float) -> float:
+        """Sleep until ``deadline``; return how late we woke (>= 0)."""
+        clock = self.clock
+        remaining = deadline - clock()
+        if remaining > self.spin:
+            await asyncio.sleep(remaining - self.spin)
+        now = clock()
+        while now < deadline:
+            now = clock()
+        return now - deadline
+
+    async def run(self, deadlines: np.ndarray, fire: Callable[[int], None]) -> LatenessStats:
+        """Call ``fire(i)`` at each deadline in order and report lateness."""
+        lateness = np.zeros(len(deadlines))
+        done = 0
+        try:
+            for i, deadline in enumerate(deadlines.tolist()):
+                lateness[i] = await self.wait_until(deadline)
+                fire(i)
+                done += 1
+        finally:
+            self.last_lateness = lateness[:done]
+        return LatenessStats.from_array(self.last_lateness)
+
+
+class AsyncPlaybackClock(PlaybackClock):
+    """``PlaybackClock`` driven by an ``AsyncScheduler``.
+
+    Same timeline, catch-up policies and metrics; ``wait`` and ``run`` are
+    coroutines and are stopped by cancelling the task.
+    """
+
+    def __init__(
+        self,
+        scheduler: Optional[AsyncScheduler] = None,
+        policy: str = "late",
+        max_lag: float = 0.010,
+        compress_window: float = 0.5,
+    ) -> None:
+        super().__init__(None, policy, max_lag, compress_window)
+        self.scheduler = scheduler if scheduler is not None else AsyncScheduler()
+
+    async def wait(self, offset: float) -> float:
+        """Wait for timeline ``offset``; returns lateness."""
+        return await self.scheduler.wait_until(self.at(offset))
+
+    async def run(
+        self,
+        deadlines: np.ndarray,
+        fire: Callable[[int], None],
+        optional: Optional[np.ndarray] = None,
+        base: float = 0.0,
+    ) -> LatenessStats:
+        """Call ``fire(i)`` at ``base + deadlines[i]`` on the timeline."""
+        sched = self.scheduler
+        clock = sched.clock
+        skippable = optional.tolist() if optional is not None else None
+        lateness = np.zeros(len(deadlines))
+        done = 0
+        self.begin()
+        try:
+            for i, d in enumerate(deadlines.tolist()):
+                offset = base + d
+                target = self.target(offset)
+                if skippable is not None and skippable[i] and clock() - target > self.max_lag:
+                    self.metrics.dropped += 1
+                    continue
+                late = await sched.wait_until(target)
+                fire(i)
+                lateness[done] = late
+                done += 1
+                self.account(late, target, offset)
+        finally:
+            sched.last_lateness = lateness[:done]
+        return LatenessStats.from_array(sched.last_lateness)
+
+
+async def play(plan: PlaybackPlan, clock: AsyncPlaybackClock, base: float = 0.0) -> LatenessStats:
+    """Dispatch a compiled plan at ``base`` on ``clock``'s timeline.
+
+    Cancelling the task releases whatever the plan left held.
+    """
+    plan.done = 0
+    fire = profiling.wrap("playback.step", plan.fire)
+    try:
+        stats = await clock.run(plan.deadlines, fire, plan.optional, base)
+    except BaseException:
+        plan.release()
+        raise
+    profiling.observe("playback.lateness", clock.scheduler.last_lateness)
+    return stats
+
+
+class AsyncHumanMouse(HumanMouse):
+    """``HumanMouse`` whose ``move_to``, ``type_text`` and ``wait`` are coroutines.
+
+    Clicks and key presses do not wait, so they stay plain methods.
+    """
+
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        *,
+        backend: Optional[InputBackend] = None,
+        paths: Optional[PathEngine] = None,
+        sample_rate: Optional[float] = DEFAULT_SAMPLE_RATE,
+        typing: Optional[TypingModel] = None,
+    ) -> None:
+        super().__init__(seed, backend=backend, paths=paths, sample_rate=sample_rate, typing=typing)
+        self.scheduler = AsyncScheduler()
+
+    async def wait(self, seconds: float) -> None:
+        """Pause the calling task for the given seconds (non-negative)."""
+        await asyncio.sleep(_as_seconds(seconds))
+
+    async def move_to(
+        self,
+        x: int,
+        y: int,
+        speed: str = "normal",
+        jitter: float = 1.5,
+        duration_seconds: "float | None" = None,
+        easing: str = "smooth",
+    ) -> None:
+        """Smoothly move cursor to (x, y); see ``HumanMouse.move_to``."""
+        planned = self._plan_move(x, y, speed, jitter, duration_seconds, easing)
+        if planned is None:
+            return
+        xs, ys, offsets = planned
+        move = profiling.wrap("backend.move", self.backend.move)
+        deadlines = offsets + self.scheduler.clock()
+        self.last_timing = await self.scheduler.run(deadlines, lambda i: move(xs[i], ys[i]))
+        profiling.observe("sched.lateness", self.scheduler.last_lateness)
+
+    async def type_text(self, text: str, wpm: "float | None" = None, typo_rate: "float | None" = None) -> None:
+        """Type ``text`` with human-like key timing; see ``HumanMouse.type_text``."""
+        plan = self.typing.compile(text, self.backend, wpm, typo_rate)
+        clock = AsyncPlaybackClock(self.scheduler)
+        clock.start()
+        plan.done = 0
+        try:
+            self.last_timing = await clock.run(plan.deadlines, profiling.wrap("typing.key", plan.fire))
+        finally:
+            # Cancelled mid-word: let go of anything still held (e.g. shift)
+            plan.release()
+        profiling.observe("typing.lateness", self.scheduler.last_lateness)
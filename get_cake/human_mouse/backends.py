@@ -0,0 +1,531 @@
+from __future__ import annotations
+
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Type
+
+
+class FailSafeError(RuntimeError):
+    """Raised when the cursor is parked in the top-left corner to abort."""
+
+
+class InputBackend:
+    """Output driver used by HumanMouse and the playback loops.
+
+    Screen geometry is cached and the cursor position is tracked locally, so
+    the points of a move cost one call into the OS each instead of a
+    size/position round trip first. ``refresh_position()`` re-reads the
+    position (``HumanMouse.move_to`` does once per move, since the user may
+    have moved the mouse by hand); ``sync()`` drops both caches.
+
+    Subclasses implement the ``_query_*`` and ``_move``/``_button`` hooks plus
+    ``scroll``, ``key_down`` and ``key_up``.
+    """
+
+    name = "base"
+
+    def __init__(self, screen_size: Optional[Tuple[int, int]] = None) -> None:
+        self._fixed_size = screen_size
+        self._size: Optional[Tuple[int, int]] = screen_size
+        self._pos: Optional[Tuple[int, int]] = None
+
+    # -- geometry / position --------------------------------------------
+    def size(self) -> Tuple[int, int]:
+        if self._size is None:
+            self._size = self._query_size()
+        return self._size
+
+    def position(self) -> Tuple[int, int]:
+        if self._pos is None:
+            self._pos = self._query_position()
+        return self._pos
+
+    def refresh_position(self) -> Tuple[int, int]:
+        """Re-read the cursor position from the display (one OS call)."""
+        self._pos = self._query_position()
+        return self._pos
+
+    def sync(self) -> None:
+        """Drop cached geometry and position; the next query hits the display."""
+        self._size = self._fixed_size
+        self._pos = None
+
+    # -- mouse ----------------------------------------------------------
+    def move(self, x: int, y: int) -> None:
+        self._move(x, y)
+        self._pos = (x, y)
+
+    def mouse_down(self, button: str = "left", x: Optional[int] = None, y: Optional[int] = None) -> None:
+        if x is not None and y is not None and (x, y) != self._pos:
+            self.move(x, y)
+        self._button(button, True)
+
+    def mouse_up(self, button: str = "left", x: Optional[int] = None, y: Optional[int] = None) -> None:
+        if x is not None and y is not None and (x, y) != self._pos:
+            self.move(x, y)
+        self._button(button, False)
+
+    def click(self, button: str = "left") -> None:
+        self._button(button, True)
+        self._button(button, False)
+
+    def scroll(self, dy: int) -> None:
+        raise NotImplementedError
+
+    # -- keyboard -------------------------------------------------------
+    def key_down(self, key: str) -> None:
+        raise NotImplementedError
+
+    def key_up(self, key: str) -> None:
+        raise NotImplementedError
+
+    def press(self, key: str) -> None:
+        self.key_down(key)
+        self.key_up(key)
+
+    def is_valid_key(self, key: str) -> bool:
+        return bool(key)
+
+    # -- hooks ----------------------------------------------------------
+    def _query_size(self) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    def _query_position(self) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    def _move(self, x: int, y: int) -> None:
+        raise NotImplementedError
+
+    def _button(self, button: str, pressed: bool) -> None:
+        raise NotImplementedError
+
+
+# pynput key names (as written by InputRecorder) -> pyautogui key names
+_PAG_KEY_ALIASES = {
+    "alt_l": "altleft",
+    "alt_r": "altright",
+    "alt_gr": "altright",
+    "ctrl_l": "ctrlleft",
+    "ctrl_r": "ctrlright",
+    "shift_l": "shiftleft",
+    "shift_r": "shiftright",
+    "cmd": "win",
+    "cmd_l": "winleft",
+    "cmd_r": "winright",
+    "page_up": "pageup",
+    "page_down": "pagedown",
+    "caps_lock": "capslock",
+    "num_lock": "numlock",
+    "scroll_lock": "scrolllock",
+    "print_screen": "printscreen",
+}
+
+
+class PyAutoGuiBackend(InputBackend):
+    """Drives input through pyautogui (the historical default)."""
+
+    name = "pyautogui"
+
+    def __init__(self, screen_size: Optional[Tuple[int, int]] = None) -> None:
+        super().__init__(screen_size)
+        import pyautogui as pag
+
+        pag.FAILSAFE = True
+        pag.PAUSE = 0
+        self._pag = pag
+
+    def _query_size(self) -> Tuple[int, int]:
+        w, h = self._pag.size()
+        return int(w), int(h)
+
+    def _query_position(self) -> Tuple[int, int]:
+        x, y = self._pag.position()
+        return int(x), int(y)
+
+    def _move(self, x: int, y: int) -> None:
+        self._pag.moveTo(x, y)
+
+    def _button(self, button: str, pressed: bool) -> None:
+        if pressed:
+            self._pag.mouseDown(button=button)
+        else:
+            self._pag.mouseUp(button=button)
+
+    def click(self, button: str = "left") -> None:
+        self._pag.click(button=button)
+
+    def scroll(self, dy: int) -> None:
+        self._pag.scroll(int(dy))
+
+    def _key(self, key: str) -> str:
+        return _PAG_KEY_ALIASES.get(key, key)
+
+    def key_down(self, key: str) -> None:
+        self._pag.keyDown(self._key(key))
+
+    def key_up(self, key: str) -> None:
+        self._pag.keyUp(self._key(key))
+
+    def press(self, key: str) -> None:
+        self._pag.press(self._key(key))
+
+    def is_valid_key(self, key: str) -> bool:
+        return bool(key) and self._pag.isValidKey(self._key(key))
+
+
+# pyautogui-style key names -> pynput Key members
+_PYNPUT_KEY_ALIASES = {
+    "return": "enter",
+    "escape": "esc",
+    "control": "ctrl",
+    "ctrlleft": "ctrl_l",
+    "ctrlright": "ctrl_r",
+    "shiftleft": "shift_l",
+    "shiftright": "shift_r",
+    "altleft": "alt_l",
+    "altright": "alt_r",
+    "option": "alt",
+    "win": "cmd",
+    "winleft": "cmd_l",
+    "winright": "cmd_r",
+    "command": "cmd",
+    "super": "cmd",
+    "del": "delete",
+    "pageup": "page_up",
+    "pgup": "page_up",
+    "pagedown": "page_down",
+    "pgdn": "page_down",
+    "capslock": "caps_lock",
+    "numlock": "num_lock",
+    "scrolllock": "scroll_lock",
+    "printscreen": "print_screen",
+    "prtsc": "print_screen",
+}
+
+
+def _native_screen_size() -> Tuple[int, int]:
+    if sys.platform == "win32":
+        import ctypes
+
+        user32 = ctypes.windll.user32
+        try:
+            user32.SetProcessDPIAware()
+        except Exception:
+            pass
+        return int(user32.GetSystemMetrics(0)), int(user32.GetSystemMetrics(1))
+    try:
+        from Xlib import display as xdisplay
+
+        d = xdisplay.Display()
+        try:
+            s = d.screen()
+            return int(s.width_in_pixels), int(s.height_in_pixels)
+        finally:
+            d.close()
+    except ImportError:
+        import pyautogui as pag
+
+        w, h = pag.size()
+        return int(w), int(h)
+
+
+class PynputBackend(InputBackend):
+    """Direct driver on pynput's controllers, skipping pyautogui's per-call
+    bookkeeping (pause, failsafe position query, argument normalisation).
+
+    The corner failsafe is kept but only checked every ``failsafe_every``
+    moves, since it needs a real position query.
+    """
+
+    name = "pynput"
+
+    def __init__(self, screen_size: Optional[Tuple[int, int]] = None, failsafe_every: int = 32) -> None:
+        super().__init__(screen_size)
+        from pynput import keyboard as pkeyboard
+        from pynput import mouse as pmouse
+
+        self._mouse = pmouse.Controller()
+        self._keyboard = pkeyboard.Controller()
+        self._buttons = {"left": pmouse.Button.left, "right": pmouse.Button.right, "middle": pmouse.Button.middle}
+        self._Key = pkeyboard.Key
+        self._KeyCode = pkeyboard.KeyCode
+        self._failsafe_every = failsafe_every
+        self._moves = 0
+
+    def _query_size(self) -> Tuple[int, int]:
+        return _native_screen_size()
+
+    def _query_position(self) -> Tuple[int, int]:
+        x, y = self._mouse.position
+        return int(x), int(y)
+
+    def _move(self, x: int, y: int) -> None:
+        self._moves += 1
+        if self._failsafe_every and self._moves % self._failsafe_every == 0:
+            if self._query_position() == (0, 0):
+                raise FailSafeError("Cursor in top-left corner; aborting.")
+        self._mouse.position = (x, y)
+
+    def _button(self, button: str, pressed: bool) -> None:
+        b = self._buttons[button]
+        if pressed:
+            self._mouse.press(b)
+        else:
+            self._mouse.release(b)
+
+    def click(self, button: str = "left") -> None:
+        self._mouse.click(self._buttons[button])
+
+    def scroll(self, dy: int) -> None:
+        self._mouse.scroll(0, int(dy))
+
+    def _key(self, key: str) -> Any:
+        if len(key) == 1:
+            return self._KeyCode.from_char(key)
+        name = key.lower()
+        name = _PYNPUT_KEY_ALIASES.get(name, name)
+        try:
+            return self._Key[name]
+        except KeyError:
+            raise ValueError(f"Unsupported or invalid key: {key}") from None
+
+    def key_down(self, key: str) -> None:
+        self._keyboard.press(self._key(key))
+
+    def key_up(self, key: str) -> None:
+        self._keyboard.release(self._key(key))
+
+    def is_valid_key(self, key: str) -> bool:
+        try:
+            self._key(key)
+        except (ValueError, TypeError):
+            return False
+        return bool(key)
+
+
+# pynput key names (as written by InputRecorder) -> X keysym names
+_XLIB_KEYSYMS = {
+    "enter": "Return",
+    "return": "Return",
+    "esc": "Escape",
+    "escape": "Escape",
+    "tab": "Tab",
+    "space": "space",
+    "backspace": "BackSpace",
+    "delete": "Delete",
+    "insert": "Insert",
+    "home": "Home",
+    "end": "End",
+    "page_up": "Prior",
+    "page_down": "Next",
+    "up": "Up",
+    "down": "Down",
+    "left": "Left",
+    "right": "Right",
+    "shift": "Shift_L",
+    "shift_l": "Shift_L",
+    "shift_r": "Shift_R",
+    "ctrl": "Control_L",
+    "ctrl_l": "Control_L",
+    "ctrl_r": "Control_R",
+    "alt": "Alt_L",
+    "alt_l": "Alt_L",
+    "alt_r": "Alt_R",
+    "alt_gr": "ISO_Level3_Shift",
+    "cmd": "Super_L",
+    "cmd_l": "Super_L",
+    "cmd_r": "Super_R",
+    "caps_lock": "Caps_Lock",
+    "num_lock": "Num_Lock",
+    "scroll_lock": "Scroll_Lock",
+    "print_screen": "Print",
+    "pause": "Pause",
+    "menu": "Menu",
+}
+
+
+class XlibBackend(InputBackend):
+    """Sends input to one X display through the XTEST extension.
+
+    Unlike pyautogui and pynput, which bind to ``$DISPLAY`` at import time,
+    each instance opens its own connection to ``display`` (e.g. ``":3"``), so
+    one process can drive many displays. A connection must only be used from
+    one thread at a time.
+    """
+
+    name = "xlib"
+
+    def __init__(self, display: Optional[str] = None, screen_size: Optional[Tuple[int, int]] = None) -> None:
+        super().__init__(screen_size)
+        from Xlib import X, XK
+        from Xlib import display as xdisplay
+        from Xlib.ext import xtest
+
+        self._X = X
+        self._XK = XK
+        self._fake_input = xtest.fake_input
+        self._display = xdisplay.Display(display)
+        if not self._display.has_extension("XTEST"):
+            self._display.close()
+            raise RuntimeError(f"X display {display or '$DISPLAY'} lacks the XTEST extension")
+        self.display_name = display
+        self._keycodes: Dict[str, int] = {}
+
+    def close(self) -> None:
+        self._display.close()
+
+    def _query_size(self) -> Tuple[int, int]:
+        s = self._display.screen()
+        return int(s.width_in_pixels), int(s.height_in_pixels)
+
+    def _query_position(self) -> Tuple[int, int]:
+        p = self._display.screen().root.query_pointer()
+        return int(p.root_x), int(p.root_y)
+
+    def _move(self, x: int, y: int) -> None:
+        self._fake_input(self._display, self._X.MotionNotify, x=int(x), y=int(y))
+        self._display.flush()
+
+    def _press_button(self, number: int, pressed: bool) -> None:
+        X = self._X
+        self._fake_input(self._display, X.ButtonPress if pressed else X.ButtonRelease, number)
+
+    def _button(self, button: str, pressed: bool) -> None:
+        self._press_button({"left": 1, "middle": 2, "right": 3}[button], pressed)
+        self._display.flush()
+
+    def scroll(self, dy: int) -> None:
+        # One wheel notch is a click of button 4 (up) or 5 (down)
+        number = 4 if dy > 0 else 5
+        for _ in range(abs(int(dy))):
+            self._press_button(number, True)
+            self._press_button(number, False)
+        self._display.flush()
+
+    def _keycode(self, key: str) -> int:
+        code = self._keycodes.get(key)
+        if code is None:
+            if len(key) == 1:
+                # Latin-1 keysyms equal the code point; the rest are offset
+                keysym = ord(key) if ord(key) < 0x100 else 0x01000000 + ord(key)
+            else:
+                name = key.lower()
+                name = _PYNPUT_KEY_ALIASES.get(name, name)
+                if name.startswith("f") and name[1:].isdigit():
+                    name = name.upper()
+                keysym = self._XK.string_to_keysym(_XLIB_KEYSYMS.get(name, name))
+            code = self._display.keysym_to_keycode(keysym) if keysym else 0
+            if not code:
+                raise ValueError(f"Unsupported or invalid key: {key}")
+            self._keycodes[key] = code
+        return code
+
+    def key_down(self, key: str) -> None:
+        self._fake_input(self._display, self._X.KeyPress, self._keycode(key))
+        self._display.flush()
+
+    def key_up(self, key: str) -> None:
+        self._fake_input(self._display, self._X.KeyRelease, self._keycode(key))
+        self._display.flush()
+
+    def is_valid_key(self, key: str) -> bool:
+        if not key:
+            return False
+        try:
+            self._keycode(key)
+        except ValueError:
+            return False
+        return True
+
+
+class MemoryBackend(InputBackend):
+    """In-memory target for headless tests and benchmarks.
+
+    Keeps the cursor position, held buttons and held keys, and (with
+    ``log=True``) appends ``(timestamp, op, args)`` for every call to
+    ``calls``. ``clock`` stamps the log and can be a virtual clock.
+    ``latency`` simulates the cost of each call by passing it to ``sleep``
+    (e.g. a virtual clock's ``advance``). ``valid_key`` checks key names
+    (e.g. another backend's ``is_valid_key``); any non-empty name is
+    accepted by default.
+    """
+
+    name = "memory"
+
+    def __init__(
+        self,
+        screen_size: Tuple[int, int] = (1920, 1080),
+        position: Tuple[int, int] = (0, 0),
+        log: bool = True,
+        clock: Callable[[], float] = time.perf_counter,
+        latency: float = 0.0,
+        sleep: Callable[[float], None] = time.sleep,
+        valid_key: Optional[Callable[[str], bool]] = None,
+    ) -> None:
+        super().__init__(screen_size)
+        self._valid_key = valid_key
+        self._home = position
+        self._pos = position
+        self.log = log
+        self.clock = clock
+        self.latency = latency
+        self._sleep = sleep
+        self.calls: List[Tuple[float, str, tuple]] = []
+        self.buttons: Set[str] = set()
+        self.keys: Set[str] = set()
+
+    def _record(self, op: str, *args: Any) -> None:
+        if self.latency:
+            self._sleep(self.latency)
+        if self.log:
+            self.calls.append((self.clock(), op, args))
+
+    def _query_size(self) -> Tuple[int, int]:
+        return self._fixed_size or (1920, 1080)
+
+    def _query_position(self) -> Tuple[int, int]:
+        return self._home
+
+    def _move(self, x: int, y: int) -> None:
+        self._home = (x, y)
+        self._record("move", x, y)
+
+    def _button(self, button: str, pressed: bool) -> None:
+        if pressed:
+            self.buttons.add(button)
+        else:
+            self.buttons.discard(button)
+        self._record("mouse_down" if pressed else "mouse_up", button)
+
+    def scroll(self, dy: int) -> None:
+        self._record("scroll", int(dy))
+
+    def key_down(self, key: str) -> None:
+        self.keys.add(key)
+        self._record("key_down", key)
+
+    def key_up(self, key: str) -> None:
+        self.keys.discard(key)
+        self._record("key_up", key)
+
+    def is_valid_key(self, key: str) -> bool:
+        if self._valid_key is not None:
+            return self._valid_key(key)
+        return bool(key)
+
+
+BACKENDS: Dict[str, Type[InputBackend]] = {
+    "pyautogui": PyAutoGuiBackend,
+    "pynput": PynputBackend,
+    "xlib": XlibBackend,
+    "memory": MemoryBackend,
+}
+
+
+def get_backend(name: str = "pyautogui", **kwargs: Any) -> InputBackend:
+    """Instantiate a backend by name ('pyautogui', 'pynput', 'xlib' or 'memory')."""
+    try:
+        cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown backend: {name!r} (choose from {', '.join(BACKENDS)})") from None
+    return cls(**kwargs)
@@ -0,0 +1,243 @@
+"""Timing-accuracy and CPU benchmarks for the playback engines.
+
+Runs ``HumanMouse.move_to``, ``demo.py play``-style playback and the app's
+lerping playback against a ``MemoryBackend`` on a real or virtual clock, and
+reports per-step lateness percentiles, end-to-end drift, wakeups per second
+and CPU time per second of playback.
+
+    python -m human_mouse.bench --sizes 1000 100000 1000000 --clock virtual --out bench.json
+    python -m human_mouse.bench --sizes 1000 --clock real --compare bench.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .backends import MemoryBackend
+from .controller import HumanMouse
+from .paths import PathEngine
+from .playback import PreparedRecording, compile_plan
+from .recording.columnar import MISSING, EventColumns
+from .recording.events import TYPE_CODES
+from .recording.store import EventStore
+from .timing import PlaybackClock, Scheduler, VirtualClock
+
+ENGINES = ("move_to", "play", "app")
+
+
+class RealClock:
+    """``time.perf_counter``/``time.sleep`` with a wakeup counter."""
+
+    def __init__(self) -> None:
+        self.wakeups = 0
+
+    def __call__(self) -> float:
+        return time.perf_counter()
+
+    def sleep(self, seconds: float) -> None:
+        self.wakeups += 1
+        time.sleep(seconds)
+
+    def advance(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+
+def synthetic_columns(n: int, seed: int = 0, mean_gap: float = 0.008, move_fraction: float = 0.9) -> EventColumns:
+    """A plausible recording of ``n`` events, built without per-event objects.
+
+    Mostly moves along a random walk; the rest are matched down/up pairs of
+    left/right clicks or keys, and scrolls.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.cumsum(rng.exponential(mean_gap, n))
+    xy = np.clip(np.cumsum(rng.integers(-6, 7, (n, 2)), axis=0) + (960, 540), 0, (1919, 1079))
+    action = np.flatnonzero(rng.random(n) >= move_fraction)
+    codes = np.full(n, TYPE_CODES["move"], dtype=np.uint8)
+    pair_kind = rng.integers(0, 4, (len(action) + 1) // 2)[np.arange(len(action)) // 2]
+    is_up = (np.arange(len(action)) % 2).astype(bool)
+    down_up = np.array([
+        [TYPE_CODES["left_down"], TYPE_CODES["left_up"]],
+        [TYPE_CODES["right_down"], TYPE_CODES["right_up"]],
+        [TYPE_CODES["key_down"], TYPE_CODES["key_up"]],
+        [TYPE_CODES["scroll"], TYPE_CODES["scroll"]],
+    ], dtype=np.uint8)
+    codes[action] = down_up[pair_kind, is_up.astype(int)]
+
+    x = xy[:, 0].astype("<i4")
+    y = xy[:, 1].astype("<i4")
+    dx = np.full(n, MISSING, dtype="<i4")
+    dy = np.full(n, MISSING, dtype="<i4")
+    key = np.full(n, -1, dtype="<i4")
+    is_scroll = codes == TYPE_CODES["scroll"]
+    dx[is_scroll] = 0
+    dy[is_scroll] = rng.integers(-3, 4, int(is_scroll.sum()))
+    is_key = (codes == TYPE_CODES["key_down"]) | (codes == TYPE_CODES["key_up"])
+    x[is_key] = MISSING
+    y[is_key] = MISSING
+    # Both halves of a key pair share one key
+    key_idx = rng.integers(0, 8, (len(action) + 1) // 2)[np.arange(len(action)) // 2]
+    key[action[pair_kind == 2]] = key_idx[pair_kind == 2]
+    return EventColumns(t, codes, x, y, dx, dy, key, keys=list("abcdefgh"))
+
+
+def _summary(lateness: np.ndarray) -> Dict[str, float]:
+    if not len(lateness):
+        return {"mean": 0.0, "p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+    p50, p90, p99 = np.percentile(lateness, [50, 90, 99]) * 1e3
+    return {
+        "mean": float(lateness.mean() * 1e3),
+        "p50": float(p50), "p90": float(p90), "p99": float(p99),
+        "max": float(lateness.max() * 1e3),
+    }
+
+
+def run_engine(
+    engine: str,
+    events: int,
+    clock_kind: str = "virtual",
+    seed: int = 0,
+    backend_latency: float = 0.0,
+) -> Dict[str, Any]:
+    """Run one engine on a synthetic workload of ``events`` and measure it."""
+    clock: Any = VirtualClock() if clock_kind == "virtual" else RealClock()
+    scheduler = Scheduler(spin=0.0 if clock_kind == "virtual" else 0.0015, clock=clock, sleep=clock.sleep)
+    backend = MemoryBackend(log=False, clock=clock, latency=backend_latency, sleep=clock.advance)
+
+    cpu0 = time.process_time()
+    wall0 = time.perf_counter()
+    if engine == "move_to":
+        # ~100 path points per move
+        mouse = HumanMouse(backend=backend, seed=seed)
+        mouse.scheduler = scheduler
+        rng = np.random.default_rng(seed)
+        targets = rng.integers(0, (1920, 1080), (max(1, events // 100), 2))
+        lateness: List[np.ndarray] = []
+        drift = 0.0
+        dropped = 0
+        start = clock()
+        for tx, ty in targets.tolist():
+            mouse.move_to(tx, ty, speed="fast")
+            late_move = scheduler.last_lateness
+            lateness.append(late_move)
+            # How late each move landed on its target
+            drift += float(late_move[-1]) if len(late_move) else 0.0
+        late = np.concatenate(lateness) if lateness else np.zeros(0)
+        steps = len(late)
+        elapsed = clock() - start
+    else:
+        cols = synthetic_columns(events, seed)
+        prepared = PreparedRecording(EventStore(cols))
+        plan = compile_plan(prepared, backend, PathEngine(seed), lerp=(engine == "app"))
+        if plan.first is not None:
+            backend.move(*plan.first)
+        playback = PlaybackClock(scheduler)
+        start = clock()
+        playback.start(start)
+        plan.run(playback)
+        elapsed = clock() - start
+        late = scheduler.last_lateness
+        steps = len(late)
+        drift = elapsed - plan.duration
+        dropped = playback.metrics.dropped
+    cpu = time.process_time() - cpu0
+    wall = time.perf_counter() - wall0
+
+    return {
+        "engine": engine,
+        "events": events,
+        "clock": clock_kind,
+        "steps": int(steps),
+        "playback_s": float(elapsed),
+        "lateness_ms": _summary(late),
+        "drift_ms": float(drift * 1e3),
+        "dropped": int(dropped),
+        "wakeups": clock.wakeups,
+        "wakeups_per_s": float(clock.wakeups / elapsed) if elapsed > 0 else 0.0,
+        "cpu_s": float(cpu),
+        "cpu_per_playback_s": float(cpu / elapsed) if elapsed > 0 else 0.0,
+        "wall_s": float(wall),
+    }
+
+
+def compare(current: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float = 0.2) -> List[str]:
+    """Return a line for every metric that got worse than ``baseline`` by more
+    than ``tolerance`` (relative)."""
+    base = {(r["engine"], r["events"], r["clock"]): r for r in baseline}
+    metrics: Dict[str, Callable[[Dict[str, Any]], float]] = {
+        "lateness p99": lambda r: r["lateness_ms"]["p99"],
+        "|drift|": lambda r: abs(r["drift_ms"]),
+        "wakeups/s": lambda r: r["wakeups_per_s"],
+        "cpu/playback s": lambda r: r["cpu_per_playback_s"],
+    }
+    problems = []
+    for r in current:
+        b = base.get((r["engine"], r["events"], r["clock"]))
+        if b is None:
+            continue
+        for name, get in metrics.items():
+            old, new = get(b), get(r)
+            # Ignore noise around zero (sub-microsecond / sub-wakeup differences)
+            if new > old * (1 + tolerance) and new - old > 1e-3:
+                problems.append(f"{r['engine']}/{r['events']}/{r['clock']}: {name} {old:.4g} -> {new:.4g}")
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Playback timing-accuracy benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--clock", choices=["virtual", "real"], default="virtual")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per backend call")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=str, help="Write results as JSON")
+    parser.add_argument("--compare", type=str, help="Baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = []
+    for engine in args.engines:
+        for n in args.sizes:
+            r = run_engine(engine, n, args.clock, args.seed, args.latency)
+            results.append(r)
+            lat = r["lateness_ms"]
+            print(
+                f"{engine:8s} {n:>8d} ev  steps={r['steps']:>8d}  late p50={lat['p50']:.3f} p99={lat['p99']:.3f} "
+                f"max={lat['max']:.3f} ms  drift={r['drift_ms']:.3f} ms  dropped={r['dropped']}  wakeups/s={r['wakeups_per_s']:.0f}  "
+                f"cpu/s={r['cpu_per_playback_s']:.4f}"
+            )
+
+    doc = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "clock": args.clock,
+            "latency": args.latency,
+            "seed": args.seed,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+        print(f"Wrote {args.out}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        problems = compare(results, baseline, args.tolerance)
+        for line in problems:
+            print(f"REGRESSION {line}")
+        if problems:
+            return 1
+        print("No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
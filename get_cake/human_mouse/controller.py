@@ -1,10 +1,14 @@
-import math
-import random
 import time
 from dataclasses import dataclass
-from typing import Iterable, List, Tuple
+from typing import Any, List, Optional, Sequence, Tuple
 
-import pyautogui as pag
+import numpy as np
+
+from . import profiling
+from .backends import InputBackend, PyAutoGuiBackend
+from .paths import PathEngine
+from .timing import DEFAULT_SAMPLE_RATE, LatenessStats, PlaybackClock, Scheduler, plan_schedule, sample_path
+from .typist import TypingModel
 
 
 @dataclass
@@ -20,6 +24,14 @@ SPEEDS = {
 }
 
 
+def _as_seconds(value: Any) -> float:
+    try:
+        secs = float(value)
+    except Exception:
+        secs = 0.0
+    return max(0.0, secs)
+
+
 class HumanMouse:
     """Human-like mouse controller.
 
@@ -30,35 +42,48 @@ class HumanMouse:
     wait(seconds): Pause for the given number of seconds
     press_key(key): Press a keyboard key (e.g., 'x')
     press_x(): Convenience wrapper to press 'x'
+    type_text(text, wpm=None, typo_rate=None): Type a string with human-like timing
     """
 
-    def __init__(self) -> None:
-        pag.FAILSAFE = True
-        pag.PAUSE = 0
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        *,
+        backend: Optional[InputBackend] = None,
+        paths: Optional[PathEngine] = None,
+        sample_rate: Optional[float] = DEFAULT_SAMPLE_RATE,
+        typing: Optional[TypingModel] = None,
+    ) -> None:
+        self.backend = backend if backend is not None else PyAutoGuiBackend()
+        # e.g. PathCache() for scripts that move between the same targets over and over
+        self.paths = paths if paths is not None else PathEngine(seed)
+        # Cursor updates per second of a move (see timing.sample_path); None
+        # sends every generated path point
+        self.sample_rate = sample_rate
+        self.typing = typing if typing is not None else TypingModel(seed)
+        self.scheduler = Scheduler()
+        # Per-point lateness of the most recent move_to
+        self.last_timing = LatenessStats()
 
     def left_click(self) -> None:
-        pag.click(button="left")
+        self.backend.click("left")
 
     def right_click(self) -> None:
-        pag.click(button="right")
+        self.backend.click("right")
 
     def wait(self, seconds: float) -> None:
         """Pause execution for the given seconds (non-negative)."""
-        try:
-            secs = float(seconds)
-        except Exception:
-            secs = 0.0
-        if secs < 0:
-            secs = 0.0
-        time.sleep(secs)
+        time.sleep(_as_seconds(seconds))
 
     def press_key(self, key: str) -> None:
         """Press a keyboard key once.
 
         Example: press_key('x')
         """
+        if not self.backend.is_valid_key(key):
+            raise ValueError(f"Unsupported or invalid key: {key}")
         try:
-            pag.press(key)
+            self.backend.press(key)
         except Exception as e:
             raise ValueError(f"Unsupported or invalid key: {key}") from e
 
@@ -66,6 +91,18 @@ class HumanMouse:
         """Press the 'x' key once (convenience)."""
         self.press_key('x')
 
+    def type_text(self, text: str, wpm: "float | None" = None, typo_rate: "float | None" = None) -> None:
+        """Type ``text`` with human-like key timing (see ``TypingModel``).
+
+        The whole string is scheduled and its keys validated before the
+        first one goes down; ``wpm`` and ``typo_rate`` override the model's
+        defaults for this call.
+        """
+        plan = self.typing.compile(text, self.backend, wpm, typo_rate)
+        clock = PlaybackClock(self.scheduler)
+        clock.start()
+        self.last_timing = plan.run(clock)
+
     def move_to(
         self,
         x: int,
@@ -86,21 +123,49 @@ class HumanMouse:
             'dash': quick start, progressively slow near target (ease-out)
             'linear': constant pace
         """
-        screen_w, screen_h = pag.size()
+        planned = self._plan_move(x, y, speed, jitter, duration_seconds, easing)
+        if planned is not None:
+            self._run_move(planned)
+
+    def _run_move(self, planned: Tuple[List[int], List[int], np.ndarray]) -> None:
+        """Dispatch a ``_plan_move`` result, starting now."""
+        xs, ys, offsets = planned
+        move = profiling.wrap("backend.move", self.backend.move)
+        deadlines = offsets + self.scheduler.clock()
+        self.last_timing = self.scheduler.run(deadlines, lambda i: move(xs[i], ys[i]))
+        profiling.observe("sched.lateness", self.scheduler.last_lateness)
+
+    def _plan_move(
+        self,
+        x: int,
+        y: int,
+        speed: str,
+        jitter: float,
+        duration_seconds: "float | None",
+        easing: str,
+        start: Optional[Tuple[int, int]] = None,
+    ) -> Optional[Tuple[List[int], List[int], np.ndarray]]:
+        """Path points and their deadlines (seconds from now) for ``move_to``;
+        None if the cursor is already there.
+
+        ``start`` plans from a predicted position instead of the current one
+        (used to plan ahead while an earlier step is still running).
+        """
+        screen_w, screen_h = self.backend.size()
         tx = max(0, min(int(x), screen_w - 1))
         ty = max(0, min(int(y), screen_h - 1))
 
-        sx, sy = pag.position()
+        # One position query per move: the user may have moved the mouse
+        sx, sy = self.backend.refresh_position() if start is None else start
         if (sx, sy) == (tx, ty):
-            return
+            return None
 
         sp = SPEEDS.get(speed, SPEEDS["normal"])
-        path = self._generate_path((sx, sy), (tx, ty), jitter=jitter)
+        with profiling.span("path.generate"):
+            path = self._generate_path((sx, sy), (tx, ty), jitter=jitter)
 
-        total_dist = sum(
-            math.hypot(path[i + 1][0] - path[i][0], path[i + 1][1] - path[i][1])
-            for i in range(len(path) - 1)
-        )
+        steps_xy = np.diff(path, axis=0)
+        total_dist = float(np.hypot(steps_xy[:, 0], steps_xy[:, 1]).sum())
         if duration_seconds is not None:
             try:
                 total_time = max(0.02, float(duration_seconds))
@@ -109,82 +174,26 @@ class HumanMouse:
         else:
             total_time = max(0.08, total_dist / sp.px_per_sec)
 
-        steps = len(path)
-        start_time = time.perf_counter()
-        for i, (px, py) in enumerate(path):
-            t = i / max(1, steps - 1)
-            # Easing function selection
-            if easing == "dash":
-                # Ease-out (fast start, slow end)
-                eased = 1 - (1 - t) ** 3
-            elif easing == "linear":
-                eased = t
+        with profiling.span("path.sample"):
+            if self.sample_rate:
+                path, offsets = sample_path(path, total_time, easing, self.sample_rate)
             else:
-                # Smooth S-curve (slow start, fast middle, slow end)
-                eased = 1 / (1 + math.exp(-10 * (t - 0.5)))
-            target_elapsed = eased * total_time
-
-            while True:
-                now = time.perf_counter()
-                if now - start_time >= target_elapsed:
-                    break
-                time.sleep(0.001)
+                offsets = plan_schedule(len(path), total_time, easing)
+        return path[:, 0].astype(int).tolist(), path[:, 1].astype(int).tolist(), offsets
 
-            pag.moveTo(int(px), int(py))
+    def generate_paths(
+        self,
+        starts: Sequence[Tuple[int, int]],
+        ends: Sequence[Tuple[int, int]],
+        jitter: float = 1.5,
+    ) -> List[np.ndarray]:
+        """Precompute many paths in one batch (e.g. every move of a recording)."""
+        return self.paths.generate_many(starts, ends, jitter)
 
     def _generate_path(
         self,
         start: Tuple[int, int],
         end: Tuple[int, int],
         jitter: float = 1.5,
-    ) -> List[Tuple[float, float]]:
-        sx, sy = start
-        ex, ey = end
-
-        dx, dy = ex - sx, ey - sy
-        dist = math.hypot(dx, dy)
-        if dist < 1:
-            return [(ex, ey)]
-
-        nx, ny = (0.0, 0.0)
-        if dist > 0:
-            nx, ny = (-dy / dist, dx / dist)
-        lateral = min(80.0, 0.12 * dist) * (0.5 + random.random())
-        if random.random() < 0.5:
-            lateral = -lateral
-        c1 = (sx + dx * 0.33 + nx * lateral * 0.6, sy + dy * 0.33 + ny * lateral * 0.6)
-        c2 = (sx + dx * 0.66 + nx * lateral, sy + dy * 0.66 + ny * lateral)
-        samples = max(20, min(220, int(dist / 5)))
-        pts: List[Tuple[float, float]] = []
-        for i in range(samples + 1):
-            t = i / samples
-            x = (
-                (1 - t) ** 3 * sx
-                + 3 * (1 - t) ** 2 * t * c1[0]
-                + 3 * (1 - t) * t ** 2 * c2[0]
-                + t ** 3 * ex
-            )
-            y = (
-                (1 - t) ** 3 * sy
-                + 3 * (1 - t) ** 2 * t * c1[1]
-                + 3 * (1 - t) * t ** 2 * c2[1]
-                + t ** 3 * ey
-            )
-
-            fade = (math.sin(math.pi * t)) ** 1.5
-            jmag = jitter * (0.5 + random.random()) * fade
-            x += nx * jmag * random.uniform(-1, 1)
-            y += ny * jmag * random.uniform(-1, 1)
-
-            pts.append((x, y))
-
-        dedup: List[Tuple[float, float]] = []
-        last = None
-        for p in pts:
-            ip = (round(p[0], 1), round(p[1], 1))
-            if ip != last:
-                dedup.append(p)
-                last = ip
-        if dedup[-1] != (ex, ey):
-            dedup[-1] = (ex, ey)
-        return dedup
+    ) -> np.ndarray:
+        return self.paths.generate(start, end, jitter)
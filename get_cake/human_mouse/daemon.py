@@ -0,0 +1,130 @@
+"""Warm control daemon behind ``demo.py serve``.
+
+Keeps one ``HumanMouse`` (and its backend, path engine and scheduler) alive
+and runs commands sent over a local socket (see ``human_mouse.ipc``), so a
+script line costs a socket round trip instead of an interpreter start plus
+pyautogui/pynput imports. Requests mirror the ``demo.py`` sub-commands:
+
+    {"cmd": "move", "x": 800, "y": 500, "speed": "fast"}
+    {"cmd": "left-click"}
+    {"cmd": "press", "key": "enter"}
+    {"cmd": "type", "text": "hello world", "wpm": 80, "typos": 0.02}
+    {"cmd": "wait", "seconds": 0.5}
+    {"cmd": "play", "input": "run.rec", "start": 10, "end": 40}
+    {"cmd": "status"}
+
+Commands run one at a time, in arrival order, on the mouse they share.
+Recordings are decoded once and kept in a ``RecordingCache``.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Dict
+
+from .controller import HumanMouse
+from .defaults import DEFAULT_MOVE_RATE
+from .ipc import Message
+from .playback import PreparedRecording, compile_plan
+from .recording.cache import RecordingCache
+from .recording.store import EventStore
+from .timing import PlaybackClock
+from .typist import TypingModel
+
+# Commands a client may forward to the daemon
+COMMANDS = ("move", "left-click", "right-click", "wait", "press", "press-x", "type", "play", "status")
+
+
+class ControlDaemon:
+    """Runs ``demo.py``-style commands on one warm ``HumanMouse``."""
+
+    def __init__(self, mouse: HumanMouse) -> None:
+        self.mouse = mouse
+        self._lock = threading.Lock()
+        # Private copies (no mmap), so recordings can be rewritten while cached
+        self._cache: RecordingCache[EventStore] = RecordingCache(lambda path: EventStore.open(path, mmap=False))
+        self.handled = 0
+        self._handlers: Dict[str, Callable[[Message], Message]] = {
+            "move": self._cmd_move,
+            "left-click": lambda msg: self._call(self.mouse.left_click),
+            "right-click": lambda msg: self._call(self.mouse.right_click),
+            "wait": lambda msg: self._call(self.mouse.wait, msg.get("seconds", 0)),
+            "press": lambda msg: self._call(self.mouse.press_key, msg["key"]),
+            "press-x": lambda msg: self._call(self.mouse.press_x),
+            "type": self._cmd_type,
+            "play": self._cmd_play,
+            "status": self._cmd_status,
+        }
+
+    def handle(self, msg: Message) -> Message:
+        cmd = msg.get("cmd")
+        handler = self._handlers.get(cmd)  # type: ignore[arg-type]
+        if handler is None:
+            raise ValueError(f"Unknown command: {cmd!r} (choose from {', '.join(self._handlers)})")
+        t0 = time.perf_counter()
+        with self._lock:
+            reply = handler(msg)
+            self.handled += 1
+        reply.setdefault("ok", True)
+        reply["seconds"] = time.perf_counter() - t0
+        return reply
+
+    def _call(self, fn: Callable[..., None], *args: object) -> Message:
+        fn(*args)
+        return {}
+
+    def _cmd_move(self, msg: Message) -> Message:
+        self.mouse.move_to(
+            int(msg["x"]),
+            int(msg["y"]),
+            speed=msg.get("speed", "normal"),
+            jitter=float(msg.get("jitter", 1.5)),
+            duration_seconds=msg.get("duration"),
+            easing=msg.get("easing", "smooth"),
+        )
+        timing = self.mouse.last_timing
+        return {"position": list(self.mouse.backend.position()), "points": timing.count, "late_max": timing.max}
+
+    def _cmd_type(self, msg: Message) -> Message:
+        mouse = self.mouse
+        if msg.get("seed") is not None:
+            mouse.typing = TypingModel(int(msg["seed"]))
+        mouse.type_text(str(msg["text"]), msg.get("wpm"), msg.get("typos"))
+        return {"characters": len(msg["text"]), "late_max": mouse.last_timing.max}
+
+    def _cmd_play(self, msg: Message) -> Message:
+        store = self._cache.get(msg["input"])
+        prepared = PreparedRecording(
+            store,
+            (msg.get("start"), msg.get("end")),
+            float(msg.get("move_rate", DEFAULT_MOVE_RATE)),
+            float(msg.get("speed", 1.0)),
+            msg.get("idle_gap"),
+            msg.get("idle_to"),
+        )
+        backend = self.mouse.backend
+        # The cursor may have been moved by hand since the last command; with a
+        # stale cached position a click at its recorded point could skip its move
+        backend.refresh_position()
+        plan = compile_plan(prepared, backend, self.mouse.paths, sample_rate=self.mouse.sample_rate)
+        clock = PlaybackClock(self.mouse.scheduler, policy=msg.get("catch_up", "late"))
+        if plan.first is not None:
+            backend.move(*plan.first)
+        clock.start()
+        timing = plan.run(clock)
+        return {
+            "events": len(prepared),
+            "skipped": sorted(set(plan.skipped)),
+            "late_p95": timing.p95,
+            "late_max": timing.max,
+            "drift": str(clock.metrics),
+        }
+
+    def _cmd_status(self, msg: Message) -> Message:
+        backend = self.mouse.backend
+        return {
+            "backend": backend.name,
+            "position": list(backend.position()),
+            "handled": self.handled,
+            "cache": str(self._cache.stats),
+        }
@@ -0,0 +1,18 @@
+"""Defaults shared by the engines and the command-line tools.
+
+Standard library only, so a CLI can build its argument parser (and a thin
+client can talk to a running daemon) without importing NumPy or any input
+library.
+"""
+
+# Rate at which gaps between kept (simplified) move points are refilled.
+DEFAULT_MOVE_RATE = 120.0
+
+# Cursor updates per second that moves are sampled at (about one per frame
+# on common displays; use 60/144/240 to match a specific refresh rate).
+DEFAULT_SAMPLE_RATE = 120.0
+
+CATCH_UP_POLICIES = ("late", "compress", "pause")
+
+# Typing speed of HumanMouse.type_text (words of five characters per minute).
+DEFAULT_WPM = 60.0
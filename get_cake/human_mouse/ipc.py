@@ -0,0 +1,120 @@
+"""Local JSON-lines socket transport shared by the playback server and clients.
+
+Addresses are ``unix:/path/to.sock`` (a Unix domain socket) or ``host:port``
+(TCP). Each request is one JSON object on one line and gets exactly one
+JSON reply line.
+
+Requests are not authenticated: anyone who can connect can drive the mouse
+and keyboard. ``serve`` therefore only listens on loopback TCP addresses
+unless ``allow_remote`` is set.
+"""
+from __future__ import annotations
+
+import ipaddress
+import json
+import os
+import socket
+import socketserver
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+Message = Dict[str, Any]
+Address = Union[str, Tuple[str, int]]
+
+
+def parse_address(addr: str) -> Tuple[int, Address]:
+    """Return ``(socket family, address)`` for a ``unix:`` or ``host:port`` string."""
+    if addr.startswith("unix:"):
+        if not hasattr(socket, "AF_UNIX"):
+            raise ValueError("Unix sockets are not available on this platform; use host:port")
+        return socket.AF_UNIX, addr[len("unix:"):]
+    host, sep, port = addr.rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"Bad address: {addr!r} (expected unix:/path or host:port)")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+def is_loopback(host: str) -> bool:
+    """Whether ``host`` (an IP literal or ``localhost``) only accepts local connections."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        handle: Callable[[Message], Message] = self.server.handle_message  # type: ignore[attr-defined]
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                msg = json.loads(line)
+                if not isinstance(msg, dict):
+                    raise ValueError("request must be a JSON object")
+                reply = handle(msg)
+            except Exception as e:
+                reply = {"ok": False, "error": str(e)}
+            self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+def serve(addr: str, handle: Callable[[Message], Message], allow_remote: bool = False) -> socketserver.BaseServer:
+    """Start serving ``addr`` on a background thread; returns the server.
+
+    ``handle(request) -> reply`` runs on a per-connection thread; exceptions
+    become ``{"ok": false, "error": ...}`` replies. A stale Unix socket file
+    is replaced. A TCP host that is not a loopback address (``0.0.0.0``, a
+    LAN address, a host name) raises ``ValueError`` unless ``allow_remote``.
+    Call ``server.shutdown()`` and ``server.server_close()`` to stop.
+    """
+    family, address = parse_address(addr)
+    if family == socket.AF_INET:
+        host = address[0]  # type: ignore[index]
+        if not allow_remote and not is_loopback(host):
+            raise ValueError(
+                f"Refusing to listen on {host!r}: requests are not authenticated, so only loopback "
+                "addresses (127.0.0.1, localhost) are served unless remote access is allowed (--allow-remote)"
+            )
+        server: socketserver.BaseServer = _TCPServer(address, _Handler)
+    else:
+        path = str(address)
+        if os.path.exists(path):
+            os.unlink(path)
+        server = _UnixServer(path, _Handler)
+    server.handle_message = handle  # type: ignore[attr-defined]
+    threading.Thread(target=server.serve_forever, name=f"serve:{addr}", daemon=True).start()
+    return server
+
+
+def request(addr: str, msg: Message, timeout: float = 10.0, reply_timeout: Optional[float] = None) -> Message:
+    """Send one request to ``addr`` and return the reply.
+
+    ``timeout`` bounds connecting and sending. The reply is waited for
+    without a limit by default, since a ``play`` or a long ``wait`` replies
+    only when it is done; pass ``reply_timeout`` to bound it.
+    """
+    family, address = parse_address(addr)
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(address)
+        sock.sendall(json.dumps(msg).encode("utf-8") + b"\n")
+        sock.settimeout(reply_timeout)
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError(f"No reply from {addr}")
+    return json.loads(line)
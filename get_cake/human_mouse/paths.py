@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import math
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+Point = Tuple[float, float]
+
+# Typical sideways bow of a path: a fraction of its length, capped in pixels
+BOW_RATIO = 0.12
+MAX_BOW = 80.0
+
+
+def _bow(dist: float) -> float:
+    return min(MAX_BOW, BOW_RATIO * dist)
+
+
+class PathEngine:
+    """Batched generator for human-like cursor paths.
+
+    Produces the same family of curves as the original per-point generator:
+    a cubic Bezier bowed to one side of the straight line, with lateral jitter
+    faded in and out by a sin^1.5 envelope. Every sample of every path is built
+    with array operations, so precomputing all moves of a recording is a single
+    call to ``generate_many``.
+
+    Pass ``seed`` (or an existing ``numpy.random.Generator``) for reproducible
+    paths: the same seed and inputs give byte-identical output.
+    """
+
+    def __init__(self, seed: Optional[int] = None, rng: Optional[np.random.Generator] = None) -> None:
+        self.rng = rng if rng is not None else np.random.default_rng(seed)
+
+    def generate(self, start: Point, end: Point, jitter: float = 1.5) -> np.ndarray:
+        """Return one path from ``start`` to ``end`` as an (n, 2) float array."""
+        return self.generate_many([start], [end], jitter)[0]
+
+    def generate_many(
+        self,
+        starts: Sequence[Point],
+        ends: Sequence[Point],
+        jitter: Union[float, Sequence[float]] = 1.5,
+    ) -> List[np.ndarray]:
+        """Generate one path per (start, end) pair in a single batch.
+
+        ``jitter`` may be a scalar or one value per path. Each returned path
+        starts near ``start`` and ends exactly at ``end``; moves shorter than a
+        pixel collapse to the single end point.
+        """
+        s_all = np.asarray(starts, dtype=np.float64).reshape(-1, 2)
+        e_all = np.asarray(ends, dtype=np.float64).reshape(-1, 2)
+        if len(s_all) != len(e_all):
+            raise ValueError("starts and ends must have the same length")
+        jit_all = np.broadcast_to(np.asarray(jitter, dtype=np.float64), (len(s_all),))
+
+        d_all = e_all - s_all
+        dist_all = np.hypot(d_all[:, 0], d_all[:, 1])
+        out: List[np.ndarray] = [e_all[i:i + 1].copy() for i in range(len(s_all))]
+        live = np.flatnonzero(dist_all >= 1)
+        if not live.size:
+            return out
+
+        rng = self.rng
+        k = live.size
+        s, e, d, dist, jit = s_all[live], e_all[live], d_all[live], dist_all[live], jit_all[live]
+        normal = np.stack((-d[:, 1] / dist, d[:, 0] / dist), axis=1)
+
+        lateral = np.minimum(MAX_BOW, BOW_RATIO * dist) * (0.5 + rng.random(k))
+        lateral = np.where(rng.random(k) < 0.5, -lateral, lateral)
+        c1 = s + d * 0.33 + normal * (lateral * 0.6)[:, None]
+        c2 = s + d * 0.66 + normal * lateral[:, None]
+
+        samples = np.clip((dist / 5).astype(np.int64), 20, 220)
+        counts = samples + 1
+        owner = np.repeat(np.arange(k), counts)
+        first = np.cumsum(counts) - counts
+        t = (np.arange(counts.sum()) - first[owner]) / samples[owner]
+
+        mt = 1.0 - t
+        pts = (
+            (mt ** 3)[:, None] * s[owner]
+            + (3 * mt * mt * t)[:, None] * c1[owner]
+            + (3 * mt * t * t)[:, None] * c2[owner]
+            + (t ** 3)[:, None] * e[owner]
+        )
+
+        fade = np.clip(np.sin(np.pi * t), 0.0, None) ** 1.5
+        jmag = jit[owner] * (0.5 + rng.random(t.size)) * fade
+        wobble = rng.uniform(-1.0, 1.0, (t.size, 2))
+        pts += normal[owner] * (jmag[:, None] * wobble)
+
+        # Drop consecutive samples that land on the same 0.1 px cell.
+        rounded = np.round(pts, 1)
+        keep = np.ones(t.size, dtype=bool)
+        keep[1:] = np.any(rounded[1:] != rounded[:-1], axis=1)
+        keep[first] = True
+        kept = np.flatnonzero(keep)
+        pts = pts[kept]
+        owner = owner[kept]
+
+        # The last kept sample of each path lands exactly on the target.
+        last = np.append(np.flatnonzero(np.diff(owner)), owner.size - 1)
+        pts[last] = e
+        for j, path in zip(live, np.split(pts, last[:-1] + 1)):
+            out[j] = path
+        return out
+
+
+class PathCache(PathEngine):
+    """``PathEngine`` that reuses precomputed motion primitives.
+
+    Moves are grouped into log-spaced distance buckets (``bucket_ratio``
+    apart). The first move in a bucket generates a pool of ``pool_size``
+    paths from (0, 0) to (1, 0) at the bucket's distance in one batch; every
+    move then picks a random template, mirrors it to a random side, scales
+    its bow by a random factor in ``1 +- variation`` and maps it onto the
+    real start and end with one rotate/scale/translate, so a move costs a
+    small matrix product instead of a fresh Bezier. Only the
+    ``max_buckets`` most recently used (bucket, jitter) pools are kept.
+
+    Output matches ``PathEngine`` to within the spread of one bucket
+    (lateral bow, jitter amplitude and sample count scale with distance), so
+    it can stand in wherever an engine is accepted.
+    """
+
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        rng: Optional[np.random.Generator] = None,
+        pool_size: int = 16,
+        variation: float = 0.15,
+        max_buckets: int = 64,
+        bucket_ratio: float = 1.25,
+    ) -> None:
+        super().__init__(seed, rng)
+        if pool_size <= 0 or max_buckets <= 0:
+            raise ValueError("pool_size and max_buckets must be positive")
+        if bucket_ratio <= 1.0:
+            raise ValueError("bucket_ratio must be greater than 1")
+        self.pool_size = pool_size
+        self.variation = max(0.0, float(variation))
+        self.max_buckets = max_buckets
+        self._log_ratio = math.log(bucket_ratio)
+        self.bucket_ratio = bucket_ratio
+        # (bucket, jitter) -> (template length in px, unit templates)
+        self._pools: "OrderedDict[Tuple[int, float], Tuple[float, List[np.ndarray]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def clear(self) -> None:
+        self._pools.clear()
+
+    def _pool(self, dist: float, jitter: float) -> Tuple[float, List[np.ndarray]]:
+        bucket = int(math.floor(math.log(dist) / self._log_ratio))
+        key = (bucket, round(jitter, 2))
+        pool = self._pools.get(key)
+        if pool is not None:
+            self._pools.move_to_end(key)
+            self.hits += 1
+            return pool
+        self.misses += 1
+        # Generate at the bucket's geometric centre, then normalise to unit length
+        length = math.exp((bucket + 0.5) * self._log_ratio)
+        n = self.pool_size
+        raw = super().generate_many([(0.0, 0.0)] * n, [(length, 0.0)] * n, jitter)
+        pool = length, [path / length for path in raw]
+        self._pools[key] = pool
+        if len(self._pools) > self.max_buckets:
+            self._pools.popitem(last=False)
+            self.evictions += 1
+        return pool
+
+    def generate(self, start: Point, end: Point, jitter: float = 1.5) -> np.ndarray:
+        sx, sy = float(start[0]), float(start[1])
+        ux, uy = float(end[0]) - sx, float(end[1]) - sy
+        dist = math.hypot(ux, uy)
+        if dist < 1:
+            return np.array([[float(end[0]), float(end[1])]])
+        rng = self.rng
+        pick, side, scale = rng.random(3)
+        length, pool = self._pool(dist, float(jitter))
+        unit = pool[int(pick * len(pool))]
+        # The bow grows with distance only up to MAX_BOW, so rescale it apart
+        # from the along-track axis
+        bow = _bow(dist) / _bow(length) * length / dist
+        bow *= (1.0 + self.variation * (2.0 * scale - 1.0)) * (-1.0 if side < 0.5 else 1.0)
+        # Rotate/scale onto the real move: along-track by (ux, uy), cross-track by its normal
+        m = np.array(((ux, uy), (-uy * bow, ux * bow)))
+        path = unit @ m
+        path[:, 0] += sx
+        path[:, 1] += sy
+        path[-1] = end
+        return path
+
+    def generate_many(
+        self,
+        starts: Sequence[Point],
+        ends: Sequence[Point],
+        jitter: Union[float, Sequence[float]] = 1.5,
+    ) -> List[np.ndarray]:
+        s_all = np.asarray(starts, dtype=np.float64).reshape(-1, 2)
+        e_all = np.asarray(ends, dtype=np.float64).reshape(-1, 2)
+        if len(s_all) != len(e_all):
+            raise ValueError("starts and ends must have the same length")
+        jit_all = np.broadcast_to(np.asarray(jitter, dtype=np.float64), (len(s_all),))
+        return [self.generate(s, e, j) for s, e, j in zip(s_all.tolist(), e_all.tolist(), jit_all.tolist())]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "buckets": len(self._pools),
+            "templates": sum(len(p) for _, p in self._pools.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,349 @@
+"""Helpers shared by the playback loops in ``app.py`` and ``demo.py``."""
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import profiling
+from .backends import InputBackend
+from .defaults import DEFAULT_MOVE_RATE
+from .paths import PathEngine
+from .recording.columnar import MISSING, EventColumns
+from .recording.events import TYPE_CODES, TYPE_NAMES
+from .recording.store import EventStore
+from .timing import DEFAULT_SAMPLE_RATE, LatenessStats, PlaybackClock, plan_schedule, sample_path
+
+MOVE = TYPE_CODES["move"]
+
+# App-style lerp between action points: gaps longer than LERP_MIN_GAP get a
+# human-like move lasting LERP_FRACTION of the gap (at most LERP_MAX seconds);
+# shorter gaps get a jitter-free hop of at most HOP seconds.
+LERP_MIN_GAP = 0.02
+LERP_FRACTION = 0.8
+LERP_MAX = 0.8
+HOP = 0.02
+
+
+def expand_moves(cols: EventColumns, rate: float = DEFAULT_MOVE_RATE) -> EventColumns:
+    """Linearly interpolate between consecutive move events.
+
+    Recordings made with a move simplifier keep only the corner points of
+    the cursor path; this refills each move-to-move gap with evenly timed
+    moves at up to ``rate`` per second (never more than one per pixel of
+    travel). Other events are left as they are. Returns ``cols`` unchanged
+    when nothing needs filling.
+    """
+    n = len(cols)
+    if n < 2 or rate <= 0:
+        return cols
+    t = np.asarray(cols.t, dtype=np.float64)
+    x = np.asarray(cols.x, dtype=np.int64)
+    y = np.asarray(cols.y, dtype=np.int64)
+    is_move = np.asarray(cols.type) == MOVE
+
+    gap = np.diff(t)
+    step_x = np.diff(x)
+    step_y = np.diff(y)
+    pixels = np.maximum(np.abs(step_x), np.abs(step_y))
+    fill = np.minimum(np.ceil(gap * rate).astype(np.int64) - 1, pixels - 1)
+    fill = np.where(is_move[:-1] & is_move[1:], np.maximum(fill, 0), 0)
+    if not fill.any():
+        return cols
+
+    reps = np.append(fill, 0) + 1
+    src = np.repeat(np.arange(n), reps)
+    sub = np.arange(reps.sum()) - np.repeat(np.cumsum(reps) - reps, reps)
+    f = sub / reps[src]
+    nxt = np.minimum(src + 1, n - 1)
+    inserted = sub > 0
+
+    out_x = np.where(inserted, np.rint(x[src] + (x[nxt] - x[src]) * f), x[src]).astype("<i4")
+    out_y = np.where(inserted, np.rint(y[src] + (y[nxt] - y[src]) * f), y[src]).astype("<i4")
+    return EventColumns(
+        t[src] + np.append(gap, 0.0)[src] * f,
+        np.where(inserted, MOVE, np.asarray(cols.type)[src]).astype(np.uint8),
+        out_x,
+        out_y,
+        np.where(inserted, MISSING, np.asarray(cols.dx)[src]).astype("<i4"),
+        np.where(inserted, MISSING, np.asarray(cols.dy)[src]).astype("<i4"),
+        np.where(inserted, -1, np.asarray(cols.key)[src]).astype("<i4"),
+        keys=cols.keys,
+    )
+
+
+def warp_times(
+    t: np.ndarray,
+    speed: float = 1.0,
+    idle_gap: Optional[float] = None,
+    idle_to: Optional[float] = None,
+) -> np.ndarray:
+    """Timestamps ``t`` replayed faster, anchored at ``t[0]``.
+
+    Every pause between consecutive events longer than ``idle_gap`` seconds
+    shrinks to ``idle_to`` (default: ``idle_gap``), then the whole timeline
+    runs ``speed`` times faster. Both are in recording seconds, as in
+    ``demo.py retime``.
+    """
+    if speed <= 0:
+        raise ValueError("speed must be positive")
+    t = np.asarray(t, dtype=np.float64)
+    if len(t) < 2 or (speed == 1.0 and idle_gap is None):
+        return t
+    gaps = np.diff(t)
+    if idle_gap is not None:
+        to = idle_gap if idle_to is None else min(idle_to, idle_gap)
+        gaps = np.where(gaps > idle_gap, to, gaps)
+    return t[0] + np.concatenate(([0.0], np.cumsum(gaps))) / speed
+
+
+class PreparedRecording:
+    """A recording decoded into plain lists, ready to dispatch.
+
+    Holds the (optionally windowed) events with move gaps already filled,
+    timestamps as offsets from the first event, type names and resolved key
+    names. Building one is the only per-recording cost; looping over it again
+    costs nothing more, which is what ``RecordingCache`` relies on.
+
+    ``speed``, ``idle_gap`` and ``idle_to`` time-warp playback without
+    touching the file (see ``warp_times``); ``compile_plan`` scales its lerp
+    moves by the same ``speed``.
+    """
+
+    def __init__(
+        self,
+        store: EventStore,
+        window: Tuple[Optional[float], Optional[float]] = (None, None),
+        move_rate: float = DEFAULT_MOVE_RATE,
+        speed: float = 1.0,
+        idle_gap: Optional[float] = None,
+        idle_to: Optional[float] = None,
+    ) -> None:
+        cols = store.window_relative(*window).columns
+        warped = warp_times(cols.t, speed, idle_gap, idle_to)
+        if warped is not cols.t:
+            cols = EventColumns(warped, cols.type, cols.x, cols.y, cols.dx, cols.dy, cols.key, keys=cols.keys)
+        cols = expand_moves(cols, move_rate)
+        self.store = store
+        self.speed = speed
+        t = np.asarray(cols.t, dtype=np.float64)
+        self.offsets: List[float] = (t - t[0]).tolist() if len(t) else []
+        self.types: List[str] = [TYPE_NAMES[c] for c in cols.type.tolist()]
+        self.xs: List[int] = cols.x.tolist()
+        self.ys: List[int] = cols.y.tolist()
+        self.dys: List[int] = cols.dy.tolist()
+        keys = cols.keys
+        self.keys: List[Optional[str]] = [keys[k] if k >= 0 else None for k in cols.key.tolist()]
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def rows(self):
+        """Iterate ``(offset, type, x, y, dy, key)`` tuples."""
+        return zip(self.offsets, self.types, self.xs, self.ys, self.dys, self.keys)
+
+
+class PlaybackPlan:
+    """A recording compiled down to ``(deadline, callable, args)`` steps.
+
+    Deadlines are seconds from the start of playback; callables are bound
+    backend methods with their arguments already converted and validated.
+    ``run`` only sleeps and calls. ``optional`` marks moves that are directly
+    followed by another move: a ``PlaybackClock`` that falls behind may skip
+    those, which shortens the path without changing where it ends.
+    ``lerps`` has one row per generated move: start x, y, end x, y, start
+    time and duration. ``end`` is where the steps leave the cursor.
+
+    ``releases`` maps press calls to their release calls (e.g. the backend's
+    ``mouse_down`` to its ``mouse_up``). Steps dispatched through ``fire``
+    are counted in ``done``, so ``release`` can let go of buttons and keys
+    that a stop, a cancelled task or a backend error left held.
+    """
+
+    def __init__(
+        self,
+        deadlines: np.ndarray,
+        calls: List[Callable[..., Any]],
+        args: List[tuple],
+        first: Optional[Tuple[int, int]] = None,
+        skipped: Optional[List[str]] = None,
+        optional: Optional[np.ndarray] = None,
+        lerps: Optional[np.ndarray] = None,
+        end: Optional[Tuple[int, int]] = None,
+        releases: Optional[Dict[Callable[..., Any], Callable[..., Any]]] = None,
+    ) -> None:
+        self.deadlines = deadlines
+        self.calls = calls
+        self.args = args
+        # Where to pre-position the cursor before the clock starts
+        self.first = first
+        # Keys the backend cannot send; their events were left out
+        self.skipped = skipped or []
+        self.optional = optional if optional is not None else np.zeros(len(calls), dtype=bool)
+        self.lerps = lerps if lerps is not None else np.zeros((0, 6))
+        # Cursor position after the last step (None: no step positions it)
+        self.end = end
+        self.releases = releases or {}
+        # Steps dispatched by the last run
+        self.done = 0
+
+    def __len__(self) -> int:
+        return len(self.calls)
+
+    @property
+    def duration(self) -> float:
+        return float(self.deadlines[-1]) if len(self.deadlines) else 0.0
+
+    def fire(self, i: int) -> None:
+        self.calls[i](*self.args[i])
+        self.done = i + 1
+
+    def held(self) -> List[Tuple[Callable[..., Any], str]]:
+        """``(release call, button or key)`` for every press still down
+        after the dispatched steps."""
+        releases = self.releases
+        ups = set(releases.values())
+        down: Dict[Tuple[Callable[..., Any], str], bool] = {}
+        for call, args in zip(self.calls[:self.done], self.args[:self.done]):
+            if call in releases:
+                down[(releases[call], args[0])] = True
+            elif call in ups:
+                down[(call, args[0])] = False
+        return [held for held, d in down.items() if d]
+
+    def release(self) -> None:
+        """Release everything still held, where the cursor is now."""
+        for up, name in self.held():
+            up(name)
+        self.done = 0
+
+    def run(
+        self,
+        clock: PlaybackClock,
+        stop: Optional[threading.Event] = None,
+        base: float = 0.0,
+    ) -> LatenessStats:
+        """Dispatch every step at ``base`` + its deadline on ``clock``'s timeline.
+
+        A stop or an error releases whatever is held; a completed run leaves
+        the inputs exactly as the recording did.
+        """
+        self.done = 0
+        fire = profiling.wrap("playback.step", self.fire)
+        try:
+            stats = clock.run(self.deadlines, fire, self.optional, stop, base)
+        except BaseException:
+            self.release()
+            raise
+        if stop is not None and stop.is_set():
+            self.release()
+        profiling.observe("playback.lateness", clock.scheduler.last_lateness)
+        return stats
+
+
+def compile_plan(
+    prepared: PreparedRecording,
+    backend: InputBackend,
+    paths: Optional[PathEngine] = None,
+    lerp: bool = False,
+    sample_rate: Optional[float] = DEFAULT_SAMPLE_RATE,
+) -> PlaybackPlan:
+    """Compile a prepared recording into a ``PlaybackPlan`` for ``backend``.
+
+    With ``lerp=False`` (``demo.py play``) every event fires at its recorded
+    time. With ``lerp=True`` (the app) the cursor also travels to each
+    clicked/scrolled point along a human-like path that starts when the
+    previous event fires; all of those paths are generated in one batch and
+    sampled at ``sample_rate`` (None: every generated point). Lerp timings
+    are divided by ``prepared.speed``, like the recording itself.
+    """
+    move = backend.move
+    buttons = {
+        "left_down": (backend.mouse_down, "left"),
+        "left_up": (backend.mouse_up, "left"),
+        "right_down": (backend.mouse_down, "right"),
+        "right_up": (backend.mouse_up, "right"),
+    }
+    valid_keys: dict = {}
+    skipped: List[str] = []
+
+    first = None
+    if len(prepared) and prepared.xs[0] != MISSING and prepared.ys[0] != MISSING:
+        first = (prepared.xs[0], prepared.ys[0])
+    cur = first if first is not None else (backend.position() if lerp else None)
+    width, height = backend.size() if lerp else (0, 0)
+
+    # Steps are (deadline, call, args); a None call marks a lerp segment slot
+    speed = prepared.speed
+    min_gap, lerp_max, hop = LERP_MIN_GAP / speed, LERP_MAX / speed, HOP / speed
+    steps: List[Tuple[float, Any, tuple]] = []
+    segments: List[Tuple[Tuple[int, int], Tuple[int, int], float, float, float]] = []
+    t_prev = 0.0
+    for t, etype, x, y, dy, key in prepared.rows():
+        has_xy = x != MISSING and y != MISSING
+        if etype == "move":
+            steps.append((t, move, (x, y)))
+            cur = (x, y)
+            t_prev = t
+            continue
+        if lerp and has_xy:
+            target = (max(0, min(x, width - 1)), max(0, min(y, height - 1)))
+            if target != cur:
+                gap = t - t_prev
+                if gap > min_gap:
+                    dur, jitter = min(lerp_max, gap * LERP_FRACTION), 1.0
+                else:
+                    dur, jitter = max(0.0, min(hop, gap)), 0.0
+                steps.append((t_prev, None, (len(segments),)))
+                segments.append((cur, target, jitter, t_prev, dur))
+                cur = target
+        t_prev = t
+
+        if etype in ("key_down", "key_up"):
+            ok = valid_keys.get(key)
+            if ok is None:
+                ok = valid_keys[key] = bool(key) and backend.is_valid_key(key)
+                if not ok:
+                    skipped.append(str(key))
+            if not ok:
+                continue
+            steps.append((t, backend.key_down if etype == "key_down" else backend.key_up, (key,)))
+        elif etype == "scroll":
+            steps.append((t, backend.scroll, (dy,)))
+        elif etype in buttons:
+            fn, button = buttons[etype]
+            steps.append((t, fn, (button, x, y) if has_xy else (button,)))
+            if has_xy:
+                cur = (x, y)
+
+    if segments:
+        engine = paths if paths is not None else PathEngine()
+        with profiling.span("path.generate"):
+            generated = engine.generate_many(
+                [s[0] for s in segments], [s[1] for s in segments], [s[2] for s in segments]
+            )
+    deadlines: List[float] = []
+    calls: List[Callable[..., Any]] = []
+    args: List[tuple] = []
+    for t, fn, a in steps:
+        if fn is not None:
+            deadlines.append(t)
+            calls.append(fn)
+            args.append(a)
+            continue
+        _, _, _, t_start, dur = segments[a[0]]
+        path = generated[a[0]]
+        if sample_rate:
+            path, times = sample_path(path, dur, "dash", sample_rate, start=t_start)
+        else:
+            times = plan_schedule(len(path), dur, "dash", start=t_start)
+        path = path.astype(int)
+        deadlines.extend(times.tolist())
+        calls.extend([move] * len(path))
+        args.extend(map(tuple, path.tolist()))
+    is_move = np.fromiter((fn is move for fn in calls), dtype=bool, count=len(calls))
+    optional = is_move & np.append(is_move[1:], False)
+    lerps = np.array([(*s, *e, t0, dur) for s, e, _, t0, dur in segments], dtype=np.float64).reshape(-1, 6)
+    releases = {backend.mouse_down: backend.mouse_up, backend.key_down: backend.key_up}
+    return PlaybackPlan(np.asarray(deadlines, dtype=np.float64), calls, args, first, skipped, optional, lerps, cur, releases)
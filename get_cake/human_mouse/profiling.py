@@ -0,0 +1,257 @@
+"""Opt-in per-stage timing for the controller, recorder and playback engines.
+
+Nothing is measured until ``enable()`` installs a ``Profiler``. Hot paths
+go through ``span``/``wrap``/``observe`` once per move, pass or recording,
+never once per point: ``wrap`` hands back the bare callable when nothing is
+installed, so per-point calls run untouched and the disabled cost is a
+global read and a no-op context per move.
+
+Each stage (``"path.generate"``, ``"backend.move"``, ``"sched.lateness"``,
+...) gets a histogram of log-spaced buckets allocated once, and the most
+recent ``trace_events`` spans are kept in a preallocated ring for
+``export_chrome_trace`` (load the JSON in chrome://tracing or Perfetto).
+
+    from human_mouse import profiling
+    prof = profiling.enable()
+    ...
+    print(prof.report())
+    prof.export_chrome_trace("trace.json")
+"""
+from __future__ import annotations
+
+import contextlib
+import json
+import math
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+# Histogram buckets: BUCKETS_PER_DECADE per factor of 10 from MIN_SECONDS up
+# to MAX_SECONDS; anything outside lands in the first/last bucket.
+MIN_SECONDS = 1e-7
+MAX_SECONDS = 100.0
+BUCKETS_PER_DECADE = 20
+DEFAULT_TRACE_EVENTS = 100_000
+
+_N_BUCKETS = int(round(math.log10(MAX_SECONDS / MIN_SECONDS) * BUCKETS_PER_DECADE)) + 1
+# Upper edge of every bucket
+_EDGES = MIN_SECONDS * 10.0 ** (np.arange(1, _N_BUCKETS + 1) / BUCKETS_PER_DECADE)
+_LOG_MIN = math.log10(MIN_SECONDS)
+
+
+class Histogram:
+    """Fixed-size log histogram of durations (seconds)."""
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self) -> None:
+        self.counts = np.zeros(_N_BUCKETS, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        if seconds > MIN_SECONDS:
+            i = int((math.log10(seconds) - _LOG_MIN) * BUCKETS_PER_DECADE)
+            self.counts[i if i < _N_BUCKETS else _N_BUCKETS - 1] += 1
+        else:
+            self.counts[0] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def add_many(self, seconds: np.ndarray) -> None:
+        if not len(seconds):
+            return
+        idx = np.minimum(np.searchsorted(_EDGES, seconds), _N_BUCKETS - 1)
+        self.counts += np.bincount(idx, minlength=_N_BUCKETS)
+        self.count += len(seconds)
+        self.total += float(seconds.sum())
+        self.min = min(self.min, float(seconds.min()))
+        self.max = max(self.max, float(seconds.max()))
+
+    def percentile(self, q: float) -> float:
+        """Upper edge of the bucket holding the ``q``-th percentile (capped at ``max``)."""
+        if not self.count:
+            return 0.0
+        i = int(np.searchsorted(np.cumsum(self.counts), math.ceil(self.count * q / 100.0)))
+        return min(float(_EDGES[i]), self.max)
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class Profiler:
+    """Per-stage histograms plus a ring of recent spans for the timeline."""
+
+    def __init__(self, trace_events: int = DEFAULT_TRACE_EVENTS, clock: Callable[[], float] = time.perf_counter) -> None:
+        self.clock = clock
+        self.origin = clock()
+        self.stages: Dict[str, Histogram] = {}
+        self._names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        n = max(0, trace_events)
+        self._capacity = n
+        self._stage = np.zeros(n, dtype=np.int32)
+        self._start = np.zeros(n, dtype=np.float64)
+        self._dur = np.zeros(n, dtype=np.float64)
+        self._tid = np.zeros(n, dtype=np.int64)
+        self._head = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _histogram(self, stage: str) -> Histogram:
+        hist = self.stages.get(stage)
+        if hist is None:
+            with self._lock:
+                hist = self.stages.get(stage)
+                if hist is None:
+                    self._ids[stage] = len(self._names)
+                    self._names.append(stage)
+                    hist = self.stages[stage] = Histogram()
+        return hist
+
+    def record(self, stage: str, start: float, end: float) -> None:
+        """Add one span of ``stage`` (clock times) to its histogram and the trace."""
+        hist = self._histogram(stage)
+        with self._lock:
+            hist.add(end - start)
+            if not self._capacity:
+                return
+            i = self._head
+            self._stage[i] = self._ids[stage]
+            self._start[i] = start
+            self._dur[i] = end - start
+            self._tid[i] = threading.get_ident()
+            self._head = (i + 1) % self._capacity
+            if self._size < self._capacity:
+                self._size += 1
+
+    def observe(self, stage: str, seconds: np.ndarray) -> None:
+        """Add many durations at once (histogram only), e.g. a pass's lateness."""
+        hist = self._histogram(stage)
+        with self._lock:
+            hist.add_many(np.asarray(seconds, dtype=np.float64))
+
+    @contextlib.contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.record(stage, start, self.clock())
+
+    def wrap(self, stage: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """``fn`` with every call recorded as ``stage``."""
+        clock = self.clock
+        record = self.record
+
+        def timed(*args: Any) -> Any:
+            start = clock()
+            try:
+                return fn(*args)
+            finally:
+                record(stage, start, clock())
+
+        return timed
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stages = {name: Histogram() for name in self.stages}
+            self._head = 0
+            self._size = 0
+            self.origin = self.clock()
+
+    def report(self) -> str:
+        lines = [f"{'stage':22s} {'count':>8s} {'mean':>9s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'max':>9s} {'total':>9s}"]
+        for name in sorted(self.stages):
+            s = self.stages[name].summary()
+            if not s["count"]:
+                continue
+            ms = [s[k] * 1e3 for k in ("mean", "p50", "p95", "p99", "max", "total")]
+            lines.append(f"{name:22s} {s['count']:8d} " + " ".join(f"{v:9.3f}" for v in ms))
+        lines.append("(milliseconds)")
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: hist.summary() for name, hist in self.stages.items()}
+
+    def export_chrome_trace(self, path: str) -> int:
+        """Write the traced spans as Chrome trace-event JSON; returns the span count."""
+        with self._lock:
+            n, head = self._size, self._head
+            order = (head - n + np.arange(n)) % self._capacity if n else np.zeros(0, dtype=np.int64)
+            stage, start, dur, tid = self._stage[order], self._start[order], self._dur[order], self._tid[order]
+            names = list(self._names)
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = [
+            {
+                "name": names[s],
+                "cat": names[s].split(".", 1)[0],
+                "ph": "X",
+                "ts": (t - self.origin) * 1e6,
+                "dur": d * 1e6,
+                "pid": pid,
+                "tid": th,
+            }
+            for s, t, d, th in zip(stage.tolist(), start.tolist(), dur.tolist(), tid.tolist())
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms", "stages": self.to_dict()}, f)
+        return n
+
+
+_active: Optional[Profiler] = None
+_NULL_SPAN = contextlib.nullcontext()
+
+
+def profiler() -> Optional[Profiler]:
+    """The installed profiler, or None when instrumentation is off."""
+    return _active
+
+
+def enable(trace_events: int = DEFAULT_TRACE_EVENTS) -> Profiler:
+    """Install a fresh profiler (replacing any previous one) and return it."""
+    global _active
+    _active = Profiler(trace_events)
+    return _active
+
+
+def disable() -> Optional[Profiler]:
+    """Stop measuring; returns the profiler that was installed."""
+    global _active
+    prof, _active = _active, None
+    return prof
+
+
+# Shorthands for instrumented code: each is a no-op when nothing is installed.
+def span(stage: str) -> Any:
+    prof = _active
+    return prof.span(stage) if prof is not None else _NULL_SPAN
+
+
+def wrap(stage: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    prof = _active
+    return prof.wrap(stage, fn) if prof is not None else fn
+
+
+def observe(stage: str, seconds: np.ndarray) -> None:
+    prof = _active
+    if prof is not None:
+        prof.observe(stage, seconds)
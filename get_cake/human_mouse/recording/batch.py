@@ -0,0 +1,452 @@
+"""Streaming analysis and rewriting of recording files, one chunk at a time.
+
+Everything here works on ``EventColumns`` chunks of at most ``CHUNK``
+events, so memory stays flat however large a file is. Legacy JSON files are
+parsed incrementally (``iter_json_events``), binary files are memory-mapped
+and sliced. Version-2 outputs are written as streamed segments to a
+temporary file and laid out contiguously (like ``write_columns``) by
+copying one column of one segment at a time when complete; ``version=1``
+outputs are JSON written event by event. Either replaces the destination
+only when complete.
+
+The per-file functions (``file_stats``, ``convert_file``, ``trim_file``,
+``retime_file``) take and return plain values so they can run in a process
+pool; ``run_batch`` does that and ``write_index`` records the results.
+"""
+from __future__ import annotations
+
+import fnmatch
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .columnar import (
+    HEADER, MAGIC, MISSING, SEGMENT, VERSION, EventColumns, encode_segment, is_columnar, read_columns, stream_header,
+)
+from .events import TYPE_CODES, TYPE_NAMES
+
+CHUNK = 65536
+
+RECORDING_PATTERNS = ("*.json", "*.rec")
+
+# Default name of the summary index written next to batch outputs
+INDEX_NAME = "index.json"
+
+_EVENTS_KEY = re.compile(r'"events"\s*:\s*\[')
+_CLICKS = (TYPE_CODES["left_down"], TYPE_CODES["right_down"])
+# (offset, bytes per event) of each column within a segment, in units of
+# its event count: t, x, y, dx, dy, key, type
+_COLUMN_SLOTS = ((0, 8), (8, 4), (12, 4), (16, 4), (20, 4), (24, 4), (28, 1))
+
+
+# -- reading ---------------------------------------------------------------
+def iter_json_events(path: str, read_size: int = 1 << 16) -> Iterator[Dict[str, Any]]:
+    """Yield the event dicts of a version-1 JSON file without loading it whole."""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf = ""
+        while True:
+            chunk = f.read(read_size)
+            buf += chunk
+            m = _EVENTS_KEY.search(buf)
+            if m:
+                buf = buf[m.end():]
+                break
+            if not chunk:
+                raise ValueError(f"No events array in {path}")
+            # Keep a tail in case the key straddles two reads
+            buf = buf[-32:]
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buf):
+                chunk = f.read(read_size)
+                if not chunk:
+                    raise ValueError(f"Truncated recording: {path}")
+                buf, pos = chunk, 0
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Object continues past the buffer: read more and retry
+                chunk = f.read(read_size)
+                if not chunk:
+                    raise ValueError(f"Truncated recording: {path}") from None
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            yield obj
+            pos = end
+            if pos > read_size:
+                buf, pos = buf[pos:], 0
+
+
+def iter_chunks(path: str, chunk: int = CHUNK) -> Iterator[EventColumns]:
+    """Yield a recording of either version as ``EventColumns`` chunks.
+
+    Key indices are consistent across the chunks of one file: every chunk's
+    ``keys`` is the file's key table so far.
+    """
+    if is_columnar(path):
+        cols = read_columns(path, mmap=True)
+        for lo in range(0, len(cols), chunk):
+            hi = lo + chunk
+            yield EventColumns(
+                cols.t[lo:hi], cols.type[lo:hi], cols.x[lo:hi], cols.y[lo:hi],
+                cols.dx[lo:hi], cols.dy[lo:hi], cols.key[lo:hi], keys=cols.keys,
+            )
+        return
+    key_index: Dict[str, int] = {}
+    batch: List[Dict[str, Any]] = []
+    for ev in iter_json_events(path):
+        batch.append(ev)
+        if len(batch) >= chunk:
+            yield EventColumns.from_events(batch, key_index)
+            batch = []
+    if batch:
+        yield EventColumns.from_events(batch, key_index)
+
+
+def _take(cols: EventColumns, sel: Any, t: Optional[np.ndarray] = None) -> EventColumns:
+    return EventColumns(
+        cols.t[sel] if t is None else t,
+        cols.type[sel], cols.x[sel], cols.y[sel], cols.dx[sel], cols.dy[sel], cols.key[sel],
+        keys=cols.keys,
+    )
+
+
+# -- statistics --------------------------------------------------------------
+class RecordingStats:
+    """Accumulates a summary of a recording fed chunk by chunk."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.events = 0
+        self.types = np.zeros(len(TYPE_NAMES), dtype=np.int64)
+        self.start: Optional[float] = None
+        self.end: Optional[float] = None
+        self.travel = 0.0
+        self.keys: set = set()
+        self._last_xy: Optional[np.ndarray] = None
+
+    def feed(self, cols: EventColumns) -> None:
+        n = len(cols)
+        if not n:
+            return
+        t = np.asarray(cols.t, dtype=np.float64)
+        if self.start is None:
+            self.start = float(t[0])
+        self.end = float(t[-1])
+        self.events += n
+        self.types += np.bincount(np.asarray(cols.type), minlength=len(TYPE_NAMES))[:len(TYPE_NAMES)]
+
+        x = np.asarray(cols.x)
+        y = np.asarray(cols.y)
+        has_xy = (x != MISSING) & (y != MISSING)
+        xy = np.column_stack((x[has_xy], y[has_xy])).astype(np.float64)
+        if len(xy):
+            if self._last_xy is not None:
+                xy = np.vstack((self._last_xy, xy))
+            steps = np.diff(xy, axis=0)
+            self.travel += float(np.hypot(steps[:, 0], steps[:, 1]).sum())
+            self._last_xy = xy[-1:]
+
+        used = np.unique(np.asarray(cols.key))
+        self.keys.update(cols.keys[k] for k in used.tolist() if k >= 0)
+
+    def summary(self) -> Dict[str, Any]:
+        duration = (self.end - self.start) if self.start is not None and self.end is not None else 0.0
+        clicks = int(sum(self.types[c] for c in _CLICKS))
+        return {
+            "path": self.path,
+            "events": self.events,
+            "types": {name: int(c) for name, c in zip(TYPE_NAMES, self.types.tolist()) if c},
+            "duration_s": round(duration, 6),
+            "clicks": clicks,
+            "clicks_per_min": round(clicks * 60.0 / duration, 3) if duration > 0 else 0.0,
+            "travel_px": round(self.travel, 1),
+            "distinct_keys": len(self.keys),
+        }
+
+
+# -- writing -------------------------------------------------------------------
+class ChunkWriter:
+    """Writes ``EventColumns`` chunks to ``path`` as they come.
+
+    Version 2 chunks go to a segmented scratch file that ``close`` rewrites
+    as a contiguous (compacted) binary file; version 1 is legacy JSON.
+    Chunks may come from different files: keys are re-interned into the
+    output's own table. Nothing replaces ``path`` until ``close``.
+    """
+
+    def __init__(self, path: str, version: int = 2) -> None:
+        self.path = path
+        self.version = version
+        self._tmp = f"{path}.tmp"
+        self._f = open(self._tmp, "wb")
+        self._key_index: Dict[str, int] = {}
+        # (offset of the columns, event count) of each version-2 segment
+        self._segments: List[Tuple[int, int]] = []
+        self._first = True
+        self.stats = RecordingStats(path)
+        if version == 1:
+            self._f.write(b'{\n  "version": 1,\n  "events": [')
+        else:
+            self._f.write(stream_header())
+
+    def write(self, cols: EventColumns) -> None:
+        if not len(cols):
+            return
+        self.stats.feed(cols)
+        if self.version == 1:
+            self._write_json(cols)
+            return
+        known = len(self._key_index)
+        lut = np.array([self._key_index.setdefault(k, len(self._key_index)) for k in cols.keys] + [-1], dtype="<i4")
+        out = EventColumns(
+            cols.t, cols.type, cols.x, cols.y, cols.dx, cols.dy, lut[np.asarray(cols.key)],
+            keys=list(self._key_index),
+        )
+        self._segments.append((self._f.tell() + SEGMENT.size, len(out)))
+        self._f.write(encode_segment(out, list(self._key_index)[known:]))
+
+    def _write_json(self, cols: EventColumns) -> None:
+        lines = []
+        for ev in cols:
+            lines.append(("\n    " if self._first else ",\n    ") + json.dumps(ev.to_dict(), ensure_ascii=False))
+            self._first = False
+        self._f.write("".join(lines).encode("utf-8"))
+
+    def close(self) -> None:
+        if self.version == 1:
+            self._f.write(b"\n  ]\n}\n")
+            self._f.close()
+            os.replace(self._tmp, self.path)
+            return
+        self._f.close()
+        try:
+            self._compact()
+        finally:
+            os.unlink(self._tmp)
+
+    def _compact(self) -> None:
+        n = sum(c for _, c in self._segments)
+        keys_blob = json.dumps(list(self._key_index), ensure_ascii=False).encode("utf-8")
+        raw = np.memmap(self._tmp, dtype=np.uint8, mode="r") if n else None
+        out = f"{self.path}.tmp2"
+        with open(out, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, 0, n, len(keys_blob)))
+            # Column by column, each gathered from every segment in order
+            for start, width in _COLUMN_SLOTS:
+                for off, c in self._segments:
+                    a = off + start * c
+                    f.write(raw[a:a + width * c].tobytes())
+            f.write(b"\0" * (-n % 8))
+            f.write(keys_blob)
+        del raw
+        os.replace(out, self.path)
+
+    def abort(self) -> None:
+        self._f.close()
+        os.unlink(self._tmp)
+
+    def __enter__(self) -> "ChunkWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+# -- per-file operations ------------------------------------------------------
+def _check_paths(src: str, dst: str) -> None:
+    if os.path.abspath(src) == os.path.abspath(dst):
+        raise ValueError(f"Refusing to overwrite the input: {src}")
+
+
+def file_stats(path: str) -> Dict[str, Any]:
+    stats = RecordingStats(path)
+    for cols in iter_chunks(path):
+        stats.feed(cols)
+    return stats.summary()
+
+
+def _rewrite(src: str, dst: str, version: int, chunks: Iterable[EventColumns]) -> Dict[str, Any]:
+    _check_paths(src, dst)
+    with ChunkWriter(dst, version) as w:
+        for cols in chunks:
+            w.write(cols)
+    summary = w.stats.summary()
+    summary["source"] = src
+    return summary
+
+
+def convert_file(src: str, dst: str, version: int = 2) -> Dict[str, Any]:
+    """Rewrite ``src`` in format ``version`` (1 JSON, 2 binary)."""
+    return _rewrite(src, dst, version, iter_chunks(src))
+
+
+def _trimmed(chunks: Iterator[EventColumns], start: Optional[float], end: Optional[float]) -> Iterator[EventColumns]:
+    t0 = None
+    for cols in chunks:
+        if not len(cols):
+            continue
+        t = np.asarray(cols.t, dtype=np.float64)
+        if t0 is None:
+            t0 = float(t[0])
+        rel = t - t0
+        keep = np.ones(len(t), dtype=bool)
+        if start is not None:
+            keep &= rel >= start
+        if end is not None:
+            keep &= rel < end
+        yield _take(cols, keep)
+        if end is not None and rel[-1] >= end:
+            # Recordings are time-ordered: nothing later can be in the window
+            return
+
+
+def trim_file(src: str, dst: str, start: Optional[float] = None, end: Optional[float] = None, version: int = 2) -> Dict[str, Any]:
+    """Keep the events from ``start`` up to (not including) ``end`` seconds
+    after the first event, like ``EventStore.window``."""
+    return _rewrite(src, dst, version, _trimmed(iter_chunks(src), start, end))
+
+
+def _retimed(chunks: Iterator[EventColumns], speed: float, max_gap: Optional[float]) -> Iterator[EventColumns]:
+    prev_in = prev_out = None
+    for cols in chunks:
+        if not len(cols):
+            continue
+        t = np.asarray(cols.t, dtype=np.float64)
+        if prev_in is None:
+            prev_in = prev_out = float(t[0])
+        gaps = np.diff(t, prepend=prev_in)
+        if max_gap is not None:
+            gaps = np.minimum(gaps, max_gap)
+        out = prev_out + np.cumsum(gaps) / speed
+        prev_in, prev_out = float(t[-1]), float(out[-1])
+        yield _take(cols, slice(None), out)
+
+
+def retime_file(src: str, dst: str, speed: float = 1.0, max_gap: Optional[float] = None, version: int = 2) -> Dict[str, Any]:
+    """Play ``speed`` times faster, first capping every pause at ``max_gap`` seconds."""
+    if speed <= 0:
+        raise ValueError("speed must be positive")
+    return _rewrite(src, dst, version, _retimed(iter_chunks(src), speed, max_gap))
+
+
+def merge_files(srcs: Sequence[str], dst: str, gap: float = 1.0, version: int = 2) -> Dict[str, Any]:
+    """Concatenate recordings in order, each starting ``gap`` seconds after
+    the previous one ends."""
+    for src in srcs:
+        _check_paths(src, dst)
+    with ChunkWriter(dst, version) as w:
+        end: Optional[float] = None
+        for src in srcs:
+            shift = None
+            for cols in iter_chunks(src):
+                if not len(cols):
+                    continue
+                t = np.asarray(cols.t, dtype=np.float64)
+                if shift is None:
+                    shift = 0.0 if end is None else end + gap - float(t[0])
+                out = t + shift
+                end = float(out[-1])
+                w.write(_take(cols, slice(None), out))
+    summary = w.stats.summary()
+    summary["sources"] = list(srcs)
+    return summary
+
+
+# -- batches --------------------------------------------------------------------
+def find_recordings(paths: Iterable[str], patterns: Sequence[str] = RECORDING_PATTERNS) -> List[str]:
+    """Expand directories in ``paths`` to the recordings they contain (sorted).
+
+    Summary indexes (``INDEX_NAME``) found in directories are skipped.
+    """
+    found: List[str] = []
+    for p in paths:
+        if os.path.isdir(p):
+            for root, _, files in os.walk(p):
+                found.extend(
+                    os.path.join(root, name) for name in sorted(files)
+                    if name != INDEX_NAME and any(fnmatch.fnmatch(name, pat) for pat in patterns)
+                )
+        else:
+            found.append(p)
+    return found
+
+
+def _guarded(func: Callable[..., Dict[str, Any]], path: str, *args: Any) -> Dict[str, Any]:
+    try:
+        return func(path, *args)
+    except Exception as e:
+        return {"path": path, "error": f"{type(e).__name__}: {e}"}
+
+
+def run_batch(
+    func: Callable[..., Dict[str, Any]],
+    paths: Sequence[str],
+    jobs: Optional[int] = None,
+    dst: Optional[Callable[[str], str]] = None,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+    **kwargs: Any,
+) -> List[Dict[str, Any]]:
+    """Run ``func(path[, dst(path)], **kwargs)`` for every path over a process pool.
+
+    ``func`` must be a module-level function so it can be pickled. A file
+    that fails yields ``{"path", "error"}`` instead of stopping the batch.
+    Results keep the input order. ``jobs=1`` runs in this process.
+    """
+    work = partial(_guarded, partial(func, **kwargs))
+    args = [(p, dst(p)) if dst is not None else (p,) for p in paths]
+    results: List[Dict[str, Any]] = []
+    if jobs == 1 or len(args) <= 1:
+        for a in args:
+            results.append(work(*a))
+            if on_result:
+                on_result(results[-1])
+        return results
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        chunksize = max(1, len(args) // ((jobs or os.cpu_count() or 1) * 4))
+        for r in pool.map(work, *zip(*args), chunksize=chunksize):
+            results.append(r)
+            if on_result:
+                on_result(r)
+    return results
+
+
+def write_index(path: str, command: str, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Write a JSON index of per-file ``results`` with corpus totals."""
+    ok = [r for r in results if "error" not in r]
+    types: Dict[str, int] = {}
+    for r in ok:
+        for name, c in r["types"].items():
+            types[name] = types.get(name, 0) + c
+    doc = {
+        "command": command,
+        "generated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "totals": {
+            "files": len(results),
+            "errors": len(results) - len(ok),
+            "events": sum(r["events"] for r in ok),
+            "types": types,
+            "duration_s": round(sum(r["duration_s"] for r in ok), 3),
+            "clicks": sum(r["clicks"] for r in ok),
+            "travel_px": round(sum(r["travel_px"] for r in ok), 1),
+        },
+        "files": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2, ensure_ascii=False)
+    return doc
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Generic, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+Signature = Tuple[int, int]
+
+
+def file_signature(path: str) -> Signature:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    reloads: int = 0
+    last_load_seconds: float = 0.0
+    total_load_seconds: float = 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"hits={self.hits} misses={self.misses} reloads={self.reloads} "
+            f"last_load={self.last_load_seconds * 1e3:.2f}ms total_load={self.total_load_seconds * 1e3:.2f}ms"
+        )
+
+
+class RecordingCache(Generic[T]):
+    """Caches whatever ``build(path)`` makes of a recording file.
+
+    Entries are keyed on the path and validated against the file's mtime and
+    size, so an unchanged file is never re-read or re-decoded. ``reload``
+    forces a rebuild; ``watch`` starts a polling thread that rebuilds as soon
+    as the file changes, keeping the load off the playback path.
+    ``on_reload(path, value)`` is called after every (re)build.
+    """
+
+    def __init__(self, build: Callable[[str], T], on_reload: Optional[Callable[[str, T], None]] = None) -> None:
+        self._build = build
+        self._on_reload = on_reload
+        self._entries: Dict[str, Tuple[Signature, T]] = {}
+        self._lock = threading.RLock()
+        self._watchers: Dict[str, threading.Event] = {}
+        self.stats = CacheStats()
+
+    def get(self, path: str) -> T:
+        sig = file_signature(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == sig:
+                self.stats.hits += 1
+                return entry[1]
+            self.stats.misses += 1
+            return self._load(path, sig)
+
+    def reload(self, path: str) -> T:
+        """Rebuild ``path`` now, whether or not it changed."""
+        with self._lock:
+            return self._load(path, file_signature(path))
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(path, None)
+
+    def _load(self, path: str, sig: Signature) -> T:
+        t0 = time.perf_counter()
+        value = self._build(path)
+        elapsed = time.perf_counter() - t0
+        reloaded = path in self._entries
+        self._entries[path] = (sig, value)
+        st = self.stats
+        st.last_load_seconds = elapsed
+        st.total_load_seconds += elapsed
+        if reloaded:
+            st.reloads += 1
+        if self._on_reload:
+            self._on_reload(path, value)
+        return value
+
+    def watch(self, path: str, interval: float = 1.0) -> None:
+        """Poll ``path`` every ``interval`` seconds and rebuild on change."""
+        if path in self._watchers:
+            return
+        stop = threading.Event()
+        self._watchers[path] = stop
+
+        def run() -> None:
+            while not stop.wait(interval):
+                try:
+                    sig = file_signature(path)
+                except OSError:
+                    continue
+                with self._lock:
+                    entry = self._entries.get(path)
+                    if entry is None or entry[0] != sig:
+                        try:
+                            self._load(path, sig)
+                        except Exception:
+                            pass
+
+        threading.Thread(target=run, name=f"watch:{os.path.basename(path)}", daemon=True).start()
+
+    def unwatch(self, path: Optional[str] = None) -> None:
+        for p in [path] if path is not None else list(self._watchers):
+            stop = self._watchers.pop(p, None)
+            if stop is not None:
+                stop.set()
@@ -0,0 +1,257 @@
+"""Version-2 recording format: a compact, memory-mappable column store.
+
+Layout (little-endian)::
+
+    header  magic(8) version(u32) flags(u32) count(u64) keys_len(u64)
+    t       float64[count]
+    x, y    int32[count] each
+    dx, dy  int32[count] each
+    key     int32[count]      index into the key table, -1 for none
+    type    uint8[count]      code from TYPE_NAMES
+    pad     to 8 bytes
+    keys    UTF-8 JSON list of interned key names (keys_len bytes)
+
+Missing coordinates are stored as ``MISSING``. Version-1 files (indented
+JSON written by older builds) are detected and converted on load.
+
+Files written while recording (``FLAG_STREAM``) have ``count == 0`` and a
+body made of self-contained segments, each appended in one write::
+
+    segment  magic(4) count(u32) keys_len(u32) crc32(u32)
+             columns as above for ``count`` events, padded to 8 bytes
+             UTF-8 JSON list of keys first seen in this segment, padded
+
+Key indices are global across segments. A torn or corrupt trailing segment
+(e.g. after a crash) is dropped on load; everything before it is kept.
+"""
+from __future__ import annotations
+
+import json
+import os
+import struct
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from .events import TYPE_CODES, TYPE_NAMES, RecordedEvent
+
+MAGIC = b"GCAKEREC"
+VERSION = 2
+HEADER = struct.Struct("<8sIIQQ")
+MISSING = int(np.iinfo(np.int32).min)
+FLAG_STREAM = 1
+SEGMENT = struct.Struct("<4sIII")
+SEGMENT_MAGIC = b"GSEG"
+
+_INT_COLUMNS = ("x", "y", "dx", "dy", "key")
+
+
+def _opt(v: int) -> Optional[int]:
+    return None if v == MISSING else v
+
+
+class EventColumns:
+    """A recording held as parallel NumPy columns.
+
+    ``type`` holds integer codes (see ``TYPE_NAMES``) and ``key`` indexes into
+    ``keys``. Arrays may be read-only views over a memory-mapped file; no
+    per-event objects exist until ``event(i)`` or iteration asks for them.
+    """
+
+    def __init__(
+        self,
+        t: np.ndarray,
+        type: np.ndarray,
+        x: np.ndarray,
+        y: np.ndarray,
+        dx: np.ndarray,
+        dy: np.ndarray,
+        key: np.ndarray,
+        keys: List[str],
+    ) -> None:
+        self.t = t
+        self.type = type
+        self.x = x
+        self.y = y
+        self.dx = dx
+        self.dy = dy
+        self.key = key
+        self.keys = keys
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    def __iter__(self) -> Iterator[RecordedEvent]:
+        for i in range(len(self)):
+            yield self.event(i)
+
+    @property
+    def duration(self) -> float:
+        return float(self.t[-1] - self.t[0]) if len(self) else 0.0
+
+    def key_name(self, i: int) -> Optional[str]:
+        k = int(self.key[i])
+        return self.keys[k] if k >= 0 else None
+
+    def event(self, i: int) -> RecordedEvent:
+        return RecordedEvent(
+            t=float(self.t[i]),
+            type=int(self.type[i]),
+            x=_opt(int(self.x[i])), y=_opt(int(self.y[i])),
+            dx=_opt(int(self.dx[i])), dy=_opt(int(self.dy[i])),
+            key=self.key_name(i),
+        )
+
+    def to_events(self) -> List[RecordedEvent]:
+        return list(self)
+
+    @classmethod
+    def empty(cls) -> "EventColumns":
+        return cls.from_events([])
+
+    @classmethod
+    def from_events(cls, events: Iterable[Any], key_index: Optional[Dict[str, int]] = None) -> "EventColumns":
+        """Build columns from ``RecordedEvent`` objects or v1-style dicts.
+
+        Pass ``key_index`` to intern keys into a table shared across calls;
+        new keys are added to it and ``keys`` is the whole table.
+        """
+        if key_index is None:
+            key_index = {}
+        keys: List[str] = list(key_index)
+        t: List[float] = []
+        codes: List[int] = []
+        ints: Dict[str, List[int]] = {name: [] for name in _INT_COLUMNS}
+        xs, ys, dxs, dys = (ints[name] for name in ("x", "y", "dx", "dy"))
+        for e in events:
+            if isinstance(e, RecordedEvent):
+                et, code, k = e.t, e.code, e.key
+                vals = (e.x, e.y, e.dx, e.dy)
+            else:
+                get = e.get if isinstance(e, dict) else lambda name, d=None, e=e: getattr(e, name, d)
+                et, code, k = get('t', 0), TYPE_CODES[get('type')], get('key')
+                vals = (get('x'), get('y'), get('dx'), get('dy'))
+            t.append(float(et or 0))
+            codes.append(code)
+            for col, v in zip((xs, ys, dxs, dys), vals):
+                col.append(MISSING if v is None else int(v))
+            if k is None:
+                ints["key"].append(-1)
+            else:
+                k = str(k)
+                idx = key_index.get(k)
+                if idx is None:
+                    idx = key_index[k] = len(keys)
+                    keys.append(k)
+                ints["key"].append(idx)
+        return cls(
+            np.asarray(t, dtype="<f8"),
+            np.asarray(codes, dtype=np.uint8),
+            *(np.asarray(ints[name], dtype="<i4") for name in _INT_COLUMNS),
+            keys=keys,
+        )
+
+
+def _column_bytes(cols: EventColumns) -> bytes:
+    parts = [np.ascontiguousarray(cols.t, dtype="<f8").tobytes()]
+    for name in _INT_COLUMNS:
+        parts.append(np.ascontiguousarray(getattr(cols, name), dtype="<i4").tobytes())
+    parts.append(np.ascontiguousarray(cols.type, dtype=np.uint8).tobytes())
+    parts.append(b"\0" * (-len(cols) % 8))
+    return b"".join(parts)
+
+
+def _split_columns(raw: np.ndarray, off: int, n: int):
+    t = raw[off:off + 8 * n].view("<f8")
+    off += 8 * n
+    ints = []
+    for _ in _INT_COLUMNS:
+        ints.append(raw[off:off + 4 * n].view("<i4"))
+        off += 4 * n
+    codes = raw[off:off + n]
+    return t, codes, ints, off + n + (-n % 8)
+
+
+def write_columns(path: str, cols: EventColumns) -> None:
+    """Write ``cols`` to ``path`` in the version-2 format."""
+    keys_blob = json.dumps(cols.keys, ensure_ascii=False).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(cols), len(keys_blob)))
+        f.write(_column_bytes(cols))
+        f.write(keys_blob)
+
+
+def stream_header() -> bytes:
+    return HEADER.pack(MAGIC, VERSION, FLAG_STREAM, 0, 0)
+
+
+def encode_segment(cols: EventColumns, new_keys: List[str]) -> bytes:
+    """Encode one append-only segment of a streamed recording."""
+    keys_blob = json.dumps(new_keys, ensure_ascii=False).encode("utf-8") if new_keys else b""
+    payload = _column_bytes(cols) + keys_blob + b"\0" * (-len(keys_blob) % 8)
+    return SEGMENT.pack(SEGMENT_MAGIC, len(cols), len(keys_blob), zlib.crc32(payload)) + payload
+
+
+def _read_segments(raw: np.ndarray) -> EventColumns:
+    parts = []
+    keys: List[str] = []
+    off = HEADER.size
+    end = len(raw)
+    while off + SEGMENT.size <= end:
+        magic, n, keys_len, crc = SEGMENT.unpack_from(raw[off:off + SEGMENT.size].tobytes())
+        body = off + SEGMENT.size
+        size = 29 * n + (-n % 8) + keys_len + (-keys_len % 8)
+        if magic != SEGMENT_MAGIC or body + size > end:
+            break
+        if zlib.crc32(raw[body:body + size]) != crc:
+            break
+        t, codes, ints, koff = _split_columns(raw, body, n)
+        if keys_len:
+            keys.extend(json.loads(raw[koff:koff + keys_len].tobytes().decode("utf-8")))
+        parts.append((t, codes, ints))
+        off = body + size
+    if not parts:
+        return EventColumns.empty()
+    return EventColumns(
+        np.concatenate([p[0] for p in parts]),
+        np.concatenate([p[1] for p in parts]),
+        *(np.concatenate([p[2][i] for p in parts]) for i in range(len(_INT_COLUMNS))),
+        keys=keys,
+    )
+
+
+def is_columnar(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def read_columns(path: str, mmap: bool = True) -> EventColumns:
+    """Load a recording of either version as ``EventColumns``.
+
+    Version-2 files are memory-mapped by default (columns are read-only views
+    into the file); pass ``mmap=False`` to read them into private memory, e.g.
+    when the file is about to be overwritten. Version-1 JSON is parsed and
+    converted. Streamed files are read segment by segment, stopping at the
+    first incomplete one, so a recording cut short by a crash still loads.
+    """
+    if not is_columnar(path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return EventColumns.from_events(data.get("events", []))
+
+    if mmap and os.path.getsize(path) > HEADER.size:
+        raw = np.memmap(path, dtype=np.uint8, mode="r")
+    else:
+        raw = np.fromfile(path, dtype=np.uint8)
+    magic, version, flags, n, keys_len = HEADER.unpack_from(raw[:HEADER.size].tobytes())
+    if version != VERSION:
+        raise ValueError(f"Unsupported recording version: {version}")
+    if flags & FLAG_STREAM:
+        return _read_segments(raw)
+    t, codes, ints, off = _split_columns(raw, HEADER.size, n)
+    blob = raw[off:off + keys_len].tobytes()
+    if len(t) != n or len(codes) != n or len(blob) != keys_len:
+        raise ValueError(f"Truncated recording: {path}")
+    keys = json.loads(blob.decode("utf-8")) if keys_len else []
+    return EventColumns(t, codes, *ints, keys=keys)
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import collections
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Deque, Optional, Tuple
+
+from .events import TYPE_CODES, RecordedEvent
+
+POLICIES = ("drop", "block", "coalesce")
+
+_MOVE = TYPE_CODES["move"]
+
+
+@dataclass
+class DispatchStats:
+    """Counters of an ``EventDispatcher`` (safe to read from any thread)."""
+
+    submitted: int = 0
+    delivered: int = 0
+    dropped: int = 0
+    coalesced: int = 0
+    # Listener-thread time spent waiting for room ('block' policy)
+    blocked_seconds: float = 0.0
+    depth: int = 0
+    max_depth: int = 0
+    # Time from hand-off to the start of the callback
+    last_latency: float = 0.0
+    max_latency: float = 0.0
+    total_latency: float = 0.0
+    # Time spent inside the callback
+    callback_seconds: float = 0.0
+    errors: int = 0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.delivered if self.delivered else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"delivered={self.delivered}/{self.submitted} dropped={self.dropped} coalesced={self.coalesced} "
+            f"max_depth={self.max_depth} latency mean={self.mean_latency * 1e3:.2f}ms "
+            f"max={self.max_latency * 1e3:.2f}ms callbacks={self.callback_seconds * 1e3:.1f}ms "
+            f"blocked={self.blocked_seconds * 1e3:.1f}ms errors={self.errors}"
+        )
+
+
+class EventDispatcher:
+    """Runs an ``on_event`` callback on its own thread, off the input hooks.
+
+    ``submit`` hands an event over through a bounded queue of ``maxsize``
+    and returns at once, so a slow observer can never delay the OS hook or
+    skew timestamps. When the queue is full, ``policy`` decides:
+    ``drop`` discards the new event, ``block`` waits for room (use only when
+    every event must be seen), and ``coalesce`` drops it too, except that a
+    move arriving right behind a still-queued move always replaces it (full
+    or not), so observers see the latest position without a backlog.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[RecordedEvent], None],
+        maxsize: int = 1024,
+        policy: str = "drop",
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown dispatch policy: {policy!r} (choose from {', '.join(POLICIES)})")
+        self._callback = callback
+        self.maxsize = maxsize
+        self.policy = policy
+        self._clock = clock
+        self._queue: Deque[Tuple[RecordedEvent, float]] = collections.deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.stats = DispatchStats()
+        self._thread = threading.Thread(target=self._run, name="on_event", daemon=True)
+        self._thread.start()
+
+    def submit(self, ev: RecordedEvent) -> None:
+        st = self.stats
+        q = self._queue
+        with self._cond:
+            st.submitted += 1
+            if self.policy == "coalesce" and ev.code == _MOVE and q and q[-1][0].code == _MOVE:
+                q[-1] = (ev, q[-1][1])
+                st.coalesced += 1
+                return
+            if len(q) >= self.maxsize:
+                if self.policy == "block":
+                    t0 = self._clock()
+                    while len(q) >= self.maxsize and not self._closed:
+                        self._cond.wait()
+                    st.blocked_seconds += self._clock() - t0
+                else:
+                    st.dropped += 1
+                    return
+            q.append((ev, self._clock()))
+            st.depth = len(q)
+            if st.depth > st.max_depth:
+                st.max_depth = st.depth
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        st = self.stats
+        q = self._queue
+        clock = self._clock
+        while True:
+            with self._cond:
+                while not q and not self._closed:
+                    self._cond.wait()
+                if not q:
+                    return
+                ev, queued = q.popleft()
+                st.depth = len(q)
+                # Wake a blocked submitter
+                self._cond.notify_all()
+            start = clock()
+            try:
+                self._callback(ev)
+            except Exception:
+                st.errors += 1
+            end = clock()
+            latency = start - queued
+            st.delivered += 1
+            st.last_latency = latency
+            st.total_latency += latency
+            if latency > st.max_latency:
+                st.max_latency = latency
+            st.callback_seconds += end - start
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Deliver what is queued (up to ``timeout``), then stop the thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import sys
+from typing import Any, Dict, Literal, Optional, Tuple, Union
+
+EventType = Literal[
+    "move", "left_down", "left_up", "right_down", "right_up",
+    "scroll", "key_down", "key_up"
+]
+
+# Integer codes used by the columnar file format (order is part of the format).
+TYPE_NAMES: Tuple[str, ...] = (
+    "move", "left_down", "left_up", "right_down", "right_up",
+    "scroll", "key_down", "key_up",
+)
+TYPE_CODES: Dict[str, int] = {name: code for code, name in enumerate(TYPE_NAMES)}
+
+
+class RecordedEvent:
+    """One recorded input event.
+
+    A slotted record rather than a dataclass: the type is held as its integer
+    code (see ``TYPE_NAMES``) and key names are interned, so events kept in
+    memory cost a fraction of what a per-instance ``__dict__`` would. The
+    same objects are produced by the recorder, by ``EventColumns.event`` and
+    by loading, and go straight back into ``EventColumns.from_events``.
+
+    ``type`` reads and accepts the name; ``code`` is the integer.
+    """
+
+    __slots__ = ("t", "code", "x", "y", "dx", "dy", "key")
+
+    FIELDS = ("t", "type", "x", "y", "dx", "dy", "key")
+
+    def __init__(
+        self,
+        t: float,
+        type: Union[EventType, int],
+        x: Optional[int] = None,
+        y: Optional[int] = None,
+        dx: Optional[int] = None,
+        dy: Optional[int] = None,
+        key: Optional[str] = None,
+    ) -> None:
+        self.t = t
+        self.code = type if isinstance(type, int) else TYPE_CODES[type]
+        self.x = x
+        self.y = y
+        self.dx = dx
+        self.dy = dy
+        self.key = None if key is None else sys.intern(str(key))
+
+    @property
+    def type(self) -> EventType:
+        return TYPE_NAMES[self.code]  # type: ignore[return-value]
+
+    @type.setter
+    def type(self, value: Union[EventType, int]) -> None:
+        self.code = value if isinstance(value, int) else TYPE_CODES[value]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The version-1 JSON form of this event."""
+        return {
+            "t": self.t, "type": TYPE_NAMES[self.code],
+            "x": self.x, "y": self.y, "dx": self.dx, "dy": self.dy, "key": self.key,
+        }
+
+    def _astuple(self) -> tuple:
+        return (self.t, self.code, self.x, self.y, self.dx, self.dy, self.key)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, RecordedEvent):
+            return NotImplemented
+        return self._astuple() == other._astuple()
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return (
+            f"RecordedEvent(t={self.t!r}, type={TYPE_NAMES[self.code]!r}, x={self.x!r}, y={self.y!r}, "
+            f"dx={self.dx!r}, dy={self.dy!r}, key={self.key!r})"
+        )
@@ -1,45 +1,111 @@
 from __future__ import annotations
 
 import json
+import threading
 import time
-from dataclasses import dataclass, asdict
-from typing import Any, Dict, List, Literal, Optional, Set, Callable
+from typing import TYPE_CHECKING, List, Optional, Set, Callable
 
-from pynput import mouse as pmouse
-from pynput import keyboard as pkeyboard
+from .. import profiling
+from .columnar import EventColumns, read_columns, write_columns
+from .dispatch import POLICIES as DISPATCH_POLICIES
+from .dispatch import DispatchStats, EventDispatcher
+from .events import EventType, RecordedEvent
+from .ring import RingBuffer
+from .simplify import MoveSimplifier
+from .stream import StreamWriter, compact
 
-EventType = Literal[
-    "move", "left_down", "left_up", "right_down", "right_up",
-    "scroll", "key_down", "key_up"
-]
+if TYPE_CHECKING:
+    from pynput import keyboard as pkeyboard
+    from pynput import mouse as pmouse
 
 
-@dataclass
-class RecordedEvent:
-    t: float
-    type: EventType
-    x: Optional[int] = None
-    y: Optional[int] = None
-    dx: Optional[int] = None
-    dy: Optional[int] = None
-    key: Optional[str] = None
+class InputRecorder:
+    """Records mouse and keyboard input via pynput listeners.
 
+    By default events are kept in memory until ``save``. With
+    ``stream_to=path`` they are appended to ``path`` in batches while
+    recording instead (see ``StreamWriter``), so memory stays flat and a
+    crash loses at most the last unflushed batch.
 
-class InputRecorder:
+    With ``ring=RingBuffer(seconds=...)`` only the most recent window is
+    kept, in fixed memory, and ``snapshot(path)`` saves it at any time
+    without stopping the listeners.
+
+    ``simplify`` (see ``recording.simplify``) thins out recorded moves to the
+    points needed to rebuild the path within a tolerance.
 
-    def __init__(self, *, record_moves: bool = True, ignored_keys: Optional[Set[str]] = None, on_event: Optional[Callable[[RecordedEvent], None]] = None) -> None:
+    ``on_event`` never runs on the listener threads: events are stamped and
+    stored first, then handed to an ``EventDispatcher`` thread through a
+    queue of ``on_event_queue`` events, with ``on_event_policy`` ('drop',
+    'block' or 'coalesce') deciding what happens when the observer falls
+    behind. See ``dispatch_stats``.
+    """
+
+    def __init__(
+        self,
+        *,
+        record_moves: bool = True,
+        ignored_keys: Optional[Set[str]] = None,
+        on_event: Optional[Callable[[RecordedEvent], None]] = None,
+        stream_to: Optional[str] = None,
+        simplify: Optional[MoveSimplifier] = None,
+        ring: Optional[RingBuffer] = None,
+        on_event_queue: int = 1024,
+        on_event_policy: str = "drop",
+    ) -> None:
+        if ring is not None and stream_to:
+            raise ValueError("stream_to and ring are mutually exclusive")
         self._start: Optional[float] = None
         self._events: List[RecordedEvent] = []
-        self._mouse_listener: Optional[pmouse.Listener] = None
-        self._keyboard_listener: Optional[pkeyboard.Listener] = None
+        self._stream_to = stream_to
+        self._writer: Optional[StreamWriter] = None
+        self._count = 0
+        # _store runs on both listener threads
+        self._count_lock = threading.Lock()
+        self._ring = ring
+        self._sink: Callable[[RecordedEvent], None] = ring.push if ring is not None else self._events.append
+        self._simplifier = simplify
+        self._simplify_lock = threading.Lock()
+        self._mouse_listener: "Optional[pmouse.Listener]" = None
+        self._keyboard_listener: "Optional[pkeyboard.Listener]" = None
         self._record_moves = record_moves
         self._ignored_keys = {k.lower() for k in (ignored_keys or set())}
+        if on_event_policy not in DISPATCH_POLICIES:
+            raise ValueError(
+                f"Unknown dispatch policy: {on_event_policy!r} (choose from {', '.join(DISPATCH_POLICIES)})"
+            )
         self._on_event = on_event
+        self._on_event_queue = on_event_queue
+        self._on_event_policy = on_event_policy
+        self._dispatcher: Optional[EventDispatcher] = None
+        self._dispatch_stats = DispatchStats()
 
     def start(self) -> None:
         if self._start is not None:
             return
+        # Imported here: pynput hooks the display as soon as it is imported,
+        # and loading or saving recordings does not need it
+        from pynput import keyboard as pkeyboard
+        from pynput import mouse as pmouse
+
         self._events.clear()
+        self._count = 0
+        if self._stream_to:
+            self._writer = StreamWriter(self._stream_to)
+        if self._ring is not None:
+            self._ring.clear()
+            self._sink = self._ring.push
+        else:
+            self._sink = self._writer.push if self._writer else self._events.append
+        self._sink = profiling.wrap("recorder.store", self._sink)
+        if self._on_event is not None:
+            on_event = profiling.wrap("recorder.on_event", self._on_event)
+            self._dispatcher = EventDispatcher(on_event, self._on_event_queue, self._on_event_policy)
+            self._dispatch_stats = self._dispatcher.stats
+        simplifier = self._simplifier
+        if simplifier:
+            simplifier.reset()
+        lock = self._simplify_lock
         self._start = time.perf_counter()
 
         def now() -> float:
@@ -47,16 +113,25 @@ class InputRecorder:
             return time.perf_counter() - self._start
 
         def _emit(ev: RecordedEvent):
-            self._events.append(ev)
-            if self._on_event:
-                try:
-                    self._on_event(ev)
-                except Exception:
-                    pass
+            if simplifier is None:
+                self._store(ev)
+                return
+            # Pending simplified moves precede this event in time
+            with lock:
+                for m in simplifier.flush():
+                    self._store(m)
+                self._store(ev)
 
         def on_move(x, y):
-            if self._record_moves:
-                _emit(RecordedEvent(now(), "move", x=int(x), y=int(y)))
+            if not self._record_moves:
+                return
+            ev = RecordedEvent(now(), "move", x=int(x), y=int(y))
+            if simplifier is None:
+                self._store(ev)
+                return
+            with lock:
+                for m in simplifier.feed(ev):
+                    self._store(m)
 
         def on_click(x, y, button, pressed):
             if button == pmouse.Button.left:
@@ -102,25 +177,89 @@ class InputRecorder:
             self._keyboard_listener.stop()
             self._keyboard_listener = None
         self._start = None
+        if self._simplifier:
+            with self._simplify_lock:
+                for m in self._simplifier.flush():
+                    self._store(m)
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+        if self._dispatcher:
+            self._dispatcher.close()
+            self._dispatcher = None
+        if self._ring is not None:
+            return self._ring.columns().to_events()
         return list(self._events)
 
-    def save(self, path: str) -> None:
-        data = [asdict(e) for e in self._events]
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump({"events": data, "version": 1}, f, ensure_ascii=False, indent=2)
+    def _store(self, ev: RecordedEvent) -> None:
+        self._sink(ev)
+        with self._count_lock:
+            self._count += 1
+        # stop() may clear the dispatcher while a listener is still storing
+        dispatcher = self._dispatcher
+        if dispatcher is not None:
+            dispatcher.submit(ev)
+
+    @property
+    def count(self) -> int:
+        """Number of events captured by the current/last recording."""
+        return self._count
+
+    @property
+    def dispatch_stats(self) -> DispatchStats:
+        """Queue depth, drops and callback latency of ``on_event`` delivery."""
+        return self._dispatch_stats
+
+    @property
+    def ring(self) -> Optional[RingBuffer]:
+        return self._ring
+
+    def snapshot(self, path: str) -> int:
+        """Save the ring buffer's current window to ``path`` while recording
+        continues; returns the number of events written."""
+        if self._ring is None:
+            raise ValueError("snapshot() needs a recorder created with ring=RingBuffer(...)")
+        if self._simplifier:
+            # Pending simplified moves belong in the window
+            with self._simplify_lock:
+                for m in self._simplifier.flush():
+                    self._store(m)
+        return self._ring.snapshot(path)
+
+    def save(self, path: str, version: int = 2) -> None:
+        """Write the recording; version 2 is columnar binary, 1 is legacy JSON.
+
+        In streaming mode the stream file is compacted into ``path`` (call
+        ``stop`` first); in ring mode the current window is written.
+        """
+        if self._writer is not None:
+            raise RuntimeError(
+                f"save() while streaming to {self._stream_to}: stop() the recording first "
+                "(the stream file is already being written)"
+            )
+        events = self._events
+        if self._ring is not None:
+            if version != 1:
+                self.snapshot(path)
+                return
+            events = self._ring.columns().to_events()
+        elif self._stream_to and self._writer is None:
+            if version != 1:
+                compact(self._stream_to, path)
+                return
+            events = read_columns(self._stream_to, mmap=False).to_events()
+        if version == 1:
+            data = [e.to_dict() for e in events]
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({"events": data, "version": 1}, f, ensure_ascii=False, indent=2)
+        else:
+            write_columns(path, EventColumns.from_events(events))
 
     @staticmethod
     def load(path: str) -> List[RecordedEvent]:
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        events = data.get("events", [])
-        out: List[RecordedEvent] = []
-        for e in events:
-            out.append(RecordedEvent(
-                t=float(e.get('t', 0)),
-                type=e.get('type'),
-                x=e.get('x'), y=e.get('y'),
-                dx=e.get('dx'), dy=e.get('dy'),
-                key=e.get('key'),
-            ))
-        return out
+        return read_columns(path, mmap=False).to_events()
+
+    @staticmethod
+    def load_columns(path: str, mmap: bool = True) -> EventColumns:
+        """Load a recording (either version) as columns, without per-event objects."""
+        return read_columns(path, mmap=mmap)
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .columnar import MISSING, EventColumns, write_columns
+from .events import RecordedEvent
+
+# Events per second assumed when only a time window is given. Raw mouse
+# moves arrive at up to ~250 Hz on common hardware; simplified recordings
+# need far fewer.
+DEFAULT_EVENT_RATE = 250
+
+
+class RingBuffer:
+    """Fixed-memory store for the most recent events of a recording.
+
+    Columns are preallocated NumPy arrays of ``max_events`` slots that are
+    overwritten in a circle, so a recorder can run indefinitely. With
+    ``seconds`` only events from the last ``seconds`` (relative to the newest
+    event) are part of the window; ``max_events`` then defaults to
+    ``seconds * DEFAULT_EVENT_RATE``.
+
+    When the buffer is full, the oldest slot is overwritten, or, with
+    ``overwrite=False``, the new event is dropped. ``overwritten`` counts
+    events lost while still inside the time window (i.e. the buffer was too
+    small for it) and ``dropped`` counts rejected events.
+    """
+
+    def __init__(
+        self,
+        seconds: Optional[float] = None,
+        max_events: Optional[int] = None,
+        overwrite: bool = True,
+    ) -> None:
+        if max_events is None:
+            if seconds is None:
+                raise ValueError("RingBuffer needs seconds and/or max_events")
+            max_events = max(1, int(seconds * DEFAULT_EVENT_RATE))
+        if max_events <= 0:
+            raise ValueError("max_events must be positive")
+        self.seconds = seconds
+        self.capacity = max_events
+        self.overwrite = overwrite
+        n = max_events
+        self._t = np.zeros(n, dtype="<f8")
+        self._type = np.zeros(n, dtype=np.uint8)
+        self._x = np.zeros(n, dtype="<i4")
+        self._y = np.zeros(n, dtype="<i4")
+        self._dx = np.zeros(n, dtype="<i4")
+        self._dy = np.zeros(n, dtype="<i4")
+        self._key = np.zeros(n, dtype="<i4")
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._head = 0  # next slot to write
+            self._size = 0
+            self._keys: List[str] = []
+            self._key_index: Dict[str, int] = {}
+            self.total = 0
+            self.overwritten = 0
+            self.dropped = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, ev: RecordedEvent) -> None:
+        with self._lock:
+            key = -1
+            if ev.key is not None:
+                k = str(ev.key)
+                key = self._key_index.get(k, -1)
+                if key < 0:
+                    key = self._key_index[k] = len(self._keys)
+                    self._keys.append(k)
+            self.total += 1
+            i = self._head
+            if self._size == self.capacity:
+                if not self.overwrite:
+                    self.dropped += 1
+                    return
+                if self.seconds is None or self._t[i] >= ev.t - self.seconds:
+                    self.overwritten += 1
+            else:
+                self._size += 1
+            self._t[i] = ev.t
+            self._type[i] = ev.code
+            self._x[i] = MISSING if ev.x is None else ev.x
+            self._y[i] = MISSING if ev.y is None else ev.y
+            self._dx[i] = MISSING if ev.dx is None else ev.dx
+            self._dy[i] = MISSING if ev.dy is None else ev.dy
+            self._key[i] = key
+            self._head = (i + 1) % self.capacity
+
+    def columns(self) -> EventColumns:
+        """Copy of the current window, oldest event first."""
+        with self._lock:
+            n, head = self._size, self._head
+            start = (head - n) % self.capacity
+            order = (start + np.arange(n)) % self.capacity
+            cols = [c[order] for c in (self._t, self._type, self._x, self._y, self._dx, self._dy, self._key)]
+            keys = list(self._keys)
+        t = cols[0]
+        if self.seconds is not None and n:
+            first = int(np.searchsorted(t, t[-1] - self.seconds, side="left"))
+            cols = [c[first:] for c in cols]
+        return EventColumns(*cols, keys=keys)
+
+    def snapshot(self, path: str) -> int:
+        """Write the current window to ``path`` (version 2); returns the event count.
+
+        Only the copy holds the lock, so recording continues while the file
+        is written. The file is written next to ``path`` and renamed over it,
+        so a reader never sees a partial snapshot.
+        """
+        cols = self.columns()
+        tmp = path + ".tmp"
+        write_columns(tmp, cols)
+        os.replace(tmp, path)
+        return len(cols)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "events": self._size,
+            "capacity": self.capacity,
+            "total": self.total,
+            "overwritten": self.overwritten,
+            "dropped": self.dropped,
+        }
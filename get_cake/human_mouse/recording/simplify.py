@@ -0,0 +1,172 @@
+"""Online simplification of recorded mouse moves.
+
+pynput reports hundreds of moves per second, almost all of them on smooth
+curves. A simplifier sits between the listener and the recorder's storage
+and keeps only the points needed to rebuild the path by linear
+interpolation. Every other event type passes through untouched; before one
+is stored the simplifier is flushed, so the output stays in time order.
+"""
+from __future__ import annotations
+
+import math
+from typing import List, Optional
+
+import numpy as np
+
+from .events import RecordedEvent
+
+
+class MoveSimplifier:
+    """Base class: ``feed`` a move, get back the moves that are now final."""
+
+    def reset(self) -> None:
+        pass
+
+    def feed(self, ev: RecordedEvent) -> List[RecordedEvent]:
+        return [ev]
+
+    def flush(self) -> List[RecordedEvent]:
+        return []
+
+
+class GateSimplifier(MoveSimplifier):
+    """Keep a move only once it is ``min_distance`` px and ``min_interval``
+    seconds away from the last kept one. The most recent dropped move is held
+    back and emitted on ``flush``, so resting positions are never lost.
+    """
+
+    def __init__(self, min_distance: float = 3.0, min_interval: float = 0.01) -> None:
+        self.min_distance = min_distance
+        self.min_interval = min_interval
+        self.reset()
+
+    def reset(self) -> None:
+        self._last: Optional[RecordedEvent] = None
+        self._pending: Optional[RecordedEvent] = None
+
+    def feed(self, ev: RecordedEvent) -> List[RecordedEvent]:
+        last = self._last
+        if (
+            last is None
+            or (
+                math.hypot(ev.x - last.x, ev.y - last.y) >= self.min_distance
+                and ev.t - last.t >= self.min_interval
+            )
+        ):
+            self._last = ev
+            self._pending = None
+            return [ev]
+        self._pending = ev
+        return []
+
+    def flush(self) -> List[RecordedEvent]:
+        ev = self._pending
+        if ev is None:
+            return []
+        self._last = ev
+        self._pending = None
+        return [ev]
+
+
+def rdp_keep(t: np.ndarray, x: np.ndarray, y: np.ndarray, tolerance: float) -> np.ndarray:
+    """Ramer-Douglas-Peucker on the time-synchronised distance.
+
+    A point may be dropped only if the position interpolated at its own
+    timestamp, between the surrounding kept points, is within ``tolerance``
+    px of it. This bounds both the spatial and the timing error of playback.
+    Returns a boolean keep mask; both endpoints are always kept.
+    """
+    n = len(t)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        span = t[b] - t[a]
+        if span > 0:
+            f = (t[a + 1:b] - t[a]) / span
+        else:
+            f = np.linspace(0.0, 1.0, b - a + 1)[1:-1]
+        px = x[a] + (x[b] - x[a]) * f
+        py = y[a] + (y[b] - y[a]) * f
+        d = np.hypot(x[a + 1:b] - px, y[a + 1:b] - py)
+        i = int(np.argmax(d))
+        if d[i] > tolerance:
+            k = a + 1 + i
+            keep[k] = True
+            stack.append((a, k))
+            stack.append((k, b))
+    return keep
+
+
+class RDPSimplifier(MoveSimplifier):
+    """Sliding-window RDP (see ``rdp_keep``) with a pixel ``tolerance``.
+
+    Moves are buffered until ``window`` are waiting, then simplified and the
+    survivors emitted; the last one anchors the next window. ``max_interval``
+    (seconds), if set, also keeps a point whenever kept points would
+    otherwise be further apart than that.
+    """
+
+    def __init__(self, tolerance: float = 1.5, window: int = 64, max_interval: Optional[float] = None) -> None:
+        self.tolerance = tolerance
+        self.window = max(3, int(window))
+        self.max_interval = max_interval
+        self.reset()
+
+    def reset(self) -> None:
+        self._anchor: Optional[RecordedEvent] = None
+        self._buf: List[RecordedEvent] = []
+
+    def feed(self, ev: RecordedEvent) -> List[RecordedEvent]:
+        if self._anchor is None:
+            self._anchor = ev
+            return [ev]
+        self._buf.append(ev)
+        if len(self._buf) + 1 >= self.window:
+            return self._simplify()
+        return []
+
+    def flush(self) -> List[RecordedEvent]:
+        return self._simplify() if self._buf else []
+
+    def _simplify(self) -> List[RecordedEvent]:
+        pts = [self._anchor] + self._buf
+        t = np.fromiter((e.t for e in pts), dtype=np.float64, count=len(pts))
+        x = np.fromiter((e.x for e in pts), dtype=np.float64, count=len(pts))
+        y = np.fromiter((e.y for e in pts), dtype=np.float64, count=len(pts))
+        keep = rdp_keep(t, x, y, self.tolerance)
+        if self.max_interval is not None:
+            last = 0
+            for i in range(1, len(pts)):
+                if t[i] - t[last] > self.max_interval and i - 1 > last:
+                    keep[i - 1] = True
+                    last = i - 1
+                if keep[i]:
+                    last = i
+        out = [pts[i] for i in np.flatnonzero(keep[1:]) + 1]
+        self._anchor = pts[-1]
+        self._buf = []
+        return out
+
+
+def make_simplifier(spec: Optional[str]) -> Optional[MoveSimplifier]:
+    """Build a simplifier from a CLI-style spec.
+
+    ``none`` | ``rdp[:tolerance[:window]]`` | ``gate[:min_distance[:min_interval]]``
+    """
+    if not spec or spec == "none":
+        return None
+    name, *params = spec.split(":")
+    args = [float(p) for p in params]
+    if name == "rdp":
+        if len(args) > 1:
+            args[1] = int(args[1])
+        return RDPSimplifier(*args)
+    if name == "gate":
+        return GateSimplifier(*args)
+    raise ValueError(f"Unknown simplifier: {spec!r}")
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import bisect
+from typing import Iterator, List, Optional, Union
+
+import numpy as np
+
+from .. import profiling
+from .columnar import EventColumns, read_columns
+from .events import RecordedEvent
+
+
+class EventStore:
+    """Lazy, indexed access to a recording.
+
+    Wraps ``EventColumns`` (usually memory-mapped) and never builds
+    ``RecordedEvent`` objects except on demand. Slicing with ``[a:b]`` or
+    ``window(t0, t1)`` returns another ``EventStore`` over NumPy views of the
+    same columns, so sub-ranges cost nothing to create.
+
+    ``seek(t)`` is O(log n): a sparse index of every ``stride``-th timestamp
+    picks the block, then only that block of the time column is searched.
+    The index is built once and shared by all views of a recording.
+    """
+
+    def __init__(
+        self,
+        cols: EventColumns,
+        stride: int = 1024,
+        *,
+        _lo: int = 0,
+        _hi: Optional[int] = None,
+        _index: Optional[List[float]] = None,
+    ) -> None:
+        self._base = cols
+        self._stride = stride
+        self._lo = _lo
+        self._hi = len(cols) if _hi is None else _hi
+        self._index = _index if _index is not None else cols.t[::stride].tolist()
+
+    @classmethod
+    def open(cls, path: str, mmap: bool = True, stride: int = 1024) -> "EventStore":
+        with profiling.span("recording.load"):
+            return cls(read_columns(path, mmap=mmap), stride)
+
+    @classmethod
+    def empty(cls) -> "EventStore":
+        return cls(EventColumns.empty())
+
+    def _view(self, lo: int, hi: int) -> "EventStore":
+        return EventStore(self._base, self._stride, _lo=lo, _hi=hi, _index=self._index)
+
+    # -- sequence protocol ------------------------------------------------
+    def __len__(self) -> int:
+        return self._hi - self._lo
+
+    def __iter__(self) -> Iterator[RecordedEvent]:
+        base = self._base
+        for i in range(self._lo, self._hi):
+            yield base.event(i)
+
+    def __getitem__(self, item: Union[int, slice]) -> Union[RecordedEvent, "EventStore"]:
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            if step != 1:
+                raise ValueError("EventStore slices must be contiguous")
+            return self._view(self._lo + start, self._lo + max(start, stop))
+        i = item + len(self) if item < 0 else item
+        if not 0 <= i < len(self):
+            raise IndexError("event index out of range")
+        return self._base.event(self._lo + i)
+
+    # -- time access --------------------------------------------------------
+    @property
+    def columns(self) -> EventColumns:
+        """The events of this view as ``EventColumns`` (zero-copy views)."""
+        if self._lo == 0 and self._hi == len(self._base):
+            return self._base
+        b, lo, hi = self._base, self._lo, self._hi
+        return EventColumns(
+            b.t[lo:hi], b.type[lo:hi], b.x[lo:hi], b.y[lo:hi],
+            b.dx[lo:hi], b.dy[lo:hi], b.key[lo:hi], keys=b.keys,
+        )
+
+    @property
+    def start_time(self) -> float:
+        return float(self._base.t[self._lo]) if len(self) else 0.0
+
+    @property
+    def end_time(self) -> float:
+        return float(self._base.t[self._hi - 1]) if len(self) else 0.0
+
+    @property
+    def duration(self) -> float:
+        return self.end_time - self.start_time
+
+    def _seek_base(self, t: float) -> int:
+        # Block from the sparse index, then a binary search inside it
+        block = max(0, bisect.bisect_left(self._index, t) - 1)
+        lo = block * self._stride
+        hi = min(len(self._base), lo + 2 * self._stride)
+        return lo + int(np.searchsorted(self._base.t[lo:hi], t, side="left"))
+
+    def seek(self, t: float) -> int:
+        """Index (within this view) of the first event at or after time ``t``."""
+        i = self._seek_base(t)
+        return min(max(i, self._lo), self._hi) - self._lo
+
+    def window(self, t0: Optional[float] = None, t1: Optional[float] = None) -> "EventStore":
+        """Events with ``t0 <= t < t1`` in recording time (None = open end)."""
+        lo = self._lo + (self.seek(t0) if t0 is not None else 0)
+        hi = self._lo + (self.seek(t1) if t1 is not None else len(self))
+        return self._view(lo, max(lo, hi))
+
+    def window_relative(self, start: Optional[float] = None, end: Optional[float] = None) -> "EventStore":
+        """Like ``window`` but in seconds from the first event of this view."""
+        t0 = self.start_time
+        return self.window(
+            t0 + start if start is not None else None,
+            t0 + end if end is not None else None,
+        )
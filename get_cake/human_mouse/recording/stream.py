@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from .columnar import EventColumns, encode_segment, read_columns, stream_header, write_columns
+from .events import RecordedEvent
+
+
+class StreamWriter:
+    """Append-only, crash-safe writer used by ``InputRecorder(stream_to=...)``.
+
+    ``push`` only appends to a deque (atomic under the GIL, so listener
+    threads never take a lock). A background thread drains it every
+    ``flush_interval`` seconds, or as soon as ``batch_size`` events are
+    waiting, and appends each batch as one checksummed segment. The file is
+    fsynced at most every ``fsync_interval`` seconds and on ``close``.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        batch_size: int = 4096,
+        flush_interval: float = 0.25,
+        fsync_interval: float = 1.0,
+    ) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.count = 0
+        self.segments = 0
+        self._queue: Deque[RecordedEvent] = deque()
+        self._key_index: Dict[str, int] = {}
+        self._wake = threading.Event()
+        self._closing = False
+        self._file = open(path, "wb")
+        self._file.write(stream_header())
+        self._file.flush()
+        self._last_fsync = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="recording-writer", daemon=True)
+        self._thread.start()
+
+    def push(self, ev: RecordedEvent) -> None:
+        self._queue.append(ev)
+        if len(self._queue) >= self.batch_size:
+            self._wake.set()
+
+    def _drain(self) -> None:
+        q = self._queue
+        while q:
+            batch: List[RecordedEvent] = []
+            while q and len(batch) < self.batch_size:
+                batch.append(q.popleft())
+            known = len(self._key_index)
+            cols = EventColumns.from_events(batch, key_index=self._key_index)
+            self._file.write(encode_segment(cols, cols.keys[known:]))
+            self.count += len(batch)
+            self.segments += 1
+        self._file.flush()
+
+    def _fsync(self) -> None:
+        os.fsync(self._file.fileno())
+        self._last_fsync = time.monotonic()
+
+    def _run(self) -> None:
+        while not self._closing:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._drain()
+            if time.monotonic() - self._last_fsync >= self.fsync_interval:
+                self._fsync()
+
+    def close(self) -> None:
+        """Flush everything still queued, fsync and close the file."""
+        if self._file.closed:
+            return
+        self._closing = True
+        self._wake.set()
+        self._thread.join()
+        self._drain()
+        self._fsync()
+        self._file.close()
+
+
+def compact(src: str, dst: Optional[str] = None) -> int:
+    """Rewrite a streamed (or truncated) recording as a contiguous v2 file.
+
+    Writes to ``dst`` (default: replace ``src`` in place) and returns the
+    number of events recovered.
+    """
+    cols = read_columns(src, mmap=False)
+    dst = dst or src
+    tmp = dst + ".tmp"
+    write_columns(tmp, cols)
+    os.replace(tmp, dst)
+    return len(cols)
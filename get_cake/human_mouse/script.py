@@ -0,0 +1,302 @@
+"""Step scripts: parse a whole sequence up front and run it with planning pipelined.
+
+A script is a text file with one step per line (``#`` starts a comment)::
+
+    move 800 500 speed=fast
+    left-click
+    wait 0.5
+    press enter
+    type "jane@example.com" wpm=90 typos=0.02
+    move 120 40 duration=0.3 easing=dash
+    play login.rec from=2 to=8
+
+or a JSON list of the same steps as objects, using the ``demo.py serve``
+request schema (``{"cmd": "move", "x": 800, "y": 500, "speed": "fast"}``).
+
+``ScriptRunner`` executes the steps back to back on one thread. While step
+``k`` runs, a worker thread already plans step ``k + 1`` (path and
+deadlines for a move, the compiled plan for a recording or typed text) from the position
+step ``k`` will leave the cursor at, so moves never wait for path
+generation. If the cursor is not where the plan assumed when its step
+starts, that step is planned again on the spot and flagged as replanned.
+"""
+from __future__ import annotations
+
+import json
+import shlex
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .controller import HumanMouse
+from .defaults import DEFAULT_MOVE_RATE
+from .playback import PlaybackPlan, PreparedRecording, compile_plan
+from .recording.store import EventStore
+from .timing import PlaybackClock
+
+STEP_COMMANDS = ("move", "left-click", "right-click", "press", "press-x", "type", "wait", "play")
+# Positional arguments of each command in the text format
+_POSITIONAL = {"move": ("x", "y"), "press": ("key",), "type": ("text",), "wait": ("seconds",), "play": ("input",)}
+# key=value options of the text format -> field names of the JSON format
+_OPTION_NAMES = {"from": "start", "to": "end", "duration": "duration", "speed": "speed",
+                 "jitter": "jitter", "easing": "easing", "move_rate": "move_rate", "catch_up": "catch_up",
+                 "idle_gap": "idle_gap", "idle_to": "idle_to", "wpm": "wpm", "typos": "typos"}
+
+Position = Tuple[int, int]
+
+
+@dataclass
+class Step:
+    cmd: str
+    args: Dict[str, Any] = field(default_factory=dict)
+    # Line number (text) or index (JSON) in the script, for messages
+    line: int = 0
+
+    def __str__(self) -> str:
+        args = " ".join(f"{k}={v}" for k, v in self.args.items())
+        return f"{self.cmd} {args}".strip()
+
+
+def _convert(value: str) -> Any:
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def parse_text(text: str) -> List[Step]:
+    steps: List[Step] = []
+    for n, raw in enumerate(text.splitlines(), 1):
+        words = shlex.split(raw, comments=True)
+        if not words:
+            continue
+        cmd, rest = words[0].lower(), words[1:]
+        if cmd not in STEP_COMMANDS:
+            raise ValueError(f"line {n}: unknown step {cmd!r} (choose from {', '.join(STEP_COMMANDS)})")
+        names = _POSITIONAL.get(cmd, ())
+        # Arguments come first, options after: text like ``type "a=b"`` is
+        # typed as written, not read as an option
+        positional, options = rest[:len(names)], rest[len(names):]
+        verbatim = cmd in ("press", "type", "play")
+        if (len(positional) != len(names) or any("=" not in w for w in options)
+                or (not verbatim and any("=" in w for w in positional))):
+            raise ValueError(f"line {n}: {cmd} takes {len(names)} argument(s): {' '.join(names) or '(none)'}")
+        args: Dict[str, Any] = {name: _convert(v) for name, v in zip(names, positional)}
+        if verbatim:
+            args[names[0]] = positional[0]
+        for w in options:
+            key, _, value = w.partition("=")
+            if key not in _OPTION_NAMES:
+                raise ValueError(f"line {n}: unknown option {key!r}")
+            args[_OPTION_NAMES[key]] = _convert(value)
+        steps.append(Step(cmd, args, n))
+    return steps
+
+
+def parse_json(data: Any) -> List[Step]:
+    if isinstance(data, dict):
+        data = data.get("steps")
+    if not isinstance(data, list):
+        raise ValueError("JSON scripts are a list of steps (or {\"steps\": [...]})")
+    steps: List[Step] = []
+    for n, item in enumerate(data):
+        if not isinstance(item, dict) or item.get("cmd") not in STEP_COMMANDS:
+            raise ValueError(f"step {n}: expected an object with cmd in {', '.join(STEP_COMMANDS)}")
+        args = {k: v for k, v in item.items() if k != "cmd"}
+        missing = [name for name in _POSITIONAL.get(item["cmd"], ()) if name not in args]
+        if missing:
+            raise ValueError(f"step {n}: {item['cmd']} needs {', '.join(missing)}")
+        steps.append(Step(item["cmd"], args, n))
+    return steps
+
+
+def load_script(path: str) -> List[Step]:
+    """Parse a text or JSON (by content) script file."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if text.lstrip().startswith(("[", "{")):
+        return parse_json(json.loads(text))
+    return parse_text(text)
+
+
+@dataclass
+class StepResult:
+    index: int
+    step: Step
+    # Seconds the step was meant to take and took
+    planned: float = 0.0
+    actual: float = 0.0
+    # Worker time spent planning it, and time the runner had to wait for that
+    plan_seconds: float = 0.0
+    stall: float = 0.0
+    replanned: bool = False
+    late_p95: float = 0.0
+    late_max: float = 0.0
+    note: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class _Planned:
+    """What the worker prepared for one step."""
+
+    start: Optional[Position]
+    end: Optional[Position]
+    duration: float = 0.0
+    move: Optional[Tuple[List[int], List[int], Any]] = None
+    plan: Optional[PlaybackPlan] = None
+    seconds: float = 0.0
+
+
+class ScriptRunner:
+    """Runs parsed steps on ``mouse`` with one step of planning lookahead."""
+
+    def __init__(self, mouse: HumanMouse, catch_up: str = "late") -> None:
+        self.mouse = mouse
+        self.catch_up = catch_up
+        self._stores: Dict[str, EventStore] = {}
+
+    def _plan(self, step: Step, start: Optional[Position]) -> _Planned:
+        t0 = time.perf_counter()
+        a = step.args
+        out = _Planned(start, start)
+        if step.cmd == "move":
+            mouse = self.mouse
+            w, h = mouse.backend.size()
+            target = (max(0, min(int(a["x"]), w - 1)), max(0, min(int(a["y"]), h - 1)))
+            out.move = mouse._plan_move(
+                target[0], target[1], a.get("speed", "normal"), float(a.get("jitter", 1.5)),
+                a.get("duration"), a.get("easing", "smooth"), start=start,
+            )
+            out.end = target
+            if out.move is not None:
+                out.duration = float(out.move[2][-1])
+        elif step.cmd == "type":
+            out.plan = self.mouse.typing.compile(str(a["text"]), self.mouse.backend, a.get("wpm"), a.get("typos"))
+            out.duration = out.plan.duration
+        elif step.cmd == "wait":
+            out.duration = max(0.0, float(a["seconds"]))
+        elif step.cmd == "play":
+            path = a["input"]
+            store = self._stores.get(path)
+            if store is None:
+                store = self._stores[path] = EventStore.open(path, mmap=False)
+            prepared = PreparedRecording(
+                store,
+                (a.get("start"), a.get("end")),
+                float(a.get("move_rate", DEFAULT_MOVE_RATE)),
+                float(a.get("speed", 1.0)),
+                a.get("idle_gap"),
+                a.get("idle_to"),
+            )
+            out.plan = compile_plan(prepared, self.mouse.backend, self.mouse.paths, sample_rate=self.mouse.sample_rate)
+            out.duration = out.plan.duration
+            if out.plan.end is not None:
+                out.end = out.plan.end
+        out.seconds = time.perf_counter() - t0
+        return out
+
+    def _execute(self, step: Step, planned: _Planned, result: StepResult) -> None:
+        mouse = self.mouse
+        if step.cmd == "move":
+            if planned.move is not None:
+                mouse._run_move(planned.move)
+                result.late_p95, result.late_max = mouse.last_timing.p95, mouse.last_timing.max
+        elif step.cmd == "left-click":
+            mouse.left_click()
+        elif step.cmd == "right-click":
+            mouse.right_click()
+        elif step.cmd == "press":
+            mouse.press_key(str(step.args["key"]))
+        elif step.cmd == "press-x":
+            mouse.press_x()
+        elif step.cmd == "type":
+            assert planned.plan is not None
+            clock = PlaybackClock(mouse.scheduler)
+            clock.start()
+            mouse.last_timing = timing = planned.plan.run(clock)
+            result.late_p95, result.late_max = timing.p95, timing.max
+        elif step.cmd == "wait":
+            mouse.wait(planned.duration)
+        elif step.cmd == "play":
+            plan = planned.plan
+            assert plan is not None
+            if plan.skipped:
+                result.note = f"skipped unsupported keys: {', '.join(sorted(set(plan.skipped)))}"
+            clock = PlaybackClock(mouse.scheduler, policy=step.args.get("catch_up", self.catch_up))
+            # Pre-position like every other player; the plan's end assumes it
+            if plan.first is not None:
+                mouse.backend.move(*plan.first)
+            clock.start()
+            timing = plan.run(clock)
+            result.late_p95, result.late_max = timing.p95, timing.max
+
+    def run(self, steps: List[Step], on_step: Optional[Callable[[StepResult], None]] = None) -> List[StepResult]:
+        """Execute ``steps`` in order; ``on_step(result)`` is called after each one.
+
+        Stops at the first step that raises, recording its error.
+        """
+        results: List[StepResult] = []
+        if not steps:
+            return results
+        backend = self.mouse.backend
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="script-plan") as worker:
+            pending: Future = worker.submit(self._plan, steps[0], backend.refresh_position())
+            for k, step in enumerate(steps):
+                result = StepResult(k, step)
+                t0 = time.perf_counter()
+                try:
+                    planned = pending.result()
+                    result.stall = time.perf_counter() - t0
+                    # Catches the cursor having been moved by hand since planning
+                    actual = backend.refresh_position() if planned.start is not None else None
+                    if actual is not None and planned.start != actual:
+                        planned = self._plan(step, actual)
+                        result.replanned = True
+                    result.plan_seconds = planned.seconds
+                    result.planned = planned.duration
+                    if k + 1 < len(steps):
+                        # Plan the next step from where this one will leave the cursor
+                        pending = worker.submit(self._plan, steps[k + 1], planned.end)
+                    t1 = time.perf_counter()
+                    self._execute(step, planned, result)
+                    result.actual = time.perf_counter() - t1
+                except Exception as e:
+                    result.error = str(e)
+                    results.append(result)
+                    if on_step is not None:
+                        on_step(result)
+                    break
+                results.append(result)
+                if on_step is not None:
+                    on_step(result)
+        return results
+
+
+def format_result(r: StepResult) -> str:
+    delta = (r.actual - r.planned) * 1e3
+    flags = " replanned" if r.replanned else ""
+    if r.note:
+        flags += f" ({r.note})"
+    if r.error:
+        flags += f" ERROR: {r.error}"
+    return (
+        f"{r.index + 1:4d} {str(r.step)[:36]:36s} planned={r.planned * 1e3:9.1f}ms actual={r.actual * 1e3:9.1f}ms "
+        f"delta={delta:+7.2f}ms late_max={r.late_max * 1e3:6.2f}ms plan={r.plan_seconds * 1e3:6.2f}ms "
+        f"stall={r.stall * 1e3:5.2f}ms{flags}"
+    )
+
+
+def summarize(results: List[StepResult]) -> str:
+    planned = sum(r.planned for r in results)
+    actual = sum(r.actual for r in results)
+    stall = sum(r.stall for r in results)
+    plan = sum(r.plan_seconds for r in results)
+    replanned = sum(r.replanned for r in results)
+    return (
+        f"{len(results)} steps: planned {planned:.3f}s, actual {actual:.3f}s ({(actual - planned) * 1e3:+.1f}ms); "
+        f"planning {plan * 1e3:.1f}ms off the critical path, stalled {stall * 1e3:.2f}ms, replanned {replanned}"
+    )
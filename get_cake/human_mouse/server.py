@@ -0,0 +1,479 @@
+"""Playback server: many backend sessions on one shared timer queue.
+
+One process owns N sessions, e.g. one ``XlibBackend`` per X display or one
+``MemoryBackend`` per simulated target. Every session's compiled plan is
+scheduled on a single dispatcher thread that sleeps until the earliest due
+step across all sessions (a heap keyed on absolute deadline), so dozens of
+sessions cost one thread and one wakeup per due instant instead of one
+interpreter each. Each session keeps its own ``PlaybackClock`` timeline,
+catch-up policy and drift metrics. Plans are compiled on a worker thread
+(the next pass while the current one plays) and recordings are loaded on
+the requesting socket thread, so neither holds up other sessions' steps.
+
+Sessions are controlled over a local socket (see ``human_mouse.ipc``) with
+one JSON object per line:
+
+    {"cmd": "open", "session": "d3", "backend": "xlib", "options": {"display": ":3"}}
+    {"cmd": "load", "session": "d3", "path": "run.rec", "from": 10, "to": 40, "speed": 2, "idle_gap": 3}
+    {"cmd": "start", "session": "d3", "loop": true, "pause": 6}
+    {"cmd": "stop", "session": "d3"}
+    {"cmd": "close", "session": "d3"}
+    {"cmd": "status"}
+    {"cmd": "shutdown"}
+
+    python -m human_mouse.server unix:/tmp/get_cake.sock
+    python -m human_mouse.server unix:/tmp/get_cake.sock --send '{"cmd": "status"}'
+"""
+from __future__ import annotations
+
+import argparse
+import heapq
+import itertools
+import json
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .backends import InputBackend, get_backend
+from .ipc import Message, request, serve
+from .paths import PathEngine
+from .playback import DEFAULT_MOVE_RATE, PlaybackPlan, PreparedRecording, compile_plan
+from .recording.store import EventStore
+from .timing import PlaybackClock, Scheduler
+
+STATE_IDLE = "idle"
+STATE_PLAYING = "playing"
+
+
+class Session:
+    """One backend and the recording it plays, owned by a ``PlaybackServer``."""
+
+    def __init__(self, name: str, backend: InputBackend, scheduler: Scheduler, policy: str = "late") -> None:
+        self.name = name
+        self.backend = backend
+        self.clock = PlaybackClock(scheduler, policy=policy)
+        self.paths = PathEngine()
+        self.prepared: Optional[PreparedRecording] = None
+        self.path: Optional[str] = None
+        self.lerp = True
+        self.loop = False
+        self.pause = 6.0
+        self.state = STATE_IDLE
+        self.passes = 0
+        self.plan: Optional[PlaybackPlan] = None
+        # Plan of the next pass, compiling on the server's worker thread
+        self.next_plan: Optional[Future] = None
+        # The pass has ended and waits for ``next_plan``
+        self.waiting = False
+        # Next step of ``plan``, whether the cursor is at ``plan.first`` yet,
+        # and where the current pass sits on the timeline
+        self.index = 0
+        self.positioned = False
+        self.base = 0.0
+        # Bumped on start/stop so queued wakeups from an earlier run are ignored
+        self.generation = 0
+
+    def status(self) -> Message:
+        return {
+            "session": self.name,
+            "backend": self.backend.name,
+            "state": self.state,
+            "recording": self.path,
+            "events": len(self.prepared) if self.prepared is not None else 0,
+            "loop": self.loop,
+            "passes": self.passes,
+            "step": self.index,
+            "steps": len(self.plan) if self.plan is not None else 0,
+            "drift": asdict(self.clock.metrics),
+        }
+
+
+class PlaybackServer:
+    """Owns the sessions and the dispatcher thread.
+
+    All backend calls and all session changes happen on the dispatcher
+    thread: ``submit`` queues a command and wakes it, so requests arriving on
+    socket threads never race with playback. Compiling only reads cached
+    backend geometry, so it runs on a worker thread. Stopping, restarting or
+    closing a session releases the buttons and keys its plan left held.
+    """
+
+    def __init__(self, spin: float = 0.0, scheduler: Optional[Scheduler] = None) -> None:
+        self.scheduler = scheduler if scheduler is not None else Scheduler(spin=spin)
+        self.sessions: Dict[str, Session] = {}
+        self._heap: List[Tuple[float, int, str, int]] = []
+        self._seq = itertools.count()
+        self._commands: List[Tuple[Message, Future]] = []
+        # (session, generation) whose next plan has finished compiling
+        self._compiled: List[Tuple[str, int]] = []
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="server-compile")
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._handlers: Dict[str, Callable[[Message], Message]] = {
+            "open": self._cmd_open,
+            "load": self._cmd_load,
+            "start": self._cmd_start,
+            "stop": self._cmd_stop,
+            "close": self._cmd_close,
+            "status": self._cmd_status,
+        }
+
+    # -- lifecycle --------------------------------------------------------
+    def start(self) -> None:
+        self._running = True
+        self._thread = threading.Thread(target=self._dispatch, name="playback-server", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+        self._worker.shutdown(wait=False)
+
+    def submit(self, msg: Message, timeout: float = 30.0) -> Message:
+        """Run a command on the dispatcher thread and return its reply.
+
+        A ``load`` reads and prepares its recording on the calling thread
+        first; only swapping it into the session happens on the dispatcher.
+        """
+        if msg.get("cmd") == "load":
+            try:
+                msg = dict(msg, _prepared=_prepare(msg))
+            except Exception as e:
+                return {"ok": False, "error": str(e)}
+        fut: Future = Future()
+        with self._cond:
+            self._commands.append((msg, fut))
+            self._cond.notify()
+        return fut.result(timeout)
+
+    def handle(self, msg: Message) -> Message:
+        """Run a command on the calling thread and return its reply.
+
+        Only for a server that was not ``start``ed and is driven with
+        ``run_until``; anything else goes through ``submit``.
+        """
+        try:
+            return self._handle(msg)
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    def run_until(self, until: float) -> None:
+        """Dispatch on the calling thread up to ``until`` on the scheduler's clock.
+
+        The headless counterpart of ``start``, e.g. on a ``VirtualClock``:
+        waits go through the scheduler's ``sleep``, and a pass waiting for
+        its plan waits for the compile worker, so runs are deterministic.
+        """
+        sched = self.scheduler
+        heap = self._heap
+        while True:
+            with self._cond:
+                commands, compiled = self._take()
+            self._process(commands, compiled)
+            if any(s.waiting for s in self.sessions.values()):
+                # Queued behind the compiles, so their callbacks have run by now
+                self._worker.submit(int).result()
+                continue
+            last = not heap or heap[0][0] > until
+            wait = (until if last else heap[0][0]) - sched.clock()
+            if wait > 0:
+                sched.sleep(wait)
+            if last:
+                return
+            self._pop()
+
+    # -- dispatcher -------------------------------------------------------
+    def _dispatch(self) -> None:
+        clock = self.scheduler.clock
+        spin = self.scheduler.spin
+        heap = self._heap
+        while True:
+            with self._cond:
+                while self._running and not self._commands and not self._compiled:
+                    timeout = heap[0][0] - clock() - spin if heap else None
+                    if timeout is not None and timeout <= 0:
+                        break
+                    self._cond.wait(timeout)
+                if not self._running:
+                    break
+                commands, compiled = self._take()
+            self._process(commands, compiled)
+            if not heap or heap[0][0] - clock() > spin:
+                continue
+            due = heap[0][0]
+            while clock() < due:
+                pass
+            self._pop()
+        for session in self.sessions.values():
+            session.state = STATE_IDLE
+            self._release(session)
+
+    def _take(self) -> Tuple[List[Tuple[Message, Future]], List[Tuple[str, int]]]:
+        """Queued commands and compile notifications (call with ``_cond`` held)."""
+        commands, self._commands = self._commands, []
+        compiled, self._compiled = self._compiled, []
+        return commands, compiled
+
+    def _process(self, commands: List[Tuple[Message, Future]], compiled: List[Tuple[str, int]]) -> None:
+        for msg, fut in commands:
+            fut.set_result(self.handle(msg))
+        for name, generation in compiled:
+            session = self.sessions.get(name)
+            if session is not None and session.generation == generation and session.waiting:
+                self._next_pass(session)
+
+    def _pop(self) -> None:
+        """Advance the session of the earliest queued wakeup."""
+        _, _, name, generation = heapq.heappop(self._heap)
+        session = self.sessions.get(name)
+        if session is not None and session.generation == generation and session.state == STATE_PLAYING:
+            try:
+                self._advance(session)
+            except Exception as e:
+                session.state = STATE_IDLE
+                print(f"[{name}] playback failed: {e}", file=sys.stderr)
+                self._release(session)
+
+    def _release(self, session: Session) -> None:
+        """Let go of the buttons and keys the session's plan left held."""
+        if session.plan is None:
+            return
+        try:
+            session.plan.release()
+        except Exception as e:
+            print(f"[{session.name}] releasing held inputs failed: {e}", file=sys.stderr)
+
+    def _schedule(self, session: Session, at: float) -> None:
+        heapq.heappush(self._heap, (at, next(self._seq), session.name, session.generation))
+
+    def _compile(self, session: Session) -> None:
+        """Start compiling the next pass of ``session`` on the worker thread."""
+        assert session.prepared is not None
+        backend = session.backend
+        # Cached here, so compile_plan makes no backend calls off this thread
+        backend.size()
+        backend.position()
+        # Fresh lerp paths every pass
+        fut = self._worker.submit(compile_plan, session.prepared, backend, session.paths, lerp=session.lerp)
+        name, generation = session.name, session.generation
+
+        def done(_: Future) -> None:
+            with self._cond:
+                self._compiled.append((name, generation))
+                self._cond.notify()
+
+        session.next_plan = fut
+        fut.add_done_callback(done)
+
+    def _next_pass(self, session: Session) -> None:
+        """Swap in the compiled plan and schedule its pass; waits (without
+        blocking the dispatcher) if it is still compiling."""
+        fut = session.next_plan
+        assert fut is not None
+        if not fut.done():
+            session.waiting = True
+            return
+        session.waiting = False
+        first = session.plan is None
+        try:
+            session.plan = fut.result()
+        except Exception as e:
+            session.state = STATE_IDLE
+            print(f"[{session.name}] compiling failed: {e}", file=sys.stderr)
+            return
+        session.index = 0
+        session.positioned = False
+        clock = session.clock
+        if first:
+            # The timeline starts with the first pass, not with the request
+            clock.start()
+        clock.begin()
+        session.next_plan = None
+        if session.loop:
+            self._compile(session)
+        self._schedule(session, clock.at(session.base))
+
+    def _advance(self, session: Session) -> None:
+        """Fire every step of ``session`` that is due, then requeue it."""
+        clock = session.clock
+        plan = session.plan
+        assert plan is not None
+        now = self.scheduler.clock
+        if not session.positioned:
+            # Once per pass, however often the first step is requeued
+            session.positioned = True
+            if plan.first is not None:
+                session.backend.move(*plan.first)
+        deadlines, optional, fire = plan.deadlines, plan.optional, plan.fire
+        n = len(plan)
+        while session.index < n:
+            i = session.index
+            offset = session.base + float(deadlines[i])
+            target = clock.target(offset)
+            late = now() - target
+            if late < 0:
+                self._schedule(session, target)
+                return
+            session.index += 1
+            if optional[i] and late > clock.max_lag:
+                clock.metrics.dropped += 1
+                continue
+            fire(i)
+            clock.account(late, target, offset)
+        session.passes += 1
+        if not session.loop:
+            session.state = STATE_IDLE
+            return
+        session.base += plan.duration + session.pause
+        if session.next_plan is None:
+            # loop was switched on during the pass
+            self._compile(session)
+        self._next_pass(session)
+
+    # -- commands ---------------------------------------------------------
+    def _handle(self, msg: Message) -> Message:
+        cmd = msg.get("cmd")
+        handler = self._handlers.get(cmd)  # type: ignore[arg-type]
+        if handler is None:
+            raise ValueError(f"Unknown command: {cmd!r} (choose from {', '.join(self._handlers)})")
+        reply = handler(msg)
+        reply.setdefault("ok", True)
+        return reply
+
+    def _session(self, msg: Message) -> Session:
+        name = msg.get("session")
+        if name not in self.sessions:
+            raise ValueError(f"No such session: {name!r}")
+        return self.sessions[name]
+
+    def _cmd_open(self, msg: Message) -> Message:
+        name = msg.get("session")
+        if not name:
+            raise ValueError("open needs a session name")
+        if name in self.sessions:
+            raise ValueError(f"Session already open: {name!r}")
+        options = dict(msg.get("options") or {})
+        if "screen_size" in options:
+            options["screen_size"] = tuple(options["screen_size"])
+        backend = get_backend(msg.get("backend", "memory"), **options)
+        session = Session(name, backend, self.scheduler, msg.get("catch_up", "late"))
+        self.sessions[name] = session
+        return session.status()
+
+    def _cmd_load(self, msg: Message) -> Message:
+        session = self._session(msg)
+        prepared = msg.get("_prepared")
+        if not isinstance(prepared, PreparedRecording):
+            prepared = _prepare(msg)
+        self._cmd_stop(msg)
+        session.prepared = prepared
+        session.path = msg["path"]
+        session.lerp = bool(msg.get("lerp", True))
+        return session.status()
+
+    def _cmd_start(self, msg: Message) -> Message:
+        session = self._session(msg)
+        if session.prepared is None or not len(session.prepared):
+            raise ValueError(f"Session {session.name!r} has nothing loaded")
+        session.loop = bool(msg.get("loop", session.loop))
+        session.pause = float(msg.get("pause", session.pause))
+        session.generation += 1
+        session.backend.sync()
+        session.base = 0.0
+        session.passes = 0
+        session.state = STATE_PLAYING
+        self._release(session)
+        session.plan = None
+        # The first pass is scheduled once its plan has compiled
+        self._compile(session)
+        self._next_pass(session)
+        return session.status()
+
+    def _cmd_stop(self, msg: Message) -> Message:
+        session = self._session(msg)
+        # Queued wakeups carry the old generation and are skipped when popped
+        session.generation += 1
+        session.state = STATE_IDLE
+        session.waiting = False
+        session.next_plan = None
+        self._release(session)
+        return session.status()
+
+    def _cmd_close(self, msg: Message) -> Message:
+        session = self._session(msg)
+        self._cmd_stop(msg)
+        del self.sessions[session.name]
+        close = getattr(session.backend, "close", None)
+        if close is not None:
+            close()
+        return {"session": session.name, "state": "closed"}
+
+    def _cmd_status(self, msg: Message) -> Message:
+        if msg.get("session") is not None:
+            return self._session(msg).status()
+        return {"sessions": [s.status() for s in self.sessions.values()]}
+
+
+def _prepare(msg: Message) -> PreparedRecording:
+    """Read and prepare the recording of a ``load`` request."""
+    return PreparedRecording(
+        EventStore.open(msg["path"], mmap=False),
+        (msg.get("from"), msg.get("to")),
+        msg.get("move_rate", DEFAULT_MOVE_RATE),
+        float(msg.get("speed", 1.0)),
+        msg.get("idle_gap"),
+        msg.get("idle_to"),
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Multi-session playback server")
+    parser.add_argument("address", help="unix:/path/to.sock or host:port")
+    parser.add_argument("--send", type=str, help="Send one JSON request to a running server and print the reply")
+    parser.add_argument("--spin", type=float, default=0.0,
+                        help="Seconds to busy-wait before each deadline (costs CPU per step across all sessions)")
+    parser.add_argument("--allow-remote", action="store_true",
+                        help="Listen on a non-loopback host; anyone who can connect can then drive the sessions")
+    args = parser.parse_args(argv)
+
+    if args.send:
+        print(json.dumps(request(args.address, json.loads(args.send)), indent=2))
+        return 0
+
+    server = PlaybackServer(spin=args.spin)
+    server.start()
+    done = threading.Event()
+
+    def handle(msg: Message) -> Message:
+        if msg.get("cmd") == "shutdown":
+            done.set()
+            return {"ok": True}
+        return server.submit(msg)
+
+    try:
+        listener = serve(args.address, handle, allow_remote=args.allow_remote)
+    except (OSError, ValueError) as e:
+        server.stop()
+        parser.error(f"cannot serve {args.address}: {e}")
+    print(f"Playback server listening on {args.address}")
+    try:
+        # Short waits keep Ctrl+C responsive on Windows
+        while not done.wait(0.5):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.shutdown()
+        listener.server_close()
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+"""Headless, faster-than-real-time playback for checking recordings.
+
+``simulate`` compiles a recording exactly as a player would (with the app's
+lerp moves through a ``PathEngine`` by default), runs the plan on a
+``VirtualClock`` against a ``MemoryBackend`` screen model, and turns the
+backend's call log into arrays (times in milliseconds from the start of
+playback):
+
+- ``trajectory``: every cursor update as ``(t, x, y)`` rows;
+- ``input_t`` / ``inputs`` / ``input_down``: every button and key change;
+- ``scrolls``: ``(t, dy)`` rows;
+- the final cursor position and whatever is still held.
+
+Problems a live run would hit are reported as ``Issue``s: a release without
+a press (``unmatched_up``), a press of a mouse button already down
+(``double_down``; a repeated key press is OS auto-repeat, as recorded by
+pynput, and is fine), buttons or keys still down at the end (``stuck``),
+cursor updates off the screen (``out_of_bounds``) or in the top-left
+corner, where pyautogui's fail-safe aborts (``failsafe_corner``),
+generated moves too short for their distance (``infeasible_move``), keys
+the target backend cannot send (``invalid_key``, checked against the key
+table of the backend passed as ``keys``) and, with simulated backend
+``latency``, playback falling behind (``behind``).
+
+``validate_file`` wraps this in plain values for ``recording.batch.run_batch``,
+which is what ``demo.py validate`` runs over a corpus.
+"""
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .backends import InputBackend, MemoryBackend, get_backend
+from .defaults import DEFAULT_SAMPLE_RATE
+from .paths import PathEngine
+from .playback import PreparedRecording, compile_plan
+from .recording.store import EventStore
+from .timing import PlaybackClock, Scheduler, VirtualClock
+
+ISSUE_KINDS = (
+    "unmatched_up",
+    "double_down",
+    "stuck",
+    "out_of_bounds",
+    "failsafe_corner",
+    "infeasible_move",
+    "invalid_key",
+    "behind",
+)
+# A generated move faster than this (px/s) cannot be done by hand; shorter
+# hops than MIN_MOVE_PX are never flagged
+MAX_SPEED = 6000.0
+MIN_MOVE_PX = 25.0
+# Lateness (seconds) beyond which playback counts as behind
+LATE_LIMIT = 0.025
+# Issues kept per kind (all are counted)
+MAX_EXAMPLES = 20
+
+
+@dataclass
+class Issue:
+    kind: str
+    # Milliseconds from the start of playback
+    t: float
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.t / 1e3:.3f}s {self.kind}: {self.message}"
+
+
+@dataclass
+class Simulation:
+    """Outcome of one simulated playback; times in milliseconds."""
+
+    trajectory: np.ndarray
+    input_t: np.ndarray
+    inputs: List[str]
+    input_down: np.ndarray
+    scrolls: np.ndarray
+    position: Tuple[int, int]
+    held: List[str]
+    duration: float
+    steps: int
+    dropped: int = 0
+    late_max: float = 0.0
+    issues: List[Issue] = field(default_factory=list)
+    counts: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.counts
+
+    def state_at(self, t: float) -> List[str]:
+        """Buttons and keys held at ``t`` milliseconds."""
+        n = int(np.searchsorted(self.input_t, t, side="right"))
+        held: Dict[str, bool] = {}
+        for name, down in zip(self.inputs[:n], self.input_down[:n].tolist()):
+            held[name] = down
+        return [name for name, down in held.items() if down]
+
+
+class _Issues:
+    def __init__(self) -> None:
+        self.items: List[Issue] = []
+        self.counts: Dict[str, int] = {}
+
+    def add(self, kind: str, t: float, message: str, count: int = 1) -> None:
+        n = self.counts.get(kind, 0)
+        self.counts[kind] = n + count
+        if n < MAX_EXAMPLES:
+            self.items.append(Issue(kind, t, message))
+
+
+def _input_name(op: str, arg: str) -> str:
+    return arg if op.startswith("mouse") else f"key:{arg}"
+
+
+def simulate(
+    prepared: PreparedRecording,
+    screen: Tuple[int, int] = (1920, 1080),
+    lerp: bool = True,
+    paths: Optional[PathEngine] = None,
+    seed: Optional[int] = None,
+    sample_rate: Optional[float] = DEFAULT_SAMPLE_RATE,
+    latency: float = 0.0,
+    max_speed: float = MAX_SPEED,
+    keys: Optional[InputBackend] = None,
+) -> Simulation:
+    """Play ``prepared`` on a virtual clock and check the result.
+
+    ``lerp=False`` plays like ``demo.py play`` (recorded events only).
+    ``latency`` is the simulated cost of each backend call in seconds.
+    Key names are checked with ``keys.is_valid_key`` (the backend live
+    playback will use); without it any non-empty name passes.
+    """
+    w, h = screen
+    clock = VirtualClock()
+    backend = MemoryBackend(
+        screen, position=(w // 2, h // 2), clock=clock, latency=latency, sleep=clock.advance,
+        valid_key=keys.is_valid_key if keys is not None else None,
+    )
+    plan = compile_plan(prepared, backend, paths if paths is not None else PathEngine(seed), lerp, sample_rate)
+    if plan.first is not None:
+        backend.move(*plan.first)
+    playback = PlaybackClock(Scheduler(spin=0.0, clock=clock, sleep=clock.sleep))
+    playback.start()
+    stats = plan.run(playback)
+    origin = playback.origin
+
+    found = _Issues()
+    for key in sorted(set(plan.skipped)):
+        found.add("invalid_key", 0.0, f"key {key!r} cannot be sent; its events are left out")
+
+    calls = backend.calls
+    ts = np.fromiter((c[0] for c in calls), dtype=np.float64, count=len(calls))
+    ts = np.maximum(ts - origin, 0.0) * 1e3
+    ops = [c[1] for c in calls]
+    is_move = np.fromiter((op == "move" for op in ops), dtype=bool, count=len(ops))
+    move_idx = np.flatnonzero(is_move)
+    xy = np.array([calls[i][2] for i in move_idx.tolist()], dtype=np.float64).reshape(-1, 2)
+    trajectory = np.column_stack((ts[move_idx], xy))
+
+    input_idx = [i for i, op in enumerate(ops) if op in ("mouse_down", "mouse_up", "key_down", "key_up")]
+    inputs = [_input_name(ops[i], calls[i][2][0]) for i in input_idx]
+    input_down = np.array([ops[i].endswith("down") for i in input_idx], dtype=bool)
+    input_t = ts[input_idx]
+    scroll_idx = [i for i, op in enumerate(ops) if op == "scroll"]
+    scrolls = np.column_stack((ts[scroll_idx], [calls[i][2][0] for i in scroll_idx])).reshape(-1, 2)
+
+    # Press/release pairing
+    held: Dict[str, float] = {}
+    for t, name, down in zip(input_t.tolist(), inputs, input_down.tolist()):
+        if down:
+            if name in held:
+                # Held keys repeat their key_down; held buttons never do
+                if not name.startswith("key:"):
+                    found.add("double_down", t, f"{name} pressed again while down (since {held[name] / 1e3:.3f}s)")
+                continue
+            held[name] = t
+        elif held.pop(name, None) is None:
+            found.add("unmatched_up", t, f"{name} released but was not pressed")
+    for name, t in held.items():
+        found.add("stuck", t, f"{name} pressed at {t / 1e3:.3f}s and still down at the end")
+
+    if len(trajectory):
+        x, y = trajectory[:, 1], trajectory[:, 2]
+        off = np.flatnonzero((x < 0) | (y < 0) | (x >= w) | (y >= h))
+        if off.size:
+            i = off[0]
+            found.add(
+                "out_of_bounds", trajectory[i, 0],
+                f"{off.size} cursor updates outside {w}x{h}, first ({x[i]:.0f}, {y[i]:.0f})", off.size,
+            )
+        corner = np.flatnonzero((x <= 0) & (y <= 0))
+        if corner.size:
+            found.add(
+                "failsafe_corner", trajectory[corner[0], 0],
+                f"{corner.size} cursor updates in the top-left corner (pyautogui's fail-safe aborts there)",
+                corner.size,
+            )
+
+    lerps = plan.lerps
+    if len(lerps):
+        dist = np.hypot(lerps[:, 2] - lerps[:, 0], lerps[:, 3] - lerps[:, 1])
+        need = dist / max_speed
+        for i in np.flatnonzero((dist >= MIN_MOVE_PX) & (lerps[:, 5] < need)).tolist():
+            x0, y0, x1, y1, t0, dur = lerps[i].tolist()
+            found.add(
+                "infeasible_move", t0 * 1e3,
+                f"{dist[i]:.0f}px move ({x0:.0f}, {y0:.0f}) -> ({x1:.0f}, {y1:.0f}) has {dur * 1e3:.1f}ms, "
+                f"needs {need[i] * 1e3:.1f}ms at {max_speed:.0f}px/s",
+            )
+
+    metrics = playback.metrics
+    if stats.max > LATE_LIMIT or metrics.dropped:
+        found.add(
+            "behind", 0.0,
+            f"up to {stats.max * 1e3:.1f}ms late, {metrics.dropped} move points dropped "
+            f"at {latency * 1e3:g}ms per backend call",
+        )
+
+    found.items.sort(key=lambda issue: issue.t)
+    return Simulation(
+        trajectory=trajectory,
+        input_t=input_t,
+        inputs=inputs,
+        input_down=input_down,
+        scrolls=scrolls,
+        position=backend.position(),
+        held=sorted(held),
+        duration=(clock.now - origin) * 1e3,
+        steps=len(plan),
+        dropped=metrics.dropped,
+        late_max=stats.max * 1e3,
+        issues=found.items,
+        counts=found.counts,
+    )
+
+
+# One instance per backend name and worker process
+_KEY_BACKENDS: Dict[str, InputBackend] = {}
+
+
+def _key_backend(name: str) -> InputBackend:
+    backend = _KEY_BACKENDS.get(name)
+    if backend is None:
+        backend = _KEY_BACKENDS[name] = get_backend(name)
+    return backend
+
+
+def validate_file(
+    path: str,
+    screen: Tuple[int, int] = (1920, 1080),
+    lerp: bool = True,
+    seed: Optional[int] = 0,
+    sample_rate: Optional[float] = DEFAULT_SAMPLE_RATE,
+    latency: float = 0.0,
+    max_speed: float = MAX_SPEED,
+    ignore: Sequence[str] = (),
+    key_backend: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Simulate one recording file; plain-value summary for ``run_batch``.
+
+    ``key_backend`` names the backend (``get_backend``) whose key table the
+    recording's keys are checked against.
+    """
+    t0 = time.perf_counter()
+    keys = _key_backend(key_backend) if key_backend else None
+    store = EventStore.open(path)
+    sim = simulate(PreparedRecording(store), screen, lerp, None, seed, sample_rate, latency, max_speed, keys)
+    counts = {k: c for k, c in sim.counts.items() if k not in ignore}
+    return {
+        "path": path,
+        "events": len(store),
+        "steps": sim.steps,
+        "duration_s": round(sim.duration / 1e3, 3),
+        "simulated_in_s": round(time.perf_counter() - t0, 3),
+        "final_position": list(sim.position),
+        "held": sim.held,
+        "ok": not counts,
+        "issues": counts,
+        "examples": [str(issue) for issue in sim.issues if issue.kind not in ignore],
+    }
+
+
+def write_report(path: str, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Write per-file ``validate_file`` results and corpus totals as JSON."""
+    ok = [r for r in results if "error" not in r]
+    issues: Dict[str, int] = {}
+    for r in ok:
+        for kind, c in r["issues"].items():
+            issues[kind] = issues.get(kind, 0) + c
+    doc = {
+        "command": "validate",
+        "generated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "totals": {
+            "files": len(results),
+            "errors": len(results) - len(ok),
+            "failed": sum(not r["ok"] for r in ok),
+            "events": sum(r["events"] for r in ok),
+            "duration_s": round(sum(r["duration_s"] for r in ok), 3),
+            "issues": issues,
+        },
+        "files": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2, ensure_ascii=False)
+    return doc
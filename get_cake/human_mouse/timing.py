@@ -0,0 +1,360 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from .defaults import CATCH_UP_POLICIES, DEFAULT_SAMPLE_RATE
+
+
+def _ease_smooth(t: np.ndarray) -> np.ndarray:
+    # S-curve: slow start, fast middle, slow end
+    return 1.0 / (1.0 + np.exp(-10.0 * (t - 0.5)))
+
+
+def _ease_dash(t: np.ndarray) -> np.ndarray:
+    return 1.0 - (1.0 - t) ** 3
+
+
+def _ease_linear(t: np.ndarray) -> np.ndarray:
+    return t
+
+
+EASINGS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "smooth": _ease_smooth,
+    "dash": _ease_dash,
+    "linear": _ease_linear,
+}
+
+
+def plan_schedule(n_points: int, total_time: float, easing: str = "smooth", start: float = 0.0) -> np.ndarray:
+    """Return the absolute deadline of each of ``n_points`` path points.
+
+    Point ``i`` is due at ``start + ease(i / (n - 1)) * total_time``; unknown
+    easing names fall back to 'smooth', as ``HumanMouse.move_to`` always has.
+    """
+    ease = EASINGS.get(easing, _ease_smooth)
+    t = np.linspace(0.0, 1.0, n_points) if n_points > 1 else np.zeros(n_points)
+    return start + ease(t) * total_time
+
+
+# A curved path gets enough points that straight segments between them stray
+# at most this many pixels from the curve, however short the move.
+CURVE_TOLERANCE = 2.0
+# Resolution of the numeric easing inverse
+_EASE_GRID = np.linspace(0.0, 1.0, 1025)
+
+
+def ease_inverse(easing: str, y: np.ndarray) -> np.ndarray:
+    """Path parameter at which ``easing`` reaches progress ``y`` (0..1)."""
+    ease = EASINGS.get(easing, _ease_smooth)
+    return np.interp(y, ease(_EASE_GRID), _EASE_GRID)
+
+
+def sample_path(
+    path: np.ndarray,
+    total_time: float,
+    easing: str = "smooth",
+    rate: float = DEFAULT_SAMPLE_RATE,
+    start: float = 0.0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Resample a dense ``path`` to equally spaced instants; returns (points, deadlines).
+
+    ``plan_schedule`` gives every point of ``path`` its own deadline, so the
+    number of backend calls follows the path's length whatever the duration.
+    Here the count comes from the duration (one point per ``1 / rate``
+    seconds) and the bow of the path (at least enough points to stay within
+    ``CURVE_TOLERANCE`` of it). Point ``k`` lies where the easing puts the
+    cursor at its deadline, i.e. at parameter ``ease^-1(k / (n - 1))`` along
+    ``path``; points truncating to the same pixel as the previous one are
+    dropped. Timing follows the same curve as ``plan_schedule``.
+    """
+    m = len(path)
+    if m < 2 or total_time <= 0:
+        return path[-1:].copy(), np.full(min(m, 1), start)
+
+    chord = path[-1] - path[0]
+    length = float(np.hypot(*chord))
+    bow = 0.0
+    if length > 0:
+        rel = path - path[0]
+        bow = float(np.abs(rel[:, 0] * chord[1] - rel[:, 1] * chord[0]).max()) / length
+    # A polyline of k segments misses a bow of height h by about h / k^2
+    n_curve = int(np.ceil(np.sqrt(bow / CURVE_TOLERANCE))) + 1
+    n_rate = int(np.ceil(total_time * rate)) + 1
+    n = max(2, n_rate, min(n_curve, m))
+
+    ease = EASINGS.get(easing, _ease_smooth)
+    ends = ease(np.array([0.0, 1.0]))
+    progress = np.linspace(ends[0], ends[1], n)
+    u = ease_inverse(easing, progress) * (m - 1)
+    idx = np.arange(m)
+    points = np.column_stack((np.interp(u, idx, path[:, 0]), np.interp(u, idx, path[:, 1])))
+    points[0], points[-1] = path[0], path[-1]
+    deadlines = start + progress * total_time
+
+    pixels = np.floor(points)
+    keep = np.ones(n, dtype=bool)
+    keep[1:] = np.any(pixels[1:] != pixels[:-1], axis=1)
+    keep[-1] = True
+    return points[keep], deadlines[keep]
+
+
+class VirtualClock:
+    """Simulated time: ``sleep`` jumps ahead instead of blocking.
+
+    Every read advances time by ``tick`` (the cost of a clock read), which
+    also guarantees that spin loops terminate.
+    """
+
+    def __init__(self, start: float = 0.0, tick: float = 1e-7) -> None:
+        self.now = start
+        self.tick = tick
+        self.wakeups = 0
+
+    def __call__(self) -> float:
+        self.now += self.tick
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.wakeups += 1
+        if seconds > 0:
+            self.now += seconds
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@dataclass
+class LatenessStats:
+    """How far behind their deadlines a run of points was dispatched (seconds)."""
+
+    count: int = 0
+    mean: float = 0.0
+    p50: float = 0.0
+    p95: float = 0.0
+    max: float = 0.0
+
+    @classmethod
+    def from_array(cls, lateness: np.ndarray) -> "LatenessStats":
+        if not len(lateness):
+            return cls()
+        p50, p95 = np.percentile(lateness, [50, 95])
+        return cls(len(lateness), float(lateness.mean()), float(p50), float(p95), float(lateness.max()))
+
+
+class Scheduler:
+    """Fires callbacks at absolute deadlines with one sleep per point.
+
+    Each wait is a single coarse sleep that stops ``spin`` seconds short of
+    the deadline, followed by a short busy-spin to land on it. ``clock`` and
+    ``sleep`` can be swapped out (e.g. for a virtual clock). With the default
+    real-time sleep, a ``stop`` event passed to ``wait_until``/``run`` is
+    waited on instead, so setting it interrupts the sleep at once.
+    """
+
+    def __init__(
+        self,
+        spin: float = 0.0015,
+        clock: Callable[[], float] = time.perf_counter,
+        sleep: Optional[Callable[[float], None]] = None,
+    ) -> None:
+        self.spin = spin
+        self.clock = clock
+        self.sleep = sleep
+        # Raw per-point lateness of the last ``run`` (seconds)
+        self.last_lateness = np.zeros(0)
+
+    def wait_until(self, deadline: float, stop: Optional[threading.Event] = None) -> float:
+        """Block until ``deadline``; return how late we woke (>= 0).
+
+        Returns early (with 0.0) if ``stop`` gets set.
+        """
+        clock = self.clock
+        remaining = deadline - clock()
+        if remaining > self.spin:
+            if self.sleep is not None:
+                self.sleep(remaining - self.spin)
+            elif stop is not None:
+                if stop.wait(remaining - self.spin):
+                    return 0.0
+            else:
+                time.sleep(remaining - self.spin)
+        now = clock()
+        while now < deadline:
+            now = clock()
+        return now - deadline
+
+    def run(
+        self,
+        deadlines: np.ndarray,
+        fire: Callable[[int], None],
+        stop: Optional[threading.Event] = None,
+    ) -> LatenessStats:
+        """Call ``fire(i)`` at each deadline in order and report lateness."""
+        lateness = np.zeros(len(deadlines))
+        done = 0
+        for i, deadline in enumerate(deadlines.tolist()):
+            late = self.wait_until(deadline, stop)
+            if stop is not None and stop.is_set():
+                break
+            lateness[i] = late
+            fire(i)
+            done += 1
+        self.last_lateness = lateness[:done]
+        return LatenessStats.from_array(self.last_lateness)
+
+
+@dataclass
+class DriftMetrics:
+    """Live timing state of a ``PlaybackClock`` (safe to read from any thread)."""
+
+    steps: int = 0
+    # Optional steps (intermediate move points) skipped because they were stale
+    dropped: int = 0
+    # Lateness of the latest step against its (possibly shifted) deadline
+    lag: float = 0.0
+    max_lag: float = 0.0
+    # Offset of the latest step from the original, unshifted timeline
+    drift: float = 0.0
+    max_drift: float = 0.0
+    # Total time the timeline was pushed back by the 'pause' policy
+    paused: float = 0.0
+    # Catch-up episodes absorbed by the 'compress' policy
+    compressed: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"steps={self.steps} dropped={self.dropped} lag={self.lag * 1e3:.2f}ms "
+            f"max_lag={self.max_lag * 1e3:.2f}ms drift={self.drift * 1e3:.2f}ms "
+            f"max_drift={self.max_drift * 1e3:.2f}ms paused={self.paused * 1e3:.1f}ms "
+            f"compressed={self.compressed}"
+        )
+
+
+class PlaybackClock:
+    """Absolute-deadline playback timeline with drift compensation.
+
+    Every deadline is measured from one fixed ``origin`` (set by ``start``),
+    so time spent in backend calls or oversleeping never accumulates, not
+    even across loops: pass ``base`` to ``run`` to place a pass on the same
+    timeline. Waits use the scheduler's sleep-then-spin.
+
+    When playback falls more than ``max_lag`` behind:
+
+    - optional steps (intermediate points of a move) whose deadline has
+      passed are skipped, so the move is shortened instead of replayed late;
+    - remaining steps follow ``policy``: ``late`` fires them as soon as
+      possible and stays on the original timeline, ``compress`` absorbs the
+      lag gradually over the next ``compress_window`` seconds, and ``pause``
+      shifts the rest of the timeline back by the lag.
+    """
+
+    def __init__(
+        self,
+        scheduler: Optional[Scheduler] = None,
+        policy: str = "late",
+        max_lag: float = 0.010,
+        compress_window: float = 0.5,
+    ) -> None:
+        if policy == "drop":
+            raise ValueError("The 'drop' catch-up policy was renamed 'late': late steps are fired late, not dropped")
+        if policy not in CATCH_UP_POLICIES:
+            raise ValueError(f"Unknown catch-up policy: {policy!r} (choose from {', '.join(CATCH_UP_POLICIES)})")
+        self.scheduler = scheduler if scheduler is not None else Scheduler()
+        self.policy = policy
+        self.max_lag = max_lag
+        self.compress_window = compress_window
+        self.origin = 0.0
+        self._shift = 0.0
+        self._comp_lag = 0.0
+        self._comp_from = 0.0
+        self.metrics = DriftMetrics()
+
+    def start(self, at: Optional[float] = None) -> None:
+        """Pin the timeline origin (default: now) and reset the metrics."""
+        self.origin = self.scheduler.clock() if at is None else at
+        self._shift = 0.0
+        self.metrics = DriftMetrics()
+
+    def at(self, offset: float) -> float:
+        """Absolute clock time of timeline ``offset`` (including any pause shift)."""
+        return self.origin + self._shift + offset
+
+    def wait(self, offset: float, stop: Optional[threading.Event] = None) -> float:
+        """Wait for timeline ``offset``; returns lateness."""
+        return self.scheduler.wait_until(self.at(offset), stop)
+
+    def run(
+        self,
+        deadlines: np.ndarray,
+        fire: Callable[[int], None],
+        optional: Optional[np.ndarray] = None,
+        stop: Optional[threading.Event] = None,
+        base: float = 0.0,
+    ) -> LatenessStats:
+        """Call ``fire(i)`` at ``base + deadlines[i]`` on the timeline."""
+        sched = self.scheduler
+        clock = sched.clock
+        skippable = optional.tolist() if optional is not None else None
+        lateness = np.zeros(len(deadlines))
+        done = 0
+        self.begin()
+        for i, d in enumerate(deadlines.tolist()):
+            offset = base + d
+            target = self.target(offset)
+            if skippable is not None and skippable[i] and clock() - target > self.max_lag:
+                self.metrics.dropped += 1
+                continue
+            late = sched.wait_until(target, stop)
+            if stop is not None and stop.is_set():
+                break
+            fire(i)
+            lateness[done] = late
+            done += 1
+            self.account(late, target, offset)
+        sched.last_lateness = lateness[:done]
+        return LatenessStats.from_array(sched.last_lateness)
+
+    # -- step bookkeeping ---------------------------------------------------
+    # ``run`` is begin, then target/wait/account per step; other drivers (the
+    # asyncio engine, the playback server's event loop) make the same calls.
+    def begin(self) -> None:
+        """Start a run of steps (ends any catch-up in progress)."""
+        # Active 'compress' episode: lag to absorb, starting at timeline offset
+        self._comp_lag = 0.0
+        self._comp_from = 0.0
+
+    def target(self, offset: float) -> float:
+        """Clock time to fire the step at timeline ``offset``, catch-up included."""
+        target = self.origin + self._shift + offset
+        if self._comp_lag:
+            left = 1.0 - (offset - self._comp_from) / self.compress_window
+            if left > 0:
+                target += self._comp_lag * left
+            else:
+                self._comp_lag = 0.0
+        return target
+
+    def account(self, late: float, target: float, offset: float) -> None:
+        """Record a step fired ``late`` seconds after ``target`` and apply the policy."""
+        m = self.metrics
+        drift = late + (target - self.origin - offset)
+        m.steps += 1
+        m.lag = late
+        m.drift = drift
+        if late > m.max_lag:
+            m.max_lag = late
+        if abs(drift) > abs(m.max_drift):
+            m.max_drift = drift
+        if late > self.max_lag:
+            if self.policy == "pause":
+                self._shift += late
+                m.paused += late
+            elif self.policy == "compress":
+                self._comp_lag = drift - self._shift
+                self._comp_from = offset
+                m.compressed += 1
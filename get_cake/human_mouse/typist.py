@@ -0,0 +1,319 @@
+"""Human-like typing: a whole string compiled into one timed key plan.
+
+``TypingModel`` turns text into keystrokes (optionally with typos that are
+noticed a few characters later and backspaced out) and gives each one a
+press time and a hold time:
+
+- the interval before a key is the base interval for ``wpm`` scaled by a
+  bigram factor: alternating hands is quicker than staying on one hand,
+  which is quicker than reusing one finger for a different key; longer
+  pauses follow sentence punctuation and line breaks. Measured per-bigram
+  factors can be passed as ``bigrams`` and take precedence;
+- every interval and hold gets log-normal noise from the model's seeded
+  generator, so the same seed and text give the same schedule;
+- uppercase letters and shifted symbols (US layout) are typed with shift
+  held: shift goes down just before the first of a run of shifted keys and
+  comes up after its last.
+
+``compile`` binds the schedule to a backend as a ``TypingPlan``: every key
+name is validated once up front, then the plan only sleeps and calls, on
+one absolute timeline, like a compiled recording.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import profiling
+from .backends import InputBackend
+from .defaults import DEFAULT_WPM
+from .playback import PlaybackPlan
+from .timing import LatenessStats, PlaybackClock
+
+# Characters typed with a named key
+_KEY_NAMES = {" ": "space", "\n": "enter", "\t": "tab"}
+BACKSPACE = "backspace"
+SHIFT = "shift"
+# Shifted symbol -> key that types it (US layout)
+_SHIFTED = dict(zip('~!@#$%^&*()_+{}|:"<>?', "`1234567890-=[]\\;',./"))
+
+# Unshifted keyboard rows and the finger (0 left pinky .. 7 right pinky) on each key
+_ROWS = ("`1234567890-=", "qwertyuiop[]\\", "asdfghjkl;'", "zxcvbnm,./")
+_ROW_FINGERS = ("0012334456777", "0123344567777", "01233445677", "0123344567")
+_LAYOUT: Dict[str, Tuple[int, int, int]] = {
+    c: (r, col, int(f))
+    for r, (row, fingers) in enumerate(zip(_ROWS, _ROW_FINGERS))
+    for col, (c, f) in enumerate(zip(row, fingers))
+}
+
+# Interval factors by how the two keys of a bigram are reached
+ALTERNATE_HANDS = 0.8
+SAME_HAND = 1.0
+SAME_FINGER = 1.35
+REPEAT_KEY = 0.9
+# Extra pause factors after punctuation and line breaks
+_PAUSE_AFTER = {".": 2.0, "!": 2.0, "?": 2.0, ",": 1.4, ";": 1.4, ":": 1.4, "\n": 2.5}
+# Seconds between making a typo and starting to backspace it out
+NOTICE_TIME = 0.35
+# Shift goes down this many seconds before the key it modifies, and up after
+SHIFT_LEAD = 0.05
+SHIFT_LAG = 0.03
+
+
+def _stroke_key(ch: str) -> Tuple[str, bool]:
+    """Backend key name for one typed character, and whether it needs shift."""
+    if ch == "\b":
+        return BACKSPACE, False
+    name = _KEY_NAMES.get(ch)
+    if name is not None:
+        return name, False
+    base = _SHIFTED.get(ch)
+    if base is not None:
+        return base, True
+    low = ch.lower()
+    if low != ch and len(low) == 1:
+        return low, True
+    return ch, False
+
+
+def _neighbours(ch: str) -> str:
+    """Keys next to ``ch`` on its row (the usual slips), in the same case."""
+    pos = _LAYOUT.get(ch.lower())
+    if pos is None or not ch.isalpha():
+        return ""
+    row = _ROWS[pos[0]]
+    near = "".join(c for c in row[max(0, pos[1] - 1):pos[1] + 2] if c != ch.lower() and c.isalpha())
+    return near.upper() if ch.isupper() else near
+
+
+@dataclass
+class KeySchedule:
+    """Key events of a typed text, in time order (seconds from the first)."""
+
+    times: np.ndarray
+    down: np.ndarray
+    keys: List[str]
+    # Characters actually typed, backspaces as "\b"
+    strokes: str
+    typos: int
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def duration(self) -> float:
+        return float(self.times[-1]) if len(self.times) else 0.0
+
+
+class TypingModel:
+    """Seedable inter-key timing model; see the module docstring."""
+
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        rng: Optional[np.random.Generator] = None,
+        wpm: float = DEFAULT_WPM,
+        typo_rate: float = 0.0,
+        jitter: float = 0.25,
+        hold: float = 0.09,
+        bigrams: Optional[Dict[str, float]] = None,
+        max_notice: int = 2,
+    ) -> None:
+        self.rng = rng if rng is not None else np.random.default_rng(seed)
+        self.wpm = wpm
+        # Chance that a letter is typed as a neighbouring key
+        self.typo_rate = typo_rate
+        # Sigma of the log-normal noise on intervals and holds
+        self.jitter = jitter
+        self.hold = hold
+        # "th" -> interval factor, e.g. measured from recordings
+        self.bigrams: Dict[str, float] = dict(bigrams or {})
+        # A typo is noticed after up to this many more characters of the same word
+        self.max_notice = max_notice
+        self._factors: Dict[str, float] = {}
+
+    def factor(self, prev: str, ch: str) -> float:
+        """Interval factor for typing ``ch`` right after ``prev``."""
+        pair = prev + ch
+        f = self._factors.get(pair)
+        if f is not None:
+            return f
+        f = self.bigrams.get(pair)
+        if f is None:
+            f = _PAUSE_AFTER.get(prev, 1.0)
+            a = _LAYOUT.get(_stroke_key(prev)[0])
+            b = _LAYOUT.get(_stroke_key(ch)[0])
+            if a is not None and b is not None:
+                if a[:2] == b[:2]:
+                    f *= REPEAT_KEY
+                elif a[2] == b[2]:
+                    f *= SAME_FINGER
+                elif (a[2] < 4) == (b[2] < 4):
+                    f *= SAME_HAND
+                else:
+                    f *= ALTERNATE_HANDS
+        self._factors[pair] = f
+        return f
+
+    def strokes(self, text: str, typo_rate: Optional[float] = None) -> Tuple[str, List[bool], int]:
+        """Characters to type for ``text`` with typos and their corrections.
+
+        Returns the strokes (backspace as ``"\\b"``), a flag per stroke for
+        "the typist just noticed a typo" and the number of typos.
+        """
+        rate = self.typo_rate if typo_rate is None else typo_rate
+        if rate <= 0:
+            return text, [False] * len(text), 0
+        rng = self.rng
+        out: List[str] = []
+        notice: List[bool] = []
+        typos = 0
+        rolls = rng.random(len(text)).tolist()
+        i = 0
+        while i < len(text):
+            ch = text[i]
+            near = _neighbours(ch) if rolls[i] < rate else ""
+            if not near:
+                out.append(ch)
+                notice.append(False)
+                i += 1
+                continue
+            typos += 1
+            out.append(near[int(rng.integers(len(near)))])
+            notice.append(False)
+            # Keep going for a few characters of the word before noticing
+            late = int(rng.integers(self.max_notice + 1))
+            j = i + 1
+            while j < len(text) and j - i - 1 < late and text[j].isalnum():
+                out.append(text[j])
+                notice.append(False)
+                j += 1
+            out.extend("\b" * (j - i))
+            notice.extend([True] + [False] * (j - i - 1))
+            out.append(ch)
+            notice.append(False)
+            i += 1
+        return "".join(out), notice, typos
+
+    def schedule(self, text: str, wpm: Optional[float] = None, typo_rate: Optional[float] = None) -> KeySchedule:
+        """Key-down/key-up events for ``text``, starting at 0."""
+        strokes, notice, typos = self.strokes(text, typo_rate)
+        n = len(strokes)
+        if not n:
+            return KeySchedule(np.zeros(0), np.zeros(0, dtype=bool), [], "", 0)
+        rng = self.rng
+        wpm = self.wpm if wpm is None else wpm
+        if wpm <= 0:
+            raise ValueError("wpm must be positive")
+        # A "word" is five characters
+        base = 12.0 / wpm
+        sigma = self.jitter
+        factors = np.array([1.0] + [self.factor(strokes[i - 1], strokes[i]) for i in range(1, n)])
+        # Bigrams and pauses shape the rhythm; the average pace stays at wpm
+        if n > 1:
+            factors[1:] /= factors[1:].mean()
+        # Log-normal noise with mean 1
+        noise = rng.lognormal(-sigma * sigma / 2.0, sigma, (2, n))
+        intervals = base * factors * noise[0]
+        intervals[0] = 0.0
+        intervals[np.asarray(notice, dtype=bool)] += NOTICE_TIME
+        press = np.cumsum(intervals)
+        release = press + self.hold * noise[1]
+
+        keys, shifted = zip(*(_stroke_key(ch) for ch in strokes))
+        # A key must be up before it is pressed again
+        for i in range(n - 1):
+            if keys[i + 1] == keys[i] and release[i] >= press[i + 1]:
+                release[i] = press[i] + 0.8 * (press[i + 1] - press[i])
+
+        times: List[float] = []
+        down: List[bool] = []
+        names: List[str] = []
+        press_l, release_l = press.tolist(), release.tolist()
+        held = False
+        for i in range(n):
+            if shifted[i] and not held:
+                gap = press_l[i] - press_l[i - 1] if i else SHIFT_LEAD
+                times.append(press_l[i] - min(SHIFT_LEAD, 0.5 * gap))
+                down.append(True)
+                names.append(SHIFT)
+                held = True
+            elif held and not shifted[i]:
+                # After the last shifted key went down, before this one does
+                up = min(release_l[i - 1] + SHIFT_LAG, press_l[i] - 0.25 * (press_l[i] - press_l[i - 1]))
+                times.append(up)
+                down.append(False)
+                names.append(SHIFT)
+                held = False
+            times += (press_l[i], release_l[i])
+            down += (True, False)
+            names += (keys[i], keys[i])
+        if held:
+            times.append(release_l[-1] + SHIFT_LAG)
+            down.append(False)
+            names.append(SHIFT)
+
+        t = np.asarray(times)
+        order = np.argsort(t, kind="stable")
+        t = t[order] - t[order[0]]
+        return KeySchedule(t, np.asarray(down)[order], [names[i] for i in order.tolist()], strokes, typos)
+
+    def compile(
+        self,
+        text: str,
+        backend: InputBackend,
+        wpm: Optional[float] = None,
+        typo_rate: Optional[float] = None,
+    ) -> "TypingPlan":
+        """Schedule ``text`` and bind it to ``backend``'s key calls.
+
+        Raises ValueError (before anything is typed) if the backend cannot
+        send one of the keys.
+        """
+        with profiling.span("typing.compile"):
+            sched = self.schedule(text, wpm, typo_rate)
+            bad = sorted(k for k in set(sched.keys) if not backend.is_valid_key(k))
+            if bad:
+                raise ValueError(f"Unsupported or invalid key: {', '.join(bad)}")
+            key_down, key_up = backend.key_down, backend.key_up
+            calls = [key_down if d else key_up for d in sched.down.tolist()]
+            args = [(k,) for k in sched.keys]
+            return TypingPlan(sched, calls, args, {key_down: key_up})
+
+
+class TypingPlan(PlaybackPlan):
+    """A compiled ``KeySchedule``.
+
+    Unlike a recording, typing never ends with a key held, so keys (shift
+    included) left down by a stop, a cancelled task or a backend error are
+    released whenever a run ends.
+    """
+
+    def __init__(
+        self,
+        schedule: KeySchedule,
+        calls: List[Callable[..., Any]],
+        args: List[tuple],
+        releases: Dict[Callable[..., Any], Callable[..., Any]],
+    ) -> None:
+        super().__init__(schedule.times, calls, args, releases=releases)
+        self.schedule = schedule
+
+    def run(
+        self,
+        clock: PlaybackClock,
+        stop: Optional[threading.Event] = None,
+        base: float = 0.0,
+    ) -> LatenessStats:
+        self.done = 0
+        fire = profiling.wrap("typing.key", self.fire)
+        try:
+            stats = clock.run(self.deadlines, fire, None, stop, base)
+        finally:
+            self.release()
+        profiling.observe("typing.lateness", clock.scheduler.last_lateness)
+        return stats
+
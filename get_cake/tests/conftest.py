@@ -0,0 +1,66 @@
+"""Shared fixtures. Everything runs headless: ``MemoryBackend`` stands in for
+the display and ``VirtualClock`` for wall time, so no input library is
+imported and no test sleeps for the length of a recording."""
+from typing import Callable, List
+
+import pytest
+
+from human_mouse.backends import MemoryBackend
+from human_mouse.playback import PreparedRecording
+from human_mouse.recording.columnar import EventColumns
+from human_mouse.recording.events import RecordedEvent
+from human_mouse.recording.store import EventStore
+from human_mouse.timing import PlaybackClock, Scheduler, VirtualClock
+
+
+@pytest.fixture
+def events() -> List[RecordedEvent]:
+    """A short session: a drag, a scroll, a right click and some keys."""
+    return [
+        RecordedEvent(10.00, "move", x=100, y=100),
+        RecordedEvent(10.02, "move", x=110, y=104),
+        RecordedEvent(10.04, "left_down", x=120, y=108),
+        RecordedEvent(10.10, "move", x=180, y=140),
+        RecordedEvent(10.15, "left_up", x=200, y=150),
+        RecordedEvent(10.50, "scroll", x=200, y=150, dx=0, dy=-3),
+        RecordedEvent(11.00, "right_down", x=400, y=300),
+        RecordedEvent(11.05, "right_up", x=400, y=300),
+        RecordedEvent(11.40, "key_down", key="shift"),
+        RecordedEvent(11.45, "key_down", key="a"),
+        RecordedEvent(11.50, "key_up", key="a"),
+        RecordedEvent(11.55, "key_up", key="shift"),
+        RecordedEvent(12.00, "key_down", key="ß"),
+        RecordedEvent(12.08, "key_up", key="ß"),
+    ]
+
+
+@pytest.fixture
+def prepare() -> Callable[..., PreparedRecording]:
+    """Build a ``PreparedRecording`` straight from events."""
+
+    def build(evs: List[RecordedEvent], **kwargs) -> PreparedRecording:
+        return PreparedRecording(EventStore(EventColumns.from_events(evs)), **kwargs)
+
+    return build
+
+
+@pytest.fixture
+def vclock() -> VirtualClock:
+    return VirtualClock()
+
+
+@pytest.fixture
+def playback(vclock: VirtualClock) -> Callable[[str], PlaybackClock]:
+    """``PlaybackClock`` factory on the virtual clock, started at its origin."""
+
+    def build(policy: str = "late", **kwargs) -> PlaybackClock:
+        clock = PlaybackClock(Scheduler(spin=0.0, clock=vclock, sleep=vclock.sleep), policy=policy, **kwargs)
+        clock.start()
+        return clock
+
+    return build
+
+
+@pytest.fixture
+def backend(vclock: VirtualClock) -> MemoryBackend:
+    return MemoryBackend((1920, 1080), position=(960, 540), clock=vclock)
@@ -0,0 +1,114 @@
+import json
+
+import numpy as np
+import pytest
+
+from human_mouse.recording.batch import (
+    ChunkWriter, _retimed, _trimmed, convert_file, iter_chunks, iter_json_events, merge_files, retime_file, trim_file,
+)
+from human_mouse.recording.columnar import EventColumns, read_columns, write_columns
+from human_mouse.recording.events import RecordedEvent
+
+
+def _dicts(events):
+    return [ev.to_dict() for ev in events]
+
+
+def _times(path):
+    return np.asarray(read_columns(path).t).tolist()
+
+
+@pytest.fixture
+def src(tmp_path, events):
+    path = str(tmp_path / "src.rec")
+    write_columns(path, EventColumns.from_events(events))
+    return path
+
+
+def test_chunk_writer_compacts_to_the_write_columns_layout(tmp_path, events):
+    path = str(tmp_path / "out.rec")
+    with ChunkWriter(path) as w:
+        # Each chunk has its own key table; the writer re-interns them
+        for lo, hi in ((0, 5), (5, 10), (10, 14)):
+            w.write(EventColumns.from_events(events[lo:hi]))
+    ref = str(tmp_path / "ref.rec")
+    write_columns(ref, EventColumns.from_events(events))
+    with open(path, "rb") as a, open(ref, "rb") as b:
+        assert a.read() == b.read()
+    assert w.stats.events == len(events)
+    assert not (tmp_path / "out.rec.tmp").exists()
+
+
+def test_aborted_chunk_writer_leaves_nothing(tmp_path, events):
+    path = tmp_path / "out.rec"
+    with pytest.raises(RuntimeError):
+        with ChunkWriter(str(path)) as w:
+            w.write(EventColumns.from_events(events))
+            raise RuntimeError
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("read_size", [7, 64, 1 << 16])
+def test_iter_json_events_across_read_boundaries(tmp_path, events, read_size):
+    path = str(tmp_path / "a.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "events": _dicts(events)}, f, indent=2, ensure_ascii=False)
+    assert list(iter_json_events(path, read_size)) == _dicts(events)
+
+
+def test_truncated_json_is_an_error(tmp_path, events):
+    path = str(tmp_path / "a.json")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"version": 1, "events": _dicts(events)})[:-40])
+    with pytest.raises(ValueError, match="Truncated"):
+        list(iter_json_events(path, 16))
+
+
+def test_convert_round_trips_both_versions(tmp_path, src, events):
+    v1 = str(tmp_path / "a.json")
+    v2 = str(tmp_path / "b.rec")
+    assert convert_file(src, v1, version=1)["events"] == len(events)
+    convert_file(v1, v2)
+    assert _dicts(read_columns(v1)) == _dicts(events)
+    assert _dicts(read_columns(v2)) == _dicts(events)
+
+
+def test_trim_keeps_the_window(tmp_path, src, events):
+    dst = str(tmp_path / "t.rec")
+    assert trim_file(src, dst, 0.03, 1.03)["events"] == 5
+    assert _times(dst) == pytest.approx([10.04, 10.10, 10.15, 10.50, 11.00])
+    chunked = EventColumns.from_events([ev for cols in _trimmed(iter_chunks(src, 3), 0.03, 1.03) for ev in cols])
+    assert np.asarray(chunked.t).tolist() == _times(dst)
+
+def test_trim_end_is_exclusive(tmp_path):
+    src = str(tmp_path / "s.rec")
+    write_columns(src, EventColumns.from_events([RecordedEvent(i * 0.5, "move", x=i, y=i) for i in range(5)]))
+    dst = str(tmp_path / "t.rec")
+    trim_file(src, dst, 0.5, 1.5)
+    assert _times(dst) == [0.5, 1.0]
+
+
+def test_retime_caps_gaps_then_speeds_up(tmp_path, src, events):
+    dst = str(tmp_path / "r.rec")
+    retime_file(src, dst, speed=2.0, max_gap=0.2)
+    t = np.array([ev.t for ev in events])
+    expected = t[0] + np.concatenate(([0.0], np.cumsum(np.minimum(np.diff(t), 0.2)))) / 2.0
+    assert _times(dst) == pytest.approx(expected.tolist())
+    chunked = [float(x) for cols in _retimed(iter_chunks(src, 4), 2.0, 0.2) for x in np.asarray(cols.t)]
+    assert chunked == pytest.approx(expected.tolist())
+    assert [ev.type for ev in read_columns(dst)] == [ev.type for ev in events]
+    with pytest.raises(ValueError):
+        retime_file(src, dst, speed=0)
+
+
+def test_merge_places_files_gap_apart(tmp_path, src, events):
+    short = str(tmp_path / "short.rec")
+    write_columns(short, EventColumns.from_events(events[8:12]))
+    dst = str(tmp_path / "m.rec")
+    assert merge_files([src, short], dst, gap=1.0)["events"] == len(events) + 4
+    t = _times(dst)
+    assert t[:len(events)] == pytest.approx([ev.t for ev in events])
+    # The second file starts 1 s after the first ends, keeping its own spacing
+    assert t[len(events):] == pytest.approx([13.08, 13.13, 13.18, 13.23])
+    with pytest.raises(ValueError, match="overwrite"):
+        merge_files([src, dst], dst)
@@ -0,0 +1,35 @@
+import json
+import os
+
+import pytest
+
+from human_mouse.recording.columnar import EventColumns, is_columnar, read_columns, write_columns
+
+
+def _dicts(events):
+    return [ev.to_dict() for ev in events]
+
+
+def test_v2_round_trip(tmp_path, events):
+    path = str(tmp_path / "a.rec")
+    write_columns(path, EventColumns.from_events(events))
+    assert is_columnar(path)
+    for mmap in (True, False):
+        assert _dicts(read_columns(path, mmap=mmap)) == _dicts(events)
+
+
+def test_v1_json_loads_as_columns(tmp_path, events):
+    path = str(tmp_path / "a.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "events": _dicts(events)}, f)
+    assert not is_columnar(path)
+    assert _dicts(read_columns(path)) == _dicts(events)
+
+
+def test_truncated_v2_file_is_an_error(tmp_path, events):
+    path = str(tmp_path / "a.rec")
+    write_columns(path, EventColumns.from_events(events))
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 5)
+    with pytest.raises(ValueError):
+        read_columns(path)
@@ -0,0 +1,116 @@
+import threading
+import time
+
+import pytest
+
+from human_mouse.recording.dispatch import EventDispatcher
+from human_mouse.recording.events import RecordedEvent
+
+
+def _key(n):
+    return RecordedEvent(float(n), "key_down", key=str(n))
+
+
+def _move(n):
+    return RecordedEvent(float(n), "move", x=n, y=n)
+
+
+def _until(cond, timeout=5.0):
+    end = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < end, "timed out"
+        time.sleep(0.001)
+
+
+class Gated:
+    """A callback that holds the dispatcher thread on its first event, so
+    the test controls exactly what is queued behind it."""
+
+    def __init__(self):
+        self.seen = []
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+
+    def __call__(self, ev):
+        self.seen.append(ev.t)
+        self.entered.set()
+        self.gate.wait(5.0)
+
+    def start(self, dispatcher, ev):
+        dispatcher.submit(ev)
+        assert self.entered.wait(5.0)
+
+
+def test_drop_discards_new_events_when_full():
+    cb = Gated()
+    d = EventDispatcher(cb, maxsize=2, policy="drop")
+    cb.start(d, _key(0))
+    for n in (1, 2, 3, 4):
+        d.submit(_key(n))
+    cb.gate.set()
+    d.close()
+    assert cb.seen == [0, 1, 2]
+    assert (d.stats.submitted, d.stats.delivered, d.stats.dropped) == (5, 3, 2)
+    assert d.stats.max_depth == 2
+
+
+def test_block_waits_for_room():
+    cb = Gated()
+    d = EventDispatcher(cb, maxsize=1, policy="block")
+    cb.start(d, _key(0))
+    d.submit(_key(1))
+    blocked = threading.Thread(target=d.submit, args=(_key(2),))
+    blocked.start()
+    _until(lambda: d.stats.submitted == 3)
+    time.sleep(0.02)
+    # Still waiting: the queue holds event 1 and the callback holds event 0
+    assert blocked.is_alive()
+    cb.gate.set()
+    blocked.join(5.0)
+    d.close()
+    assert cb.seen == [0, 1, 2]
+    assert d.stats.dropped == 0
+    assert d.stats.blocked_seconds > 0
+
+
+def test_coalesce_replaces_a_queued_move_even_when_full():
+    cb = Gated()
+    d = EventDispatcher(cb, maxsize=2, policy="coalesce")
+    cb.start(d, _key(0))
+    d.submit(_key(1))
+    d.submit(_move(2))
+    # Full: a move behind the queued move replaces it, a key is dropped
+    d.submit(_move(3))
+    d.submit(_key(4))
+    d.submit(_move(5))
+    cb.gate.set()
+    d.close()
+    assert cb.seen == [0, 1, 5]
+    assert (d.stats.coalesced, d.stats.dropped, d.stats.delivered) == (2, 1, 3)
+
+
+def test_coalesce_keeps_moves_separated_by_other_events():
+    cb = Gated()
+    d = EventDispatcher(cb, maxsize=8, policy="coalesce")
+    cb.start(d, _key(0))
+    for ev in (_move(1), _move(2), _key(3), _move(4)):
+        d.submit(ev)
+    cb.gate.set()
+    d.close()
+    assert cb.seen == [0, 2, 3, 4]
+
+
+def test_callback_errors_are_counted():
+    def fail(ev):
+        raise RuntimeError
+
+    d = EventDispatcher(fail)
+    for n in range(3):
+        d.submit(_key(n))
+    d.close()
+    assert (d.stats.delivered, d.stats.errors) == (3, 3)
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        EventDispatcher(lambda ev: None, policy="latest")
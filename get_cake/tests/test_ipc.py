@@ -0,0 +1,119 @@
+import socket
+
+import pytest
+
+from human_mouse import HumanMouse
+from human_mouse.backends import MemoryBackend
+from human_mouse.daemon import ControlDaemon
+from human_mouse.ipc import is_loopback, parse_address, request, serve
+from human_mouse.recording.columnar import EventColumns, write_columns
+from human_mouse.timing import Scheduler
+
+unix_only = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+
+
+@pytest.fixture
+def listen():
+    servers = []
+
+    def start(addr, handle, **kwargs):
+        server = serve(addr, handle, **kwargs)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _echo(msg):
+    if msg.get("cmd") == "fail":
+        raise ValueError("asked to fail")
+    return {"ok": True, "echo": msg}
+
+
+def test_parse_address():
+    assert parse_address("127.0.0.1:8765") == (socket.AF_INET, ("127.0.0.1", 8765))
+    assert parse_address(":8765") == (socket.AF_INET, ("127.0.0.1", 8765))
+    with pytest.raises(ValueError):
+        parse_address("localhost")
+
+
+@pytest.mark.parametrize("host, local", [
+    ("127.0.0.1", True), ("127.8.0.1", True), ("localhost", True), ("::1", True),
+    ("0.0.0.0", False), ("192.168.1.20", False), ("example.com", False),
+])
+def test_is_loopback(host, local):
+    assert is_loopback(host) == local
+
+
+@unix_only
+def test_unix_round_trip(tmp_path, listen):
+    addr = f"unix:{tmp_path / 's.sock'}"
+    listen(addr, _echo)
+    assert request(addr, {"cmd": "hi", "n": 1}) == {"ok": True, "echo": {"cmd": "hi", "n": 1}}
+    assert request(addr, {"cmd": "fail"}) == {"ok": False, "error": "asked to fail"}
+    # One connection, several lines, including a malformed one
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(tmp_path / "s.sock"))
+        sock.sendall(b'{"cmd": "a"}\nnot json\n[1]\n')
+        with sock.makefile("rb") as f:
+            replies = [f.readline() for _ in range(3)]
+    assert b'"echo"' in replies[0]
+    assert all(b'"ok": false' in r for r in replies[1:])
+
+
+def test_tcp_round_trip_on_loopback(listen):
+    server = listen("127.0.0.1:0", _echo)
+    port = server.server_address[1]
+    assert request(f"127.0.0.1:{port}", {"cmd": "hi"})["echo"] == {"cmd": "hi"}
+
+
+@pytest.mark.parametrize("addr", ["0.0.0.0:0", "192.168.1.20:8765", "example.com:8765"])
+def test_remote_hosts_are_refused(addr):
+    with pytest.raises(ValueError, match="Refusing to listen"):
+        serve(addr, _echo)
+
+
+def test_remote_host_with_explicit_consent(listen):
+    server = listen("0.0.0.0:0", _echo, allow_remote=True)
+    port = server.server_address[1]
+    assert request(f"127.0.0.1:{port}", {"cmd": "hi"})["ok"]
+
+
+@pytest.fixture
+def daemon(vclock):
+    mouse = HumanMouse(5, backend=MemoryBackend(position=(10, 10), clock=vclock))
+    mouse.scheduler = Scheduler(spin=0.0, clock=vclock, sleep=vclock.sleep)
+    return ControlDaemon(mouse)
+
+
+def test_daemon_commands(daemon, tmp_path, events):
+    backend = daemon.mouse.backend
+    reply = daemon.handle({"cmd": "move", "x": 640, "y": 360, "duration": 0.1})
+    assert reply["ok"] and reply["position"] == [640, 360]
+    daemon.handle({"cmd": "press", "key": "enter"})
+    daemon.handle({"cmd": "type", "text": "Hi", "seed": 1, "typos": 0})
+    path = str(tmp_path / "a.rec")
+    write_columns(path, EventColumns.from_events(events))
+    reply = daemon.handle({"cmd": "play", "input": path})
+    assert reply["skipped"] == []
+    assert backend.position() == (400, 300)
+    assert not backend.keys and not backend.buttons
+    keys = [args[0] for _, op, args in backend.calls if op == "key_down"]
+    assert keys == ["enter", "shift", "h", "i", "shift", "a", "ß"]
+    status = daemon.handle({"cmd": "status"})
+    assert status["handled"] == 4 and status["backend"] == "memory"
+    with pytest.raises(ValueError, match="Unknown command"):
+        daemon.handle({"cmd": "shutdown"})
+
+
+@unix_only
+def test_daemon_over_a_socket(daemon, tmp_path, listen):
+    addr = f"unix:{tmp_path / 'd.sock'}"
+    listen(addr, daemon.handle)
+    assert request(addr, {"cmd": "move", "x": 100, "y": 200, "duration": 0.05})["position"] == [100, 200]
+    reply = request(addr, {"cmd": "press", "key": ""})
+    assert not reply["ok"] and "invalid key" in reply["error"]
+    assert request(addr, {"cmd": "status"})["handled"] == 1
@@ -0,0 +1,90 @@
+import numpy as np
+
+from human_mouse import HumanMouse
+from human_mouse.backends import MemoryBackend
+from human_mouse.paths import PathCache, PathEngine
+
+
+def test_same_seed_gives_byte_identical_paths():
+    a = PathEngine(7).generate((10, 20), (900, 640), jitter=1.5)
+    b = PathEngine(7).generate((10, 20), (900, 640), jitter=1.5)
+    assert a.tobytes() == b.tobytes()
+
+
+def test_same_seed_gives_byte_identical_batches():
+    starts = [(0, 0), (500, 500), (1919, 10)]
+    ends = [(300, 200), (20, 1000), (960, 540)]
+    a = PathEngine(3).generate_many(starts, ends, 1.5)
+    b = PathEngine(3).generate_many(starts, ends, 1.5)
+    assert [p.tobytes() for p in a] == [p.tobytes() for p in b]
+
+
+def test_different_seeds_differ():
+    a = PathEngine(1).generate((0, 0), (800, 600))
+    b = PathEngine(2).generate((0, 0), (800, 600))
+    assert a.shape != b.shape or not np.array_equal(a, b)
+
+
+def test_path_ends_on_target():
+    path = PathEngine(5).generate((40, 30), (700, 410))
+    assert tuple(np.rint(path[-1]).astype(int)) == (700, 410)
+
+
+def test_seeded_mouse_sends_identical_moves():
+    logs = []
+    for _ in range(2):
+        backend = MemoryBackend(position=(100, 100))
+        mouse = HumanMouse(backend=backend, seed=11)
+        mouse.move_to(640, 360, duration_seconds=0.02)
+        logs.append([args for _, op, args in backend.calls if op == "move"])
+    assert logs[0] == logs[1]
+    assert logs[0][-1] == (640, 360)
+
+
+def test_cache_reuses_a_pool_per_distance_and_jitter():
+    cache = PathCache(1)
+    cache.generate((0, 0), (500, 0))
+    cache.generate((100, 100), (100, 600))
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.generate((0, 0), (50, 0))
+    cache.generate((0, 0), (500, 0), jitter=0.0)
+    assert cache.stats() == {"buckets": 3, "templates": 48, "hits": 1, "misses": 3, "evictions": 0}
+
+
+def test_cache_evicts_the_least_recently_used_pool():
+    cache = PathCache(1, max_buckets=2)
+    for d in (100, 1000, 100, 300):
+        cache.generate((0, 0), (d, 0))
+    assert (cache.misses, cache.hits, cache.evictions) == (3, 1, 1)
+    # 1000 px was the least recently used and went; 100 px is still cached
+    cache.generate((0, 0), (100, 0))
+    assert cache.hits == 2
+
+
+def test_cached_bow_stays_within_the_variation():
+    # One template, so every path's bow is the template's times (1 +- variation)
+    cache = PathCache(3, pool_size=1, variation=0.15)
+    cross = np.array([cache.generate((100, 200), (700, 200))[:, 1] - 200 for _ in range(300)])
+    peaks, lows = cross.max(axis=1), -cross.min(axis=1)
+    bows = np.maximum(peaks, lows)
+    assert bows.max() / bows.min() <= 1.15 / 0.85 + 1e-9
+    assert bows.max() / bows.min() > 1.2
+    # Mirrored to both sides
+    assert (peaks > lows).any() and (peaks < lows).any()
+
+
+def test_cached_paths_start_and_end_exactly():
+    rng = np.random.default_rng(0)
+    cache = PathCache(4)
+    starts = rng.integers(0, 1920, (200, 2))
+    ends = rng.integers(0, 1080, (200, 2))
+    for s, e, path in zip(starts, ends, cache.generate_many(starts, ends, 1.5)):
+        assert np.allclose(path[0], s)
+        assert tuple(path[-1]) == tuple(e.astype(float))
+    assert cache.generate((5, 5), (5, 5)).tolist() == [[5.0, 5.0]]
+
+
+def test_seeded_cache_is_reproducible():
+    a = PathCache(9).generate_many([(0, 0), (10, 900)], [(800, 600), (1500, 20)])
+    b = PathCache(9).generate_many([(0, 0), (10, 900)], [(800, 600), (1500, 20)])
+    assert [p.tobytes() for p in a] == [p.tobytes() for p in b]
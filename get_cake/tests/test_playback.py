@@ -0,0 +1,77 @@
+import threading
+
+import numpy as np
+import pytest
+
+from human_mouse.backends import MemoryBackend
+
+from human_mouse.playback import compile_plan, warp_times
+
+
+def test_warp_speed_scales_from_the_first_event():
+    t = np.array([10.0, 10.5, 12.0, 13.0])
+    assert warp_times(t, speed=2.0).tolist() == pytest.approx([10.0, 10.25, 11.0, 11.5])
+
+
+def test_warp_shrinks_idle_gaps():
+    t = np.array([0.0, 1.0, 31.0, 32.0, 92.0])
+    assert warp_times(t, idle_gap=5.0).tolist() == pytest.approx([0.0, 1.0, 6.0, 7.0, 12.0])
+    assert warp_times(t, idle_gap=5.0, idle_to=2.0).tolist() == pytest.approx([0.0, 1.0, 3.0, 4.0, 6.0])
+    # idle_to never lengthens a gap
+    assert warp_times(t, idle_gap=5.0, idle_to=9.0).tolist() == pytest.approx([0.0, 1.0, 6.0, 7.0, 12.0])
+
+
+def test_warp_gaps_then_speed():
+    t = np.array([0.0, 1.0, 31.0])
+    assert warp_times(t, speed=2.0, idle_gap=5.0).tolist() == pytest.approx([0.0, 0.5, 3.0])
+
+
+def test_warp_identity_and_errors():
+    t = np.array([1.0, 2.0, 4.0])
+    assert warp_times(t) is t
+    assert warp_times(t[:1], speed=3.0).tolist() == [1.0]
+    with pytest.raises(ValueError):
+        warp_times(t, speed=0.0)
+
+
+def test_prepared_recording_applies_the_warp(prepare, events):
+    plain = prepare(events, move_rate=0)
+    fast = prepare(events, move_rate=0, speed=2.0, idle_gap=0.2)
+    assert plain.offsets[-1] == pytest.approx(2.08)
+    assert fast.offsets == pytest.approx(warp_times(np.array(plain.offsets), 2.0, 0.2).tolist())
+
+
+def test_plan_positions(prepare, events, backend):
+    plan = compile_plan(prepare(events), backend)
+    assert plan.first == (100, 100)
+    # The last positioned event is the right click
+    assert plan.end == (400, 300)
+    assert plan.skipped == []
+
+
+def test_stop_releases_what_the_plan_left_held(prepare, events, playback, vclock):
+    stop = threading.Event()
+
+    class StopOnA(MemoryBackend):
+        def key_down(self, key: str) -> None:
+            super().key_down(key)
+            if key == "a":
+                stop.set()
+
+    backend = StopOnA(clock=vclock)
+    plan = compile_plan(prepare(events), backend)
+    plan.run(playback(), stop)
+    assert not backend.keys and not backend.buttons
+    assert {args[0] for _, op, args in backend.calls[-2:] if op == "key_up"} == {"shift", "a"}
+
+
+def test_completed_run_keeps_the_recorded_state(prepare, events, playback, vclock):
+    backend = MemoryBackend(clock=vclock)
+    plan = compile_plan(prepare(events[:3]), backend)
+    plan.run(playback())
+    # The recording ends mid-drag; only an explicit release lets go
+    assert backend.buttons == {"left"}
+    plan.release()
+    assert not backend.buttons
+    plan.release()
+    assert [op for _, op, _ in backend.calls].count("mouse_up") == 1
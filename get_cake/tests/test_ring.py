@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from human_mouse.recording.columnar import read_columns
+from human_mouse.recording.events import RecordedEvent
+from human_mouse.recording.ring import RingBuffer
+
+
+def _fill(ring, times, key=None):
+    for t in times:
+        ring.push(RecordedEvent(float(t), "key_down", key=key) if key else RecordedEvent(float(t), "move", x=int(t), y=0))
+
+
+def _times(ring):
+    return np.asarray(ring.columns().t).tolist()
+
+
+def test_exactly_full_loses_nothing():
+    ring = RingBuffer(max_events=4)
+    _fill(ring, range(4))
+    assert _times(ring) == [0, 1, 2, 3]
+    assert ring.stats() == {"events": 4, "capacity": 4, "total": 4, "overwritten": 0, "dropped": 0}
+
+
+@pytest.mark.parametrize("n", [5, 8, 11])
+def test_wrap_around_keeps_the_newest_in_order(n):
+    ring = RingBuffer(max_events=4)
+    _fill(ring, range(n))
+    assert _times(ring) == list(range(n - 4, n))
+    assert [ev.x for ev in ring.columns()] == list(range(n - 4, n))
+    assert (len(ring), ring.total, ring.overwritten) == (4, n, n - 4)
+
+
+def test_overflow_without_overwrite_keeps_the_oldest():
+    ring = RingBuffer(max_events=4, overwrite=False)
+    _fill(ring, range(6))
+    assert _times(ring) == [0, 1, 2, 3]
+    assert (ring.total, ring.dropped, ring.overwritten) == (6, 2, 0)
+
+
+def test_overwritten_counts_only_events_inside_the_window():
+    ring = RingBuffer(seconds=1.0, max_events=4)
+    # Slots hold 0..3; pushing 4 and 5 evicts 0 and 1, which are older than 1 s
+    _fill(ring, range(6))
+    assert ring.overwritten == 0
+    # These evict 2, 3 and 4 (too old), then 5, still inside the window
+    _fill(ring, [5.5, 5.6, 5.7, 5.8])
+    assert ring.overwritten == 1
+
+
+def test_columns_trim_to_the_time_window():
+    ring = RingBuffer(seconds=1.0, max_events=100)
+    _fill(ring, np.arange(20) * 0.25)
+    # The newest event is 4.75; the window starts at 3.75
+    assert _times(ring) == [3.75, 4.0, 4.25, 4.5, 4.75]
+    assert len(ring) == 20
+
+
+def test_snapshot_then_clear_drains(tmp_path):
+    ring = RingBuffer(max_events=3)
+    _fill(ring, range(5), key="a")
+    path = str(tmp_path / "ring.rec")
+    assert ring.snapshot(path) == 3
+    assert [(ev.t, ev.key) for ev in read_columns(path)] == [(2.0, "a"), (3.0, "a"), (4.0, "a")]
+    assert not (tmp_path / "ring.rec.tmp").exists()
+    ring.clear()
+    assert len(ring) == 0 and len(ring.columns()) == 0
+    _fill(ring, [7, 8])
+    assert _times(ring) == [7, 8]
+    assert ring.stats()["total"] == 2
+
+
+def test_needs_a_size():
+    with pytest.raises(ValueError):
+        RingBuffer()
+    with pytest.raises(ValueError):
+        RingBuffer(max_events=0)
+    assert RingBuffer(seconds=2.0).capacity == 500
@@ -0,0 +1,83 @@
+import pytest
+
+from human_mouse import HumanMouse
+from human_mouse.backends import MemoryBackend
+from human_mouse.recording.columnar import EventColumns, write_columns
+from human_mouse.script import ScriptRunner, parse_text
+from human_mouse.timing import Scheduler
+
+
+def test_parse_text_steps():
+    steps = parse_text('move 800 500 speed=fast  # go\n\nleft-click\ntype "jane doe" wpm=90 typos=0.02\n'
+                       "play login.rec from=2 to=8\n")
+    assert [(s.cmd, s.args, s.line) for s in steps] == [
+        ("move", {"x": 800, "y": 500, "speed": "fast"}, 1),
+        ("left-click", {}, 3),
+        ("type", {"text": "jane doe", "wpm": 90, "typos": 0.02}, 4),
+        ("play", {"input": "login.rec", "start": 2, "end": 8}, 5),
+    ]
+
+
+@pytest.mark.parametrize("text", ["a=b", "https://x.com/?q=1", "wpm=90", "8"])
+def test_typed_text_is_taken_as_written(text):
+    (step,) = parse_text(f'type "{text}" wpm=60')
+    assert step.args == {"text": text, "wpm": 60}
+
+
+@pytest.mark.parametrize("line, error", [
+    ("move 100 speed=fast", "takes 2 argument"),
+    ("move 1 2 3", "takes 2 argument"),
+    ("type", "takes 1 argument"),
+    ('type "hi" loud=1', "unknown option 'loud'"),
+    ("jump 1", "unknown step"),
+])
+def test_bad_lines(line, error):
+    with pytest.raises(ValueError, match=error):
+        parse_text(line)
+
+
+def _runner(vclock, **backend):
+    mouse = HumanMouse(3, backend=MemoryBackend(position=(0, 0), clock=vclock, **backend))
+    mouse.scheduler = Scheduler(spin=0.0, clock=vclock, sleep=vclock.sleep)
+    return ScriptRunner(mouse)
+
+
+def test_step_is_replanned_after_a_hand_move(vclock):
+    runner = _runner(vclock)
+    backend = runner.mouse.backend
+
+    def on_step(r):
+        # The next move was planned from (300, 300) while this one ran
+        if r.index == 0:
+            backend.move(900, 900)
+
+    results = runner.run(parse_text("move 300 300 duration=0.2\nmove 600 400 duration=0.2"), on_step)
+    assert [r.replanned for r in results] == [False, True]
+    moves = [args for _, op, args in backend.calls if op == "move"]
+    after = moves[moves.index((900, 900)) + 1:]
+    # The replanned path leaves from where the hand put the cursor
+    assert abs(after[0][0] - 900) + abs(after[0][1] - 900) < 40
+    assert after[-1] == (600, 400)
+
+
+def test_failing_step_stops_the_run(vclock):
+    runner = _runner(vclock, valid_key=lambda k: k != "q")
+    seen = []
+    results = runner.run(parse_text("move 10 10 duration=0.1\npress q\nmove 50 50 duration=0.1"), seen.append)
+    assert [r.index for r in results] == [0, 1] and seen == results
+    assert results[0].error is None
+    assert "q" in results[1].error
+    assert runner.mouse.backend.position() == (10, 10)
+
+
+def test_planned_end_chains_across_steps(tmp_path, vclock, events):
+    path = str(tmp_path / "a.rec")
+    write_columns(path, EventColumns.from_events(events))
+    runner = _runner(vclock)
+    script = f'move 200 200 duration=0.2\nplay "{path}"\ntype hi\nmove 700 500 duration=0.2'
+    results = runner.run(parse_text(script))
+    assert [r.error for r in results] == [None] * 4
+    # Each step was planned from where the one before it left the cursor
+    assert not any(r.replanned for r in results)
+    assert results[1].planned == pytest.approx(2.08)
+    assert runner.mouse.backend.position() == (700, 500)
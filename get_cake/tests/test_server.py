@@ -0,0 +1,128 @@
+import threading
+
+import pytest
+
+from human_mouse.recording.columnar import EventColumns, write_columns
+from human_mouse.server import STATE_IDLE, STATE_PLAYING, PlaybackServer
+from human_mouse.timing import Scheduler
+
+# Offsets of the fixture recording's key events
+SHIFT_A_DOWN = 1.45
+END = 2.08
+
+
+@pytest.fixture
+def recording(tmp_path, events):
+    path = str(tmp_path / "a.rec")
+    write_columns(path, EventColumns.from_events(events))
+    return path
+
+
+@pytest.fixture
+def server(vclock):
+    server = PlaybackServer(scheduler=Scheduler(spin=0.0, clock=vclock, sleep=vclock.sleep))
+    yield server
+    server._worker.shutdown()
+
+
+def _open(server, vclock, name, recording, **load):
+    assert server.handle({"cmd": "open", "session": name, "backend": "memory"})["ok"]
+    backend = server.sessions[name].backend
+    # Stamp the backend's log on the virtual clock
+    backend.clock = vclock
+    assert server.handle(dict({"cmd": "load", "session": name, "path": recording, "lerp": False}, **load))["ok"]
+    return backend
+
+
+def _keys(backend, origin):
+    return [(round(t - origin, 4), op, args[0]) for t, op, args in backend.calls if op.startswith("key")]
+
+
+def test_play_then_stop_releases_held_inputs(server, vclock, recording):
+    backend = _open(server, vclock, "a", recording)
+    assert server.handle({"cmd": "start", "session": "a"})["state"] == STATE_PLAYING
+    origin = server.sessions["a"].clock.origin
+    server.run_until(origin + SHIFT_A_DOWN + 0.01)
+    assert backend.keys == {"shift", "a"}
+    reply = server.handle({"cmd": "stop", "session": "a"})
+    assert reply["state"] == STATE_IDLE
+    assert not backend.keys and not backend.buttons
+    n = len(backend.calls)
+    # The wakeups still queued belong to the stopped run
+    server.run_until(origin + 5.0)
+    assert len(backend.calls) == n
+
+
+def test_steps_fire_on_their_deadlines(server, vclock, recording, events):
+    backend = _open(server, vclock, "a", recording)
+    server.handle({"cmd": "start", "session": "a"})
+    origin = server.sessions["a"].clock.origin
+    server.run_until(origin + 5.0)
+    keys = [(round(ev.t - 10.0, 4), ev.type, ev.key) for ev in events if ev.key]
+    assert _keys(backend, origin) == keys
+    status = server.handle({"cmd": "status", "session": "a"})
+    assert status["state"] == STATE_IDLE and status["passes"] == 1
+    assert status["drift"]["max_lag"] < 1e-5
+
+
+def test_loop_count(server, vclock, recording):
+    backend = _open(server, vclock, "a", recording)
+    server.handle({"cmd": "start", "session": "a", "loop": True, "pause": 0.5})
+    origin = server.sessions["a"].clock.origin
+    # Passes start at 0, 2.58 and 5.16 on one timeline
+    server.run_until(origin + 2 * (END + 0.5) + END + 0.01)
+    assert server.sessions["a"].passes == 3
+    assert server.sessions["a"].state == STATE_PLAYING
+    downs = [round(t - origin, 4) for t, op, args in backend.calls if op == "key_down" and args[0] == "a"]
+    assert downs == pytest.approx([1.45, 1.45 + 2.58, 1.45 + 2 * 2.58], abs=1e-4)
+    server.handle({"cmd": "stop", "session": "a"})
+    server.run_until(origin + 20.0)
+    assert server.sessions["a"].passes == 3
+
+
+def test_restart_drops_the_earlier_run(server, vclock, recording):
+    backend = _open(server, vclock, "a", recording)
+    server.handle({"cmd": "start", "session": "a"})
+    server.run_until(server.sessions["a"].clock.origin + 1.0)
+    server.handle({"cmd": "start", "session": "a"})
+    server.run_until(vclock.now + 5.0)
+    downs = [args[0] for _, op, args in backend.calls if op == "key_down"]
+    # Only the second run got as far as the keys
+    assert downs == ["shift", "a", "ß"]
+    assert server.sessions["a"].passes == 1
+
+
+def test_sessions_share_one_timer_queue(server, vclock, recording):
+    a = _open(server, vclock, "a", recording)
+    b = _open(server, vclock, "b", recording, speed=2)
+    server.handle({"cmd": "start", "session": "a"})
+    server.handle({"cmd": "start", "session": "b"})
+    server.run_until(vclock.now + 5.0)
+    at = server.sessions["a"].clock.origin
+    bt = server.sessions["b"].clock.origin
+    assert [t for t, _, _ in _keys(a, at)] == [1.4, 1.45, 1.5, 1.55, 2.0, 2.08]
+    assert [t for t, _, _ in _keys(b, bt)] == [0.7, 0.725, 0.75, 0.775, 1.0, 1.04]
+    status = server.handle({"cmd": "status"})
+    assert [s["passes"] for s in status["sessions"]] == [1, 1]
+
+
+def test_close_of_an_unknown_session(server):
+    reply = server.handle({"cmd": "close", "session": "nope"})
+    assert not reply["ok"] and "No such session" in reply["error"]
+
+
+def test_stop_while_the_compile_is_pending(server, vclock, recording):
+    backend = _open(server, vclock, "a", recording)
+    gate = threading.Event()
+    # Hold the compile worker so the start's plan cannot finish yet
+    server._worker.submit(gate.wait)
+    server.handle({"cmd": "start", "session": "a"})
+    assert server.sessions["a"].waiting
+    assert server.handle({"cmd": "stop", "session": "a"})["state"] == STATE_IDLE
+    gate.set()
+    server._worker.submit(int).result()
+    server.run_until(vclock.now + 5.0)
+    # The late compile belongs to the stopped run and starts nothing
+    assert backend.calls == []
+    assert server.sessions["a"].state == STATE_IDLE
+    assert server.sessions["a"].plan is None
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from human_mouse.recording.events import RecordedEvent
+from human_mouse.recording.simplify import RDPSimplifier, make_simplifier, rdp_keep
+
+
+def _track(n=400, seed=0):
+    """A wobbly hand-like trace sampled at 250 Hz."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / 250.0
+    x = 100 + 300 * t + 40 * np.sin(6 * t) + rng.normal(0, 0.6, n)
+    y = 200 + 120 * np.cos(4 * t) + rng.normal(0, 0.6, n)
+    return t, np.rint(x), np.rint(y)
+
+
+def _max_error(t, x, y, keep):
+    """Largest distance between each point and playback's linear
+    interpolation of the kept points at that point's timestamp."""
+    kt = t[keep]
+    px = np.interp(t, kt, x[keep])
+    py = np.interp(t, kt, y[keep])
+    return float(np.hypot(x - px, y - py).max())
+
+
+@pytest.mark.parametrize("tolerance", [0.5, 1.5, 4.0])
+def test_rdp_stays_within_tolerance(tolerance):
+    t, x, y = _track()
+    keep = rdp_keep(t, x, y, tolerance)
+    assert keep[0] and keep[-1]
+    assert _max_error(t, x, y, keep) <= tolerance + 1e-9
+    assert keep.sum() < len(t)
+
+
+def test_rdp_keeps_fewer_points_at_higher_tolerance():
+    t, x, y = _track()
+    assert rdp_keep(t, x, y, 4.0).sum() < rdp_keep(t, x, y, 0.5).sum()
+
+
+def test_straight_constant_speed_line_keeps_endpoints_only():
+    t = np.linspace(0.0, 1.0, 50)
+    keep = rdp_keep(t, 10 + 100 * t, 20 + 50 * t, 0.5)
+    assert np.flatnonzero(keep).tolist() == [0, 49]
+
+
+def test_sliding_window_simplifier_stays_within_tolerance():
+    t, x, y = _track(1000)
+    simplifier = RDPSimplifier(tolerance=1.5, window=64)
+    out = []
+    for ti, xi, yi in zip(t.tolist(), x.astype(int).tolist(), y.astype(int).tolist()):
+        out += simplifier.feed(RecordedEvent(ti, "move", x=xi, y=yi))
+    out += simplifier.flush()
+    kept = {ev.t for ev in out}
+    keep = np.array([ti in kept for ti in t.tolist()])
+    assert keep[0] and keep[-1]
+    assert _max_error(t, x, y, keep) <= 1.5 + 1e-9
+
+
+def test_make_simplifier_specs():
+    assert make_simplifier("none") is None
+    rdp = make_simplifier("rdp:2.5:32")
+    assert isinstance(rdp, RDPSimplifier)
+    assert (rdp.tolerance, rdp.window) == (2.5, 32)
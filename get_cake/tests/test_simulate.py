@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from human_mouse.backends import MemoryBackend
+from human_mouse.recording.columnar import EventColumns, write_columns
+from human_mouse.recording.events import RecordedEvent as E
+from human_mouse.simulate import simulate, validate_file, write_report
+
+
+def test_clean_recording_is_ok(prepare, events):
+    sim = simulate(prepare(events), seed=1)
+    assert sim.ok, sim.issues
+    assert sim.held == []
+    assert sim.position == (400, 300)
+    assert sim.duration == pytest.approx(2080, abs=5)
+    assert len(sim.scrolls) == 1 and sim.scrolls[0, 1] == -3
+
+
+def test_state_at_reconstructs_held_inputs(prepare, events):
+    sim = simulate(prepare(events), lerp=False)
+    assert sim.state_at(100) == ["left"]
+    assert sorted(sim.state_at(1470)) == ["key:a", "key:shift"]
+    assert sim.state_at(2100) == []
+
+
+def test_unmatched_release_and_stuck_button(prepare):
+    sim = simulate(prepare([
+        E(0.0, "left_up", x=10, y=10),
+        E(0.1, "right_down", x=20, y=20),
+        E(0.2, "key_down", key="ctrl"),
+    ]), lerp=False)
+    assert sim.counts == {"unmatched_up": 1, "stuck": 2}
+    assert sim.held == ["key:ctrl", "right"]
+
+
+def test_double_mouse_down_is_flagged(prepare):
+    sim = simulate(prepare([
+        E(0.0, "left_down", x=50, y=50),
+        E(0.1, "left_down", x=50, y=50),
+        E(0.2, "left_up", x=50, y=50),
+    ]), lerp=False)
+    assert sim.counts == {"double_down": 1}
+
+
+def test_key_auto_repeat_is_not_flagged(prepare):
+    sim = simulate(prepare([E(0.0 + 0.03 * i, "key_down", key="shift") for i in range(10)]
+                           + [E(0.5, "key_up", key="shift")]), lerp=False)
+    assert sim.ok, sim.issues
+
+
+def test_off_screen_and_failsafe_corner(prepare):
+    sim = simulate(prepare([
+        E(0.0, "move", x=100, y=100),
+        E(0.1, "move", x=-5, y=300),
+        E(0.2, "move", x=0, y=0),
+        E(0.3, "move", x=2000, y=300),
+    ], move_rate=0), screen=(1920, 1080), lerp=False)
+    assert sim.counts == {"out_of_bounds": 2, "failsafe_corner": 1}
+
+
+def test_infeasible_generated_move(prepare):
+    sim = simulate(prepare([
+        E(0.0, "left_down", x=10, y=10),
+        E(0.01, "left_up", x=1900, y=1000),
+    ]), seed=0)
+    assert sim.counts.get("infeasible_move") == 1
+
+
+def test_invalid_keys_against_the_target_key_table(prepare, events):
+    prepared = prepare(events)
+    assert simulate(prepared, lerp=False).ok
+    keys = MemoryBackend(valid_key=lambda k: k.isascii())
+    sim = simulate(prepared, lerp=False, keys=keys)
+    assert sim.counts == {"invalid_key": 1}
+    assert "'ß'" in sim.issues[0].message
+
+
+def test_backend_latency_makes_playback_fall_behind(prepare, events):
+    assert "behind" in simulate(prepare(events), seed=0, latency=0.03).counts
+
+
+def test_validate_file_and_report(tmp_path, events):
+    good = str(tmp_path / "good.rec")
+    bad = str(tmp_path / "bad.rec")
+    write_columns(good, EventColumns.from_events(events))
+    write_columns(bad, EventColumns.from_events(events[:3]))
+    results = [validate_file(good), validate_file(bad), validate_file(bad, ignore=("stuck",))]
+    assert results[0]["ok"] and results[0]["events"] == len(events)
+    assert results[1]["issues"] == {"stuck": 1}
+    assert results[2]["ok"]
+    doc = write_report(str(tmp_path / "report.json"), results)
+    assert doc["totals"]["failed"] == 1
+    with open(tmp_path / "report.json", encoding="utf-8") as f:
+        assert json.load(f)["totals"]["issues"] == {"stuck": 1}
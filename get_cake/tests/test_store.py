@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from human_mouse.recording.columnar import EventColumns, write_columns
+from human_mouse.recording.events import RecordedEvent
+from human_mouse.recording.store import EventStore
+
+
+@pytest.fixture
+def store():
+    # 1000 moves 10 ms apart from t=5.0; a small stride exercises the sparse index
+    evs = [RecordedEvent(5.0 + i * 0.01, "move", x=i, y=i) for i in range(1000)]
+    return EventStore(EventColumns.from_events(evs), stride=16)
+
+
+def test_seek_finds_first_event_at_or_after(store):
+    t = np.asarray(store.columns.t)
+    for q in (0.0, 5.0, 5.005, 7.33, 14.99, 20.0):
+        assert store.seek(q) == int(np.searchsorted(t, q, side="left"))
+
+
+def test_window_is_half_open(store):
+    w = store.window(6.0, 6.5)
+    assert len(w) == 50
+    assert w.start_time == pytest.approx(6.0)
+    assert w.end_time == pytest.approx(6.49)
+    assert w[0].x == 100 and w[-1].x == 149
+
+
+def test_window_open_ends(store):
+    assert len(store.window()) == len(store)
+    assert len(store.window(t1=5.1)) == 10
+    assert len(store.window(t0=14.9)) == 10
+    assert len(store.window(8.0, 7.0)) == 0
+
+
+def test_nested_views_seek_within_the_view(store):
+    w = store.window(6.0, 8.0)
+    assert w.seek(6.0) == 0
+    assert w.seek(7.0) == 100
+    assert w.seek(1.0) == 0
+    assert w.seek(100.0) == len(w)
+    inner = w.window_relative(0.5, 1.0)
+    assert [ev.x for ev in inner] == list(range(150, 200))
+
+
+def test_window_relative_matches_trim_semantics(store):
+    w = store.window_relative(1.0, 2.0)
+    assert (w[0].x, w[-1].x) == (100, 199)
+
+
+def test_slices_are_views(store):
+    part = store[10:20]
+    assert len(part) == 10
+    assert part[0].x == 10
+    assert np.shares_memory(part.columns.t, store.columns.t)
+    with pytest.raises(ValueError):
+        store[::2]
+
+
+def test_open_memory_maps_the_file(tmp_path, store):
+    path = str(tmp_path / "a.rec")
+    write_columns(path, store.columns)
+    opened = EventStore.open(path, stride=16)
+    assert len(opened) == len(store)
+    assert opened.seek(7.0) == store.seek(7.0)
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from human_mouse.recording.columnar import EventColumns, encode_segment, read_columns, stream_header
+from human_mouse.recording.stream import StreamWriter, compact
+
+
+def _dicts(events):
+    return [ev.to_dict() for ev in events]
+
+
+def _stream(path, events, batch_size):
+    writer = StreamWriter(path, batch_size=batch_size, flush_interval=60.0)
+    for ev in events:
+        writer.push(ev)
+    writer.close()
+    return writer
+
+
+def test_stream_round_trip_and_compact(tmp_path, events):
+    path = str(tmp_path / "s.rec")
+    writer = _stream(path, events, batch_size=4)
+    assert writer.count == len(events)
+    assert writer.segments > 1
+    assert _dicts(read_columns(path)) == _dicts(events)
+    dst = str(tmp_path / "c.rec")
+    assert compact(path, dst) == len(events)
+    assert _dicts(read_columns(dst)) == _dicts(events)
+
+
+def _segments(path, events, size):
+    """A streamed file with segments of exactly ``size`` events, as
+    ``StreamWriter`` writes them."""
+    key_index = {}
+    with open(path, "wb") as f:
+        f.write(stream_header())
+        for i in range(0, len(events), size):
+            known = len(key_index)
+            cols = EventColumns.from_events(events[i:i + size], key_index=key_index)
+            f.write(encode_segment(cols, cols.keys[known:]))
+
+
+@pytest.mark.parametrize("cut", [1, 8, 40])
+def test_torn_stream_keeps_complete_segments(tmp_path, events, cut):
+    path = str(tmp_path / "s.rec")
+    _segments(path, events, 5)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - cut)
+    # The last segment (4 of 14 events) is torn; the first two survive
+    assert _dicts(read_columns(path)) == _dicts(events[:10])
+
+
+def test_corrupt_stream_segment_is_dropped(tmp_path, events):
+    path = str(tmp_path / "s.rec")
+    _segments(path, events, 5)
+    size = os.path.getsize(path)
+    with open(path, "r+b") as f:
+        f.seek(size - 16)
+        byte = f.read(1)
+        f.seek(size - 16)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    assert _dicts(read_columns(path)) == _dicts(events[:10])
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from human_mouse.timing import PlaybackClock
+
+STEP = 0.01
+SLOW = 2
+COST = 0.05
+
+
+def _play(clock, vclock, n=20, optional=None):
+    """Run ``n`` steps ``STEP`` apart; step ``SLOW`` takes ``COST`` seconds.
+    Returns the fire time of each step relative to the clock's origin."""
+    fired = {}
+
+    def fire(i):
+        fired[i] = vclock.now - clock.origin
+        if i == SLOW:
+            vclock.advance(COST)
+
+    clock.run(np.arange(n) * STEP, fire, optional)
+    return fired
+
+
+def test_on_time_without_slow_steps(playback, vclock):
+    clock = playback("late")
+    fired = {}
+    clock.run(np.arange(10) * STEP, lambda i: fired.setdefault(i, vclock.now - clock.origin))
+    assert [fired[i] for i in range(10)] == pytest.approx([i * STEP for i in range(10)], abs=1e-5)
+    assert clock.metrics.max_lag < 1e-5
+
+
+def test_late_fires_behind_then_rejoins_the_original_timeline(playback, vclock):
+    clock = playback("late")
+    fired = _play(clock, vclock)
+    # Steps due during the slow call fire as soon as it returns...
+    for i in range(SLOW + 1, 7):
+        assert fired[i] == pytest.approx(SLOW * STEP + COST, abs=1e-5)
+    # ...and later ones on their original deadlines
+    for i in range(8, 20):
+        assert fired[i] == pytest.approx(i * STEP, abs=1e-5)
+    m = clock.metrics
+    assert m.max_lag == pytest.approx(COST - STEP, abs=1e-5)
+    assert m.paused == 0 and m.compressed == 0
+
+
+def test_old_drop_name_is_rejected():
+    with pytest.raises(ValueError, match="renamed 'late'"):
+        PlaybackClock(policy="drop")
+    with pytest.raises(ValueError, match="Unknown catch-up policy"):
+        PlaybackClock(policy="skip")
+
+
+def test_pause_shifts_the_rest_of_the_timeline(playback, vclock):
+    clock = playback("pause")
+    fired = _play(clock, vclock)
+    lag = COST - STEP
+    for i in range(SLOW + 2, 20):
+        assert fired[i] == pytest.approx(i * STEP + lag, abs=1e-5)
+    assert clock.metrics.paused == pytest.approx(lag, abs=1e-5)
+
+
+def test_compress_absorbs_the_lag_over_the_window(playback, vclock):
+    clock = playback("compress", compress_window=0.5)
+    fired = _play(clock, vclock, n=100)
+    behind = [fired[i] - i * STEP for i in range(100)]
+    # Behind right after the slow step, shrinking steadily, back on time after the window
+    assert behind[SLOW + 2] > 0.03
+    assert all(a >= b - 1e-5 for a, b in zip(behind[SLOW + 2:], behind[SLOW + 3:]))
+    assert 0.0 < behind[30] < behind[SLOW + 2]
+    assert behind[-1] == pytest.approx(0.0, abs=1e-5)
+    assert clock.metrics.compressed == 1
+
+
+def test_stale_optional_steps_are_skipped(playback, vclock):
+    clock = playback("late")
+    optional = np.ones(20, dtype=bool)
+    optional[[SLOW, 10, 19]] = False
+    fired = _play(clock, vclock, optional=optional)
+    # Optional points that went stale during the slow call are not replayed
+    assert 3 not in fired and 10 in fired and 19 in fired
+    assert clock.metrics.dropped >= 3
+    assert fired[19] == pytest.approx(19 * STEP, abs=1e-5)
+
+
+def test_base_places_passes_on_one_timeline(playback, vclock):
+    clock = playback("late")
+    stamps = []
+    for base in (0.0, 1.0):
+        clock.run(np.array([0.0, 0.1]), lambda i: stamps.append(vclock.now - clock.origin), base=base)
+    assert stamps == pytest.approx([0.0, 0.1, 1.0, 1.1], abs=1e-5)
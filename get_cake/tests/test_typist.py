@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from human_mouse.backends import MemoryBackend
+from human_mouse.typist import _SHIFTED, TypingModel
+
+TEXT = 'Hello, World! "Quoted" 50% off\tthen\na new line.'
+
+_NAMED = {"space": " ", "enter": "\n", "tab": "\t"}
+_UNSHIFT = {base: sym for sym, base in _SHIFTED.items()}
+
+
+def _retype(keys, downs):
+    """The text a key-event stream produces on a US keyboard."""
+    out = []
+    shift = False
+    for key, down in zip(keys, downs):
+        if key == "shift":
+            shift = down
+        elif not down:
+            continue
+        elif key == "backspace":
+            out.pop()
+        else:
+            ch = _NAMED.get(key, key)
+            if shift:
+                ch = ch.upper() if ch.isalpha() else _UNSHIFT[ch]
+            out.append(ch)
+    return "".join(out)
+
+
+@pytest.mark.parametrize("typo_rate", [0.0, 0.3])
+def test_schedule_types_the_text(typo_rate):
+    sched = TypingModel(4, typo_rate=typo_rate).schedule(TEXT)
+    assert _retype(sched.keys, sched.down.tolist()) == TEXT
+    assert np.all(np.diff(sched.times) >= 0)
+    if typo_rate:
+        assert sched.typos > 0 and "\b" in sched.strokes
+
+
+def test_every_key_goes_up_before_it_goes_down_again():
+    sched = TypingModel(9, typo_rate=0.2).schedule("aaa bookkeeper MISSISSIPPI")
+    held = set()
+    for key, down in zip(sched.keys, sched.down.tolist()):
+        assert (key in held) != down
+        (held.add if down else held.discard)(key)
+    assert not held
+
+
+def test_same_seed_same_schedule():
+    a = TypingModel(12, typo_rate=0.1).schedule(TEXT)
+    b = TypingModel(12, typo_rate=0.1).schedule(TEXT)
+    assert a.keys == b.keys
+    assert a.times.tobytes() == b.times.tobytes()
+
+
+def test_pace_follows_wpm():
+    text = "the quick brown fox jumps over the lazy dog " * 5
+    slow = TypingModel(1).schedule(text, wpm=40).duration
+    fast = TypingModel(1).schedule(text, wpm=120).duration
+    assert slow / fast == pytest.approx(3.0, rel=0.15)
+
+
+def test_compiled_plan_types_the_text_on_a_backend(playback, vclock):
+    backend = MemoryBackend(clock=vclock)
+    plan = TypingModel(2, typo_rate=0.2).compile(TEXT, backend)
+    stats = plan.run(playback())
+    keys = [args[0] for _, op, args in backend.calls]
+    downs = [op == "key_down" for _, op, _ in backend.calls]
+    assert _retype(keys, downs) == TEXT
+    assert stats.count == len(plan)
+    assert not backend.keys
+
+
+def test_stop_releases_held_keys(playback, vclock):
+    backend = MemoryBackend(clock=vclock)
+    plan = TypingModel(2).compile("ABC", backend)
+
+    class Boom(Exception):
+        pass
+
+    calls = plan.calls
+    plan.calls = [*calls[:2], _raise(Boom), *calls[3:]]
+    with pytest.raises(Boom):
+        plan.run(playback())
+    # shift and A were down when the third step failed
+    assert not backend.keys
+
+
+def _raise(exc):
+    def fn(*args):
+        raise exc()
+    return fn
+
+
+def test_invalid_keys_fail_before_typing():
+    backend = MemoryBackend(valid_key=lambda k: k != "q")
+    with pytest.raises(ValueError, match="q"):
+        TypingModel(1).compile("quiet", backend)
+    assert backend.calls == []